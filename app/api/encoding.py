@@ -0,0 +1,190 @@
+from typing import Any
+
+import numpy as np
+import orjson
+from fastapi import HTTPException, Request, Response
+
+from app.core.metrics import stage
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+SUPPORTED_MEDIA_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+
+
+def negotiate(request: Request) -> str:
+    """Pick the response media type for a read endpoint from the request's ``Accept`` header.
+
+    Supported types are JSON (the default), msgpack and Arrow IPC stream.
+
+    Raises:
+        HTTPException: 406 if the client accepts none of the supported types
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    candidates: list[tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in SUPPORTED_MEDIA_TYPES:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+
+    raise HTTPException(
+        status_code=406, detail=f"Unsupported Accept header; supported types are {', '.join(SUPPORTED_MEDIA_TYPES)}"
+    )
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return np.ascontiguousarray(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not msgpack serializable: {type(value).__name__}")
+
+
+def dumps_json(payload: Any) -> bytes:
+    """Serialize to JSON with orjson; numpy float32 values keep their short form and NaN becomes null."""
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=_json_default)
+
+
+def to_jsonable(result: dict[str, Any]) -> dict[str, Any]:
+    """Round-trip a Chroma result through the fast JSON encoder so pydantic models can hold it."""
+    with stage("serialization"):
+        return orjson.loads(dumps_json(result))
+
+
+def _pack_array(value: Any) -> dict[str, Any]:
+    array = np.ascontiguousarray(value, dtype="<f4")
+    return {"dtype": "<f4", "shape": list(array.shape), "data": array.tobytes()}
+
+
+def _msgpack_result(result: dict[str, Any], nested: bool) -> dict[str, Any]:
+    packed = dict(result)
+    for key in ("embeddings", "distances"):
+        value = packed.get(key)
+        if value is None:
+            continue
+        packed[key] = [_pack_array(item) for item in value] if nested else _pack_array(value)
+    return packed
+
+
+def _field(result: dict[str, Any], key: str, group: int | None) -> Any:
+    value = result.get(key)
+    if value is None or group is None:
+        return value
+    return value[group]
+
+
+def _arrow_table(result: dict[str, Any], nested: bool) -> Any:
+    import pyarrow as pa
+
+    columns: dict[str, list[Any]] = {}
+    embeddings: list[np.ndarray] = []
+    for group in range(len(result["ids"])) if nested else [None]:
+        ids = _field(result, "ids", group)
+        if group is not None:
+            columns.setdefault("query_index", []).extend([group] * len(ids))
+        columns.setdefault("id", []).extend(ids)
+        for key, name in (
+            ("documents", "document"),
+            ("uris", "uri"),
+            ("distances", "distance"),
+            ("scores", "score"),
+            ("collections", "collection"),
+        ):
+            value = _field(result, key, group)
+            if value is not None:
+                columns.setdefault(name, []).extend(value)
+        metadatas = _field(result, "metadatas", group)
+        if metadatas is not None:
+            columns.setdefault("metadata", []).extend(
+                dumps_json(metadata).decode() if metadata is not None else None for metadata in metadatas
+            )
+        group_embeddings = _field(result, "embeddings", group)
+        if group_embeddings is not None and len(group_embeddings):
+            embeddings.append(np.asarray(group_embeddings, dtype="<f4").reshape(len(ids), -1))
+
+    arrays = {name: pa.array(values) for name, values in columns.items()}
+    if embeddings:
+        matrix = np.concatenate(embeddings)
+        arrays["embedding"] = pa.FixedSizeListArray.from_arrays(pa.array(matrix.ravel()), matrix.shape[1])
+    return pa.table(arrays)
+
+
+def encode_result(
+    result: dict[str, Any],
+    media_type: str,
+    nested: bool = False,
+    extra: dict[str, Any] | None = None,
+    wrap: bool = True,
+) -> Response:
+    """Encode a Chroma get/query/peek result in the negotiated media type.
+
+    * JSON keeps the existing ``{"data": ...}`` layout, serialized with orjson.
+    * msgpack uses the same layout but ships ``embeddings`` and ``distances`` as
+      ``{"dtype": "<f4", "shape": [...], "data": <bytes>}`` raw little-endian float32 buffers.
+    * Arrow IPC returns one row per document (plus ``query_index`` for query results) with a
+      fixed-size float32 list column for embeddings; ``extra`` is stored in the schema metadata.
+
+    Args:
+        result: Chroma GetResult or QueryResult
+        media_type: Media type returned by :func:`negotiate`
+        nested: Whether the result holds one list per query text (query results)
+        extra: Additional top-level fields such as ``next_cursor``
+        wrap: Whether JSON and msgpack place the result under a ``data`` key
+
+    Returns:
+        A Response with the encoded body
+    """
+    extra = extra or {}
+    with stage("serialization"):
+        return _encode(result, media_type, nested, extra, wrap)
+
+
+def _encode(result: dict[str, Any], media_type: str, nested: bool, extra: dict[str, Any], wrap: bool) -> Response:
+    if media_type == ARROW_MEDIA_TYPE:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow responses require the 'pyarrow' package")
+        table = _arrow_table(result, nested)
+        table = table.replace_schema_metadata({key: dumps_json(value) for key, value in extra.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(status_code=406, detail="msgpack responses require the 'msgpack' package")
+        packed = _msgpack_result(result, nested)
+        body = {"data": packed, **extra} if wrap else packed
+        return Response(content=msgpack.packb(body, default=_msgpack_default), media_type=MSGPACK_MEDIA_TYPE)
+
+    body = {"data": result, **extra} if wrap else result
+    return Response(content=dumps_json(body), media_type=JSON_MEDIA_TYPE)
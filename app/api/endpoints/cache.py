@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+
+from app.core.config import get_settings
+from app.db.batcher import query_batcher
+from app.db.embedding import get_embedding_cache
+from app.db.result_cache import result_cache
+from app.models.cache import CacheStatsResponse
+
+settings = get_settings()
+router = APIRouter()
+
+
+@router.get("/stats", response_model=CacheStatsResponse)
+async def get_cache_stats() -> CacheStatsResponse:
+    """Get hit-rate statistics of the query result cache and the embedding cache, and query batching counters.
+
+    Returns:
+        Statistics of each cache
+    """
+    return CacheStatsResponse(
+        query=result_cache.stats(),
+        embedding=get_embedding_cache().stats() if settings.EMBEDDING_CACHE_ENABLED else None,
+        query_batcher=query_batcher.stats(),
+    )
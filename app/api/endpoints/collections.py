@@ -1,26 +1,68 @@
+import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
+import numpy as np
+import orjson
 from chromadb.api.collection_configuration import (
     CreateCollectionConfiguration,
     CreateHNSWConfiguration,
     UpdateCollectionConfiguration,
     UpdateHNSWConfiguration,
+    validate_create_hnsw_config,
+    validate_update_hnsw_config,
 )
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-from fastapi import APIRouter, HTTPException
+from chromadb.api.models.Collection import Collection
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from app.api.encoding import encode_result, negotiate, to_jsonable
 from app.core.config import get_settings
-from app.db.client import get_chroma_client
+from app.core.metrics import stage
+from app.db.client import collection_registry, get_chroma_client, get_collection
+from app.db.cursor import StaleCursorError, decode_cursor, fetch_page, filter_fingerprint
+from app.db.duplicates import DUPLICATE_OF_KEY, find_duplicates
+from app.db.embedding import EMBEDDING_PROVIDERS, PROVIDER_METADATA_KEY, get_embedding_function, provider_for
+from app.db.executor import run_read, run_write
+from app.db.ingest import MAX_REPORTED_ERRORS, add_in_chunks, chunk_size_for, iter_chunks
+from app.db.lexical import lexical_indexes
+from app.db.reduced import REDUCED_DIMENSIONS_KEY, reduced_dimensions, truncated_embedding_function, vector_sidecars
+from app.db.result_cache import result_cache
+from app.db.search import rerank_candidates
+from app.db.tuning import (
+    exact_neighbors,
+    load_embeddings,
+    measure_collection,
+    measure_reduction,
+    measure_replica,
+    recommend_ef_search,
+)
 from app.models.collection import (
     CollectionInfoResponse,
     CollectionListResponse,
     CreateCollectionRequest,
+    CreateHNSWParams,
+    DuplicateCluster,
+    DuplicatesReport,
+    EvaluateReductionRequest,
+    FindDuplicatesRequest,
     ModifyCollectionRequest,
+    ReductionReport,
     SuccessResponse,
+    TuneCollectionRequest,
+    TuneCollectionResponse,
+    UpdateHNSWParams,
 )
 
 settings = get_settings()
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _hnsw_params(request: BaseModel, params: type[BaseModel]) -> dict[str, Any]:
+    """Collect the HNSW fields of ``request`` that are set; MCP clients send 0 or "" for unset fields."""
+    return {name: value for name in params.model_fields if (value := getattr(request, name))}
 
 
 @router.get("/", response_model=CollectionListResponse)
@@ -36,8 +78,10 @@ async def list_collections(limit: int = 10, offset: int = 0) -> CollectionListRe
     """
     client = get_chroma_client()
     try:
-        colls = client.list_collections(limit=limit, offset=offset)
+        colls = await run_read(client.list_collections, limit=limit, offset=offset)
         return CollectionListResponse(collections=[coll.name for coll in colls])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list collections: {str(e)}")
 
@@ -46,28 +90,61 @@ async def list_collections(limit: int = 10, offset: int = 0) -> CollectionListRe
 async def create_collection(request: CreateCollectionRequest) -> SuccessResponse:
     """Create a new Chroma collection with configurable HNSW parameters.
 
+    Unset HNSW fields use Chroma's defaults; ``space``, ``ef_construction`` and ``max_neighbors``
+    cannot be changed afterwards. With ``reduced_dimensions``, the index holds only the leading
+    dimensions of each embedding and ``/query`` re-ranks its candidates against the full vectors.
+
     Args:
         request: Collection creation parameters
 
     Returns:
         A SuccessResponse with confirmation message
     """
+    provider = request.embedding_provider or settings.EMBEDDING_PROVIDER
+    if provider not in EMBEDDING_PROVIDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown embedding provider '{provider}'; expected one of {', '.join(EMBEDDING_PROVIDERS)}",
+        )
+
+    if request.reduced_dimensions is not None and request.reduced_dimensions < 0:
+        raise HTTPException(status_code=400, detail="'reduced_dimensions' cannot be negative.")
+    if request.reduced_dimensions and not (vector_sidecars.persistent or settings.CHROMA_CLIENT_TYPE == "ephemeral"):
+        # The full vectors would be lost at exit while the collection lives on in Chroma.
+        raise HTTPException(
+            status_code=400,
+            detail="'reduced_dimensions' requires CHROMA_DATA_DIR, where the full vectors are kept across restarts.",
+        )
+
+    hnsw_config = CreateHNSWConfiguration(**_hnsw_params(request, CreateHNSWParams))
+    try:
+        validate_create_hnsw_config(hnsw_config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid HNSW configuration: {str(e)}")
+
     client = get_chroma_client()
 
     try:
-        hnsw_config = CreateHNSWConfiguration()
         configuration = CreateCollectionConfiguration(hnsw=hnsw_config)
 
-        client.create_collection(
+        embedding_function = get_embedding_function(provider)
+        metadata = {PROVIDER_METADATA_KEY: provider}
+        # MCP clients send 0 for omitted numeric fields.
+        if request.reduced_dimensions:
+            metadata[REDUCED_DIMENSIONS_KEY] = request.reduced_dimensions
+            embedding_function = truncated_embedding_function(embedding_function, request.reduced_dimensions)
+        collection = await run_write(
+            client.create_collection,
             name=request.collection_name,
             configuration=configuration,
-            embedding_function=OpenAIEmbeddingFunction(
-                api_key=settings.OPENAI_API_KEY,
-                model_name="text-embedding-3-small",
-            ),
+            metadata=metadata,
+            embedding_function=embedding_function,
         )
+        collection_registry.register(collection, embedding_function)
 
         return SuccessResponse(message=f"Successfully created collection {request.collection_name}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to create collection '{request.collection_name}': {str(e)}"
@@ -75,25 +152,106 @@ async def create_collection(request: CreateCollectionRequest) -> SuccessResponse
 
 
 @router.get("/{collection_name}/peek", response_model=dict[str, Any])
-async def peek_collection(collection_name: str, limit: int = 5) -> dict[str, Any]:
+async def peek_collection(collection_name: str, http_request: Request, limit: int = 5) -> Response:
     """Peek at documents in a Chroma collection.
 
+    The response is JSON by default; clients may ask for msgpack or Arrow IPC through the
+    ``Accept`` header to receive embeddings as raw float32 buffers.
+
     Args:
         collection_name: Name of the collection to peek into
+        http_request: Incoming request, used for content negotiation
         limit: Number of documents to peek at
 
     Returns:
         Sample documents from the collection
     """
-    client = get_chroma_client()
+    media_type = negotiate(http_request)
     try:
-        collection = client.get_collection(collection_name)
-        results = collection.peek(limit=limit)
-        return results
+        collection = await get_collection(collection_name)
+        results = await run_read(collection.peek, limit=limit)
+        return encode_result(results, media_type, wrap=False)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to peek collection '{collection_name}': {str(e)}")
 
 
+@router.get("/{collection_name}/export", response_class=StreamingResponse)
+async def export_collection(
+    collection_name: str,
+    page_size: int = 1000,
+    include_embeddings: bool = False,
+    cursor: str | None = None,
+) -> StreamingResponse:
+    """Stream every document in a Chroma collection as NDJSON.
+
+    The collection is read one page at a time with a stable cursor and each page is written out
+    before the next is fetched, so server memory does not depend on the collection size. Lines use
+    the same ``{"id", "document", "metadata", "embedding"?}`` layout accepted by
+    ``POST /api/documents/import``.
+
+    Args:
+        collection_name: Name of the collection to export
+        page_size: Number of documents fetched per page
+        include_embeddings: Whether to include each document's embedding
+        cursor: Optional cursor to resume after, e.g. from the error line of an interrupted export
+
+    Returns:
+        A chunked application/x-ndjson response
+    """
+    if page_size < 1:
+        raise HTTPException(status_code=400, detail="'page_size' must be at least 1.")
+
+    try:
+        collection = await get_collection(collection_name)
+        if cursor is not None:
+            decode_cursor(cursor, filter_fingerprint(None, None))
+    except HTTPException:
+        raise
+    except StaleCursorError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export collection '{collection_name}': {str(e)}")
+
+    include = ["documents", "metadatas", "embeddings"] if include_embeddings else ["documents", "metadatas"]
+
+    async def stream_pages() -> AsyncIterator[bytes]:
+        next_cursor = cursor
+        while True:
+            try:
+                page, next_cursor = await run_read(
+                    fetch_page, collection, page_size, cursor=next_cursor, include=include
+                )
+            except Exception as e:
+                # Headers are already sent, so the failure can only be signalled in-band.
+                logger.error("Export of collection '%s' failed: %s", collection_name, e)
+                yield orjson.dumps({"error": str(e), "cursor": next_cursor}) + b"\n"
+                return
+            yield _page_to_ndjson(page)
+            if next_cursor is None:
+                return
+
+    return StreamingResponse(stream_pages(), media_type="application/x-ndjson")
+
+
+def _page_to_ndjson(page: dict[str, Any]) -> bytes:
+    with stage("serialization"):
+        return _encode_ndjson(page)
+
+
+def _encode_ndjson(page: dict[str, Any]) -> bytes:
+    embeddings = page.get("embeddings")
+    lines = []
+    for i, _id in enumerate(page["ids"]):
+        record = {"id": _id, "document": page["documents"][i], "metadata": page["metadatas"][i]}
+        if embeddings is not None:
+            record["embedding"] = embeddings[i]
+        lines.append(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY))
+    lines.append(b"")
+    return b"\n".join(lines)
+
+
 @router.get("/{collection_name}/info", response_model=CollectionInfoResponse)
 async def get_collection_info(collection_name: str) -> CollectionInfoResponse:
     """Get information about a Chroma collection.
@@ -104,17 +262,24 @@ async def get_collection_info(collection_name: str) -> CollectionInfoResponse:
     Returns:
         Collection information including name, count, and sample documents
     """
-    client = get_chroma_client()
     try:
-        collection = client.get_collection(collection_name)
+        collection = await get_collection(collection_name)
 
         # Get collection count
-        count = collection.count()
+        count = await run_read(collection.count)
 
         # Peek at a few documents
-        peek_results = collection.peek(limit=3)
-
-        return CollectionInfoResponse(name=collection_name, count=count, sample_documents=peek_results)
+        peek_results = await run_read(collection.peek, limit=3)
+
+        return CollectionInfoResponse(
+            name=collection_name,
+            count=count,
+            embedding_provider=provider_for(collection.metadata),
+            reduced_dimensions=reduced_dimensions(collection.metadata),
+            sample_documents=to_jsonable(peek_results),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get collection info for '{collection_name}': {str(e)}")
 
@@ -129,17 +294,289 @@ async def get_collection_count(collection_name: str) -> int:
     Returns:
         Number of documents in the collection
     """
-    client = get_chroma_client()
     try:
-        collection = client.get_collection(collection_name)
-        return collection.count()
+        collection = await get_collection(collection_name)
+        return await run_read(collection.count)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get collection count for '{collection_name}': {str(e)}")
 
 
+async def _tuning_queries(
+    collection_name: str, request: TuneCollectionRequest, data: np.ndarray
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Embed the request's query texts, or sample stored embeddings along with the rows to exclude."""
+    if request.query_texts:
+        embedding_function = collection_registry.embedding_function(collection_name)
+        return np.asarray(await run_read(embedding_function, request.query_texts), dtype=np.float32), None
+
+    rng = np.random.default_rng(request.seed)
+    rows = rng.choice(len(data), size=min(request.sample_size, len(data)), replace=False)
+    return data[rows], rows
+
+
+@router.post("/{collection_name}/tune", response_model=TuneCollectionResponse)
+async def tune_collection(collection_name: str, request: TuneCollectionRequest) -> TuneCollectionResponse:
+    """Measure the recall vs. latency tradeoff of candidate ``ef_search`` values for a collection.
+
+    Every embedding is loaded to compute the exact nearest neighbors of the sample queries by brute
+    force. The collection itself is measured with its current ``ef_search``. The candidates are
+    measured on an in-memory replica index built with the collection's HNSW parameters, because
+    Chroma only applies a new ``ef_search`` when the index is reloaded. With ``apply``, the smallest
+    candidate reaching ``target_recall`` is stored in the collection's configuration.
+
+    Args:
+        collection_name: Name of the collection to tune
+        request: Tuning parameters
+
+    Returns:
+        Recall and latency of the current setting and of each candidate, and the recommendation
+    """
+    if not request.ef_search_values or any(value <= 0 for value in request.ef_search_values):
+        raise HTTPException(status_code=400, detail="'ef_search_values' must be a non-empty list of positive values.")
+    if request.sample_size <= 0 or request.n_results <= 0:
+        raise HTTPException(status_code=400, detail="'sample_size' and 'n_results' must be positive.")
+
+    try:
+        collection = await get_collection(collection_name)
+        count = await run_read(collection.count)
+        if count > request.max_documents:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Collection '{collection_name}' has {count} documents, more than max_documents={request.max_documents}.",
+            )
+
+        minimum = request.n_results if request.query_texts else request.n_results + 1
+        if count < minimum:
+            raise HTTPException(
+                status_code=400, detail=f"Collection '{collection_name}' needs at least {minimum} documents to tune."
+            )
+
+        ids, data = await run_read(load_embeddings, collection)
+        queries, exclude = await _tuning_queries(collection_name, request, data)
+        hnsw = collection.configuration_json.get("hnsw") or {}
+        space = hnsw.get("space", "l2")
+        expected = await run_read(exact_neighbors, data, queries, request.n_results, space, exclude)
+        current = await run_read(
+            measure_collection, collection, ids, queries, expected, exclude, hnsw.get("ef_search", 100)
+        )
+        try:
+            candidates, build_seconds = await run_read(
+                measure_replica, data, queries, expected, exclude, hnsw, sorted(set(request.ef_search_values))
+            )
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Tuning requires the 'chroma-hnswlib' package")
+
+        recommended = recommend_ef_search(candidates, request.target_recall)
+        applied = False
+        if request.apply and recommended is not None:
+            configuration = UpdateCollectionConfiguration(hnsw=UpdateHNSWConfiguration(ef_search=recommended))
+            try:
+                await run_write(collection.modify, configuration=configuration)
+            finally:
+                collection_registry.invalidate(collection_name)
+            applied = True
+
+        return TuneCollectionResponse(
+            collection_name=collection_name,
+            count=count,
+            dimensions=data.shape[1],
+            hnsw=hnsw,
+            sample_size=len(queries),
+            n_results=request.n_results,
+            current=current,
+            candidates=candidates,
+            replica_build_seconds=build_seconds,
+            recommended_ef_search=recommended,
+            applied=applied,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to tune collection '{collection_name}': {str(e)}")
+
+
+@router.post("/{collection_name}/reduction", response_model=ReductionReport)
+async def evaluate_reduction(collection_name: str, request: EvaluateReductionRequest) -> ReductionReport:
+    """Report the index memory saved by a reduced-dimension collection and the recall it costs.
+
+    Stored documents are sampled as queries and their exact neighbors are brute-forced over the
+    full vectors in the sidecar. Recall@k is measured for the reduced index alone and for the
+    two-stage search ``/query`` runs (over-fetching ``candidates`` and re-ranking them exactly).
+
+    Args:
+        collection_name: Name of the reduced collection
+        request: Evaluation parameters
+
+    Returns:
+        Memory use of the index at reduced and full dimension, recall and latency of both stages
+    """
+    if request.sample_size <= 0 or request.n_results <= 0:
+        raise HTTPException(status_code=400, detail="'sample_size' and 'n_results' must be positive.")
+
+    try:
+        collection = await get_collection(collection_name)
+        dimensions = reduced_dimensions(collection.metadata)
+        if not dimensions:
+            raise HTTPException(
+                status_code=400, detail=f"Collection '{collection_name}' was not created with 'reduced_dimensions'."
+            )
+        count = await run_read(collection.count)
+        if count > request.max_documents:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Collection '{collection_name}' has {count} documents, more than max_documents={request.max_documents}.",
+            )
+        if count < request.n_results + 1:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Collection '{collection_name}' needs at least {request.n_results + 1} documents to evaluate.",
+            )
+
+        sidecar = vector_sidecars.get(collection)
+        space = (collection.configuration_json.get("hnsw") or {}).get("space", "l2")
+        candidates = rerank_candidates(request.n_results + 1, request.candidates)
+        measured = await run_read(
+            measure_reduction,
+            collection,
+            sidecar,
+            dimensions,
+            space,
+            request.sample_size,
+            request.n_results,
+            candidates,
+            request.seed,
+        )
+        full_dimensions = sidecar.dimension or dimensions
+        return ReductionReport(
+            collection_name=collection_name,
+            count=count,
+            full_dimensions=full_dimensions,
+            reduced_dimensions=dimensions,
+            index_vector_bytes=count * dimensions * 4,
+            full_index_vector_bytes=count * full_dimensions * 4,
+            memory_saved_bytes=count * (full_dimensions - dimensions) * 4,
+            sidecar_bytes=sidecar.nbytes,
+            n_results=request.n_results,
+            candidates=candidates,
+            **measured,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to evaluate collection '{collection_name}': {str(e)}")
+
+
+async def _resolve_duplicates(
+    collection: Collection, action: str, clusters: list[tuple[list[str], float]]
+) -> tuple[int, list[str]]:
+    """Tag or delete every document of ``clusters`` but the first, in chunks.
+
+    Returns:
+        The number of documents changed and the errors of chunks that failed
+    """
+    kept_by_id = {id_: ids[0] for ids, _ in clusters for id_ in ids[1:]}
+    duplicates = list(kept_by_id)
+    max_size = chunk_size_for(get_chroma_client())
+    if action == "tag":
+        metadatas = [{DUPLICATE_OF_KEY: kept_by_id[id_]} for id_ in duplicates]
+        results = await add_in_chunks(
+            collection,
+            iter_chunks(duplicates, None, metadatas, max_size=max_size),
+            collection_registry.embedding_function(collection.name),
+            operation="update",
+        )
+        errors = [result.error for result in results if not result.ok]
+        return sum(result.count for result in results if result.ok), errors[:MAX_REPORTED_ERRORS]
+
+    def delete(ids: list[str]) -> None:
+        collection.delete(ids=ids)
+        lexical_indexes.apply(collection, "delete", ids)
+
+    affected = 0
+    errors = []
+    for start in range(0, len(duplicates), max_size):
+        chunk = duplicates[start : start + max_size]
+        try:
+            await run_write(delete, chunk)
+            affected += len(chunk)
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            result_cache.invalidate(collection.name)
+    return affected, errors[:MAX_REPORTED_ERRORS]
+
+
+@router.post("/{collection_name}/duplicates", response_model=DuplicatesReport)
+async def find_duplicate_documents(collection_name: str, request: FindDuplicatesRequest) -> DuplicatesReport:
+    """Find clusters of near-duplicate documents and optionally tag or delete the duplicates.
+
+    Embeddings are streamed out of the collection into a temporary file and joined with themselves
+    in blocks of matrix products spread over ``SIMILARITY_JOIN_WORKERS`` threads, instead of one
+    ``/query`` per document. Documents linked by a chain of pairs at or above ``threshold`` form a
+    cluster; the first of each cluster in collection order is kept.
+
+    Args:
+        collection_name: Name of the collection
+        request: Threshold, filters and the action applied to the duplicates
+
+    Returns:
+        The clusters found, the number of documents tagged or deleted and the throughput of the join
+    """
+    # MCP clients send "" or 0 for unset fields.
+    action = request.action or "none"
+    threshold = request.threshold or 0.95
+    if action not in ("none", "tag", "delete"):
+        raise HTTPException(status_code=400, detail="'action' must be 'none', 'tag' or 'delete'.")
+    if not 0 < threshold <= 1:
+        raise HTTPException(status_code=400, detail="'threshold' must be greater than 0 and at most 1.")
+    if request.max_pairs < 0 or request.max_clusters < 0:
+        raise HTTPException(status_code=400, detail="'max_pairs' and 'max_clusters' cannot be negative.")
+
+    try:
+        collection = await get_collection(collection_name)
+        found = await run_read(
+            find_duplicates,
+            collection,
+            threshold,
+            request.max_pairs or 1_000_000,
+            request.where or None,
+            request.where_document or None,
+        )
+        clusters = found.pop("clusters")
+        affected, errors = (0, []) if action == "none" else await _resolve_duplicates(collection, action, clusters)
+        seconds = found["load_seconds"] + found["join_seconds"]
+        return DuplicatesReport(
+            collection_name=collection_name,
+            threshold=threshold,
+            cluster_count=len(clusters),
+            duplicate_count=sum(len(ids) - 1 for ids, _ in clusters),
+            clusters=[
+                DuplicateCluster(kept=ids[0], duplicates=ids[1:], min_similarity=similarity)
+                for ids, similarity in clusters[: request.max_clusters or 100]
+            ],
+            action=action,
+            affected=affected,
+            errors=errors,
+            docs_per_second=found["count"] / seconds if seconds else 0.0,
+            comparisons_per_second=found["comparisons"] / found["join_seconds"] if found["join_seconds"] else 0.0,
+            **found,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to find duplicates in collection '{collection_name}': {str(e)}"
+        )
+
+
 @router.put("/{collection_name}", response_model=SuccessResponse)
 async def modify_collection(collection_name: str, request: ModifyCollectionRequest) -> SuccessResponse:
-    """Modify a Chroma collection's name
+    """Modify a Chroma collection's name and/or its mutable HNSW parameters.
+
+    HNSW changes are stored in the collection's configuration; Chroma applies them to the search
+    index the next time the index is loaded (e.g. after a restart).
 
     Args:
         collection_name: Name of the collection to modify
@@ -148,21 +585,37 @@ async def modify_collection(collection_name: str, request: ModifyCollectionReque
     Returns:
         A SuccessResponse with confirmation message
     """
-    client = get_chroma_client()
+    hnsw_params = _hnsw_params(request, UpdateHNSWParams)
+    if not request.new_name and not hnsw_params:
+        raise HTTPException(status_code=400, detail="Nothing to modify: set new_name or an HNSW parameter")
+    hnsw_config = UpdateHNSWConfiguration(**hnsw_params)
+    try:
+        validate_update_hnsw_config(hnsw_config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid HNSW configuration: {str(e)}")
+
     try:
-        collection = client.get_collection(collection_name)
+        collection = await get_collection(collection_name)
 
-        hnsw_config = UpdateHNSWConfiguration()
         configuration = UpdateCollectionConfiguration(hnsw=hnsw_config)
-        collection.modify(name=request.new_name, configuration=configuration)
+        try:
+            await run_write(collection.modify, name=request.new_name or None, configuration=configuration)
+        finally:
+            affected = [collection_name, *([request.new_name] if request.new_name else [])]
+            collection_registry.invalidate(*affected)
+            result_cache.invalidate(*affected)
 
         modified_aspects = []
         if request.new_name:
             modified_aspects.append("name")
+        if hnsw_params:
+            modified_aspects.append(f"HNSW parameters ({', '.join(sorted(hnsw_params))})")
 
         return SuccessResponse(
             message=f"Successfully modified collection {collection_name}: updated {' and '.join(modified_aspects)}"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to modify collection '{collection_name}': {str(e)}")
 
@@ -179,7 +632,17 @@ async def delete_collection(collection_name: str) -> SuccessResponse:
     """
     client = get_chroma_client()
     try:
-        client.delete_collection(collection_name)
+        collection = await get_collection(collection_name)
+        try:
+            await run_write(client.delete_collection, collection_name)
+        finally:
+            collection_registry.invalidate(collection_name)
+            result_cache.invalidate(collection_name)
+            lexical_indexes.drop(str(collection.id))
+        # Unlike the BM25 index, the full vectors cannot be rebuilt, so they are only removed with the collection.
+        vector_sidecars.drop(str(collection.id))
         return SuccessResponse(message=f"Successfully deleted collection {collection_name}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete collection '{collection_name}': {str(e)}")
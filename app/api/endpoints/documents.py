@@ -1,71 +1,342 @@
+import logging
+import tempfile
+import time
 import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import IO, Any, Literal
 
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-from fastapi import APIRouter, HTTPException
+from chromadb.api.models.Collection import Collection
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel
 
+from app.api.encoding import encode_result, negotiate
 from app.core.config import get_settings
-from app.db.client import get_chroma_client
+from app.db.batcher import query_batcher
+from app.db.client import collection_registry, get_chroma_client, get_collection
+from app.db.cursor import StaleCursorError, fetch_page
+from app.db.executor import run_read, run_write
+from app.db.ingest import (
+    ImportStats,
+    WriteOperation,
+    add_in_chunks,
+    aiter_changed,
+    aiter_ndjson_records,
+    aiter_parquet_records,
+    aiter_record_chunks,
+    chunk_size_for,
+    content_id,
+    iter_chunks,
+    stored_dimension,
+    with_content_hash,
+)
+from app.db.jobs import job_manager
+from app.db.lexical import lexical_indexes
+from app.db.reduced import reduced_dimensions
+from app.db.result_cache import result_cache
+from app.db.search import fanout_query, hybrid_query, reranked_query
 from app.models.document import (
     AddDocumentsRequest,
+    AddDocumentsResponse,
+    ChunkResult,
     DeleteDocumentsRequest,
+    FanoutQueryRequest,
+    FanoutQueryResponse,
     GetDocumentsRequest,
     GetDocumentsResponse,
+    HybridQueryRequest,
+    ImportDocumentsResponse,
     QueryDocumentsRequest,
     QueryResponse,
     SuccessResponse,
+    UpdateDocumentsRequest,
+    UpsertDocumentsRequest,
+    WriteDocumentsResponse,
 )
+from app.models.job import JobResponse
 
 settings = get_settings()
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+PARQUET_SPOOL_BYTES = 8 * 1024 * 1024
+# Body chunks are gathered up to this size before each spool write, to limit hops to the read pool.
+PARQUET_SPOOL_WRITE_BYTES = 1024 * 1024
+
+
+async def _spool_body(http_request: Request, spool: IO[bytes]) -> None:
+    """Copy the request body into ``spool`` and rewind it.
+
+    Past ``PARQUET_SPOOL_BYTES`` the spool is a file on disk, so writes are made on the read pool
+    in batches of ``PARQUET_SPOOL_WRITE_BYTES`` instead of on the event loop.
+    """
+    pending = bytearray()
+    async for data in http_request.stream():
+        pending += data
+        if len(pending) >= PARQUET_SPOOL_WRITE_BYTES:
+            await run_read(spool.write, bytes(pending))
+            pending.clear()
+    await run_read(spool.write, bytes(pending))
+    await run_read(spool.seek, 0)
 
 
-@router.post("/add", response_model=SuccessResponse)
-async def add_documents(request: AddDocumentsRequest) -> SuccessResponse:
+async def _cached_read(
+    kind: str, request: BaseModel, media_type: str, read: Callable[[], Awaitable[Response]]
+) -> Response:
+    """Serve a read endpoint from the result cache, or run ``read`` and cache its encoded response."""
+    if not settings.QUERY_CACHE_ENABLED:
+        return await read()
+
+    collection_name = request.collection_name
+    generation = result_cache.generation(collection_name)
+    digest = result_cache.digest(kind, request, media_type)
+    cached = result_cache.get(collection_name, generation, digest)
+    if cached is not None:
+        body, cached_media_type = cached
+        return Response(content=body, media_type=cached_media_type)
+
+    response = await read()
+    result_cache.put(collection_name, generation, digest, response.body, response.media_type)
+    return response
+
+
+def _ingest_batch(request: AddDocumentsRequest) -> tuple[list[str], list[dict[str, Any]] | None]:
+    """Resolve the IDs and metadatas to write for an add request.
+
+    Raises:
+        HTTPException: If ``ids`` or ``metadatas`` do not match the number of documents
+    """
+    # MCP clients send empty lists for omitted optional fields.
+    ids, metadatas = request.ids or None, request.metadatas or None
+    for field_name, values in (("ids", ids), ("metadatas", metadatas)):
+        if values is not None and len(values) != len(request.documents):
+            raise HTTPException(
+                status_code=400,
+                detail=f"'{field_name}' has {len(values)} entries but there are {len(request.documents)} documents.",
+            )
+
+    if request.deduplicate:
+        ids = ids or [content_id(document) for document in request.documents]
+        metadatas = [
+            with_content_hash(document, metadatas[position] if metadatas else None)
+            for position, document in enumerate(request.documents)
+        ]
+        return ids, metadatas
+
+    ids = ids or [str(uuid.uuid4()) for _ in range(len(request.documents))]
+    if metadatas is not None:
+        # Chroma rejects empty metadata dicts, so fill them with the document ID.
+        metadatas = [metadata or {"id": _id} for metadata, _id in zip(metadatas, ids, strict=True)]
+    return ids, metadatas
+
+
+@router.post("/add", response_model=AddDocumentsResponse)
+async def add_documents(request: AddDocumentsRequest) -> AddDocumentsResponse:
     """Add documents to a Chroma collection.
 
+    Documents are split into chunks bounded by the client's maximum batch size and the embedding
+    token budget. Embedding of the next chunk overlaps the write of the current one, and a failed
+    chunk does not discard chunks that were already written. With ``deduplicate``, documents whose
+    content hash is already stored are dropped before embedding, so re-running an ingestion only
+    pays for what changed.
+
     Args:
         request: Document addition parameters
 
     Returns:
-        A SuccessResponse with confirmation message
+        An AddDocumentsResponse with per-chunk results
     """
     if not request.documents:
         raise HTTPException(status_code=400, detail="The 'documents' list cannot be empty.")
 
+    ids, metadatas = _ingest_batch(request)
     client = get_chroma_client()
-    print("Number of documents that can be inserted at once: ", client.get_max_batch_size())
+    stats = ImportStats(received=len(request.documents))
+    try:
+        collection = await get_collection(request.collection_name, create=True)
+        embedding_function = collection_registry.embedding_function(request.collection_name)
+
+        chunks = iter_chunks(ids, request.documents, metadatas, max_size=chunk_size_for(client))
+        if request.deduplicate:
+            chunks = aiter_changed(collection, chunks, stats)
+        operation = "upsert" if request.deduplicate else "add"
+        results = await add_in_chunks(collection, chunks, embedding_function, operation=operation)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to add documents to collection '{request.collection_name}': {str(e)}"
+        )
+
+    added = sum(result.count for result in results if result.ok)
+    failed = sum(result.count for result in results if not result.ok)
+    if failed and not added:
+        errors = "; ".join(f"chunk {result.index}: {result.error}" for result in results)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to add documents to collection '{request.collection_name}': {errors}"
+        )
+
+    message = f"Successfully added {added} documents to collection {request.collection_name}"
+    if stats.skipped:
+        message += f" ({stats.skipped} unchanged documents skipped)"
+    if failed:
+        message += f" ({failed} documents in {sum(not result.ok for result in results)} chunks failed)"
+    return AddDocumentsResponse(message=message, added=added, failed=failed, skipped=stats.skipped, chunks=results)
+
+
+@router.post("/add/background", response_model=JobResponse, status_code=202)
+async def add_documents_background(request: AddDocumentsRequest) -> JobResponse:
+    """Enqueue documents to be added to a Chroma collection by a background job.
+
+    Returns as soon as the job is stored, instead of holding the connection open while the
+    documents are embedded and written. Poll ``GET /api/jobs/{job_id}`` for its progress.
+
+    Args:
+        request: Document addition parameters
+
+    Returns:
+        The status of the queued job
+    """
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="The 'documents' list cannot be empty.")
+
+    ids, metadatas = _ingest_batch(request)
     try:
-        collection = client.get_or_create_collection(
+        job = await job_manager.enqueue(
+            "add",
             request.collection_name,
-            embedding_function=OpenAIEmbeddingFunction(
-                api_key=settings.OPENAI_API_KEY,
-                model_name="text-embedding-3-small",
-            ),
+            ids,
+            documents=request.documents,
+            metadatas=metadatas,
+            deduplicate=request.deduplicate,
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to enqueue documents for collection '{request.collection_name}': {str(e)}"
+        )
+    return JobResponse(**job)
 
-        # Generate sequential IDs
-        ids = [str(uuid.uuid4()) for _ in range(len(request.documents))]
-        for metadata, _id in zip(request.metadatas, ids, strict=True):
-            if not metadata:
-                metadata["id"] = _id
 
-        collection.add(documents=request.documents, metadatas=request.metadatas, ids=ids)
+@router.post("/import", response_model=ImportDocumentsResponse)
+async def import_documents(
+    http_request: Request,
+    collection_name: str,
+    format: Literal["ndjson", "parquet"] | None = None,
+    deduplicate: bool = False,
+) -> ImportDocumentsResponse:
+    """Bulk import documents from a streamed NDJSON body or an uploaded Parquet file.
 
-        return SuccessResponse(
-            message=f"Successfully added {len(request.documents)} documents to collection {request.collection_name}"
+    Each record is ``{"id"?: str, "document": str, "metadata"?: dict, "embedding"?: list[float]}``.
+    Records are parsed incrementally and fed through the chunked add pipeline, so memory use does
+    not grow with the size of the input. Records that carry an ``embedding`` skip the embedding step.
+
+    Args:
+        http_request: Incoming request whose body holds the records
+        collection_name: Name of the collection to import into (created if missing)
+        format: Input format; defaults to parquet for parquet content types and ndjson otherwise
+        deduplicate: Derive IDs from the content of records without an ID, skip records stored with
+            identical content and metadata before embedding them, and upsert the rest
+
+    Returns:
+        An ImportDocumentsResponse with counts, failed chunks and throughput
+    """
+    if format is None:
+        format = "parquet" if "parquet" in http_request.headers.get("content-type", "") else "ndjson"
+
+    client = get_chroma_client()
+    started = time.perf_counter()
+    stats = ImportStats()
+    written = 0
+
+    async def report_progress(result: ChunkResult) -> None:
+        nonlocal written
+        written += result.count if result.ok else 0
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Import into '%s': chunk %d %s, %d documents written (%.0f docs/s)",
+            collection_name,
+            result.index,
+            "written" if result.ok else f"failed: {result.error}",
+            written,
+            written / elapsed if elapsed > 0 else 0.0,
         )
+
+    try:
+        collection = await get_collection(collection_name, create=True)
+        embedding_function = collection_registry.embedding_function(collection_name)
+        max_size = chunk_size_for(client)
+
+        async def ingest(records: AsyncIterator[dict[str, Any]]) -> list[ChunkResult]:
+            chunks = aiter_record_chunks(records, max_size, stats, content_ids=deduplicate)
+            if deduplicate:
+                chunks = aiter_changed(collection, chunks, stats)
+            operation = "upsert" if deduplicate else "add"
+            return await add_in_chunks(
+                collection, chunks, embedding_function, on_result=report_progress, operation=operation
+            )
+
+        if format == "parquet":
+            with tempfile.SpooledTemporaryFile(max_size=PARQUET_SPOOL_BYTES) as spool:
+                await _spool_body(http_request, spool)
+                records = aiter_parquet_records(spool, batch_size=max_size, stats=stats)
+                results = await ingest(records)
+        else:
+            records = aiter_ndjson_records(http_request.stream(), stats)
+            results = await ingest(records)
+    except HTTPException:
+        raise
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet import requires the 'pyarrow' package to be installed")
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to add documents to collection '{request.collection_name}': {str(e)}"
+            status_code=500, detail=f"Failed to import documents into collection '{collection_name}': {str(e)}"
         )
 
+    elapsed = time.perf_counter() - started
+    added = sum(result.count for result in results if result.ok)
+    failed = sum(result.count for result in results if not result.ok)
+    docs_per_second = added / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        "Imported %d documents into '%s' in %.2fs (%.0f docs/s, %d failed, %d invalid, %d unchanged)",
+        added,
+        collection_name,
+        elapsed,
+        docs_per_second,
+        failed,
+        stats.invalid,
+        stats.skipped,
+    )
+
+    return ImportDocumentsResponse(
+        message=f"Imported {added} of {stats.received} records into collection {collection_name}",
+        received=stats.received,
+        added=added,
+        failed=failed,
+        invalid=stats.invalid,
+        skipped=stats.skipped,
+        chunks=len(results),
+        failed_chunks=[result for result in results if not result.ok],
+        errors=stats.errors,
+        elapsed_seconds=elapsed,
+        docs_per_second=docs_per_second,
+    )
+
 
 @router.post("/query", response_model=QueryResponse)
-async def query_documents(request: QueryDocumentsRequest) -> QueryResponse:
+async def query_documents(request: QueryDocumentsRequest, http_request: Request) -> Response:
     """Query documents from a Chroma collection with advanced filtering.
 
+    Concurrent queries against the same collection are coalesced for ``QUERY_BATCH_WINDOW_MS`` into
+    one embedding call and one multi-query. Collections created with ``reduced_dimensions`` are
+    searched in two stages instead: candidates from the compact index are re-ranked exactly against
+    the full vectors.
+    The response is JSON by default; clients may ask for msgpack or Arrow IPC through the
+    ``Accept`` header to receive embeddings as raw float32 buffers.
+
     Args:
         request: Document query parameters
+        http_request: Incoming request, used for content negotiation
 
     Returns:
         Query results
@@ -73,57 +344,376 @@ async def query_documents(request: QueryDocumentsRequest) -> QueryResponse:
     if not request.query_texts:
         raise HTTPException(status_code=400, detail="The 'query_texts' list cannot be empty.")
 
-    client = get_chroma_client()
-    try:
-        collection = client.get_collection(
-            request.collection_name,
-            embedding_function=OpenAIEmbeddingFunction(
-                api_key=settings.OPENAI_API_KEY,
-                model_name="text-embedding-3-small",
-            ),
-        )
-        results = collection.query(
+    media_type = negotiate(http_request)
+
+    async def read() -> Response:
+        collection = await get_collection(request.collection_name)
+        if reduced_dimensions(collection.metadata):
+            results = await reranked_query(
+                collection,
+                request.query_texts,
+                n_results=request.n_results,
+                where=request.where,
+                where_document=request.where_document,
+                include=request.include,
+            )
+            return encode_result(results, media_type, nested=True)
+
+        if settings.QUERY_BATCH_WINDOW_MS > 0:
+            results = await query_batcher.query(
+                request.collection_name,
+                request.query_texts,
+                n_results=request.n_results,
+                where=request.where,
+                where_document=request.where_document,
+                include=request.include,
+            )
+            return encode_result(results, media_type, nested=True)
+
+        results = await run_read(
+            collection.query,
             query_texts=request.query_texts,
             n_results=request.n_results,
             where=request.where or None,
             where_document=request.where_document or None,
             include=request.include,
         )
-        return QueryResponse(data=results)
+        return encode_result(results, media_type, nested=True)
+
+    try:
+        return await _cached_read("query", request, media_type, read)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to query documents from collection '{request.collection_name}': {str(e)}"
         )
 
 
+@router.post("/query/hybrid", response_model=QueryResponse)
+async def query_documents_hybrid(request: HybridQueryRequest, http_request: Request) -> Response:
+    """Search a collection by keywords and by meaning, fusing both rankings.
+
+    Documents are ranked by BM25 over a per-collection inverted index and by vector similarity,
+    with the same filters, and the rankings are combined with weighted reciprocal rank fusion.
+    Keyword-heavy queries therefore find exact term matches without raising ``n_results``. Each
+    hit carries its fused score in ``scores``; hits found only by BM25 have a NaN (null) distance.
+
+    Args:
+        request: Hybrid query parameters
+        http_request: Incoming request, used for content negotiation
+
+    Returns:
+        Query results with fused scores
+    """
+    if not request.query_texts:
+        raise HTTPException(status_code=400, detail="The 'query_texts' list cannot be empty.")
+    if request.vector_weight < 0 or request.lexical_weight < 0:
+        raise HTTPException(status_code=400, detail="'vector_weight' and 'lexical_weight' cannot be negative.")
+
+    media_type = negotiate(http_request)
+    # MCP clients send 0 for omitted numeric fields, so all-zero weights mean the defaults.
+    vector_weight, lexical_weight = request.vector_weight, request.lexical_weight
+    if not vector_weight and not lexical_weight:
+        vector_weight = lexical_weight = 1.0
+
+    async def read() -> Response:
+        results = await hybrid_query(
+            request.collection_name,
+            request.query_texts,
+            n_results=request.n_results,
+            where=request.where,
+            where_document=request.where_document,
+            include=request.include,
+            vector_weight=vector_weight,
+            lexical_weight=lexical_weight,
+            rrf_k=request.rrf_k or 60,
+            candidates=request.candidates or None,
+        )
+        return encode_result(results, media_type, nested=True)
+
+    try:
+        return await _cached_read("hybrid", request, media_type, read)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to run hybrid query on collection '{request.collection_name}': {str(e)}",
+        )
+
+
+@router.post("/query/fanout", response_model=FanoutQueryResponse)
+async def query_documents_fanout(request: FanoutQueryRequest, http_request: Request) -> Response:
+    """Query several Chroma collections concurrently and merge the hits by distance.
+
+    The query texts are embedded once and reused for every collection. Results are merged into a
+    global top ``n_results`` per query text, so distances should come from collections sharing the
+    same embedding model and distance space. A collection that is missing or fails is reported in
+    ``timings`` and the others are still returned.
+
+    Args:
+        request: Fan-out query parameters
+        http_request: Incoming request, used for content negotiation
+
+    Returns:
+        Merged query results with per-collection timings
+    """
+    if not request.collection_names:
+        raise HTTPException(status_code=400, detail="The 'collection_names' list cannot be empty.")
+    if not request.query_texts:
+        raise HTTPException(status_code=400, detail="The 'query_texts' list cannot be empty.")
+
+    media_type = negotiate(http_request)
+    collection_names = list(dict.fromkeys(request.collection_names))
+    try:
+        merged, timings, embedding_seconds = await fanout_query(
+            collection_names,
+            request.query_texts,
+            n_results=request.n_results,
+            where=request.where,
+            where_document=request.where_document,
+            include=request.include,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to query collections {collection_names}: {str(e)}")
+
+    if not any(timing.ok for timing in timings):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to query collections {collection_names}: "
+            + "; ".join(f"{timing.collection_name}: {timing.error}" for timing in timings),
+        )
+    return encode_result(
+        merged,
+        media_type,
+        nested=True,
+        extra={"timings": [timing.model_dump() for timing in timings], "embedding_seconds": embedding_seconds},
+    )
+
+
 @router.post("/get", response_model=GetDocumentsResponse)
-async def get_documents(request: GetDocumentsRequest) -> GetDocumentsResponse:
+async def get_documents(request: GetDocumentsRequest, http_request: Request) -> Response:
     """Get documents from a Chroma collection with optional filtering.
 
+    Paged reads (a ``limit`` without ``ids``) return a ``next_cursor`` that can be passed back as
+    ``cursor`` to read the following page. The response is JSON by default; clients may ask for
+    msgpack or Arrow IPC through the ``Accept`` header.
+
     Args:
         request: Document retrieval parameters
+        http_request: Incoming request, used for content negotiation
 
     Returns:
         Retrieved documents
     """
-    client = get_chroma_client()
-    try:
-        collection = client.get_collection(request.collection_name)
-        results = collection.get(
-            ids=request.ids,
+    media_type = negotiate(http_request)
+
+    async def read() -> Response:
+        collection = await get_collection(request.collection_name)
+        if not request.ids and request.limit is not None:
+            results, next_cursor = await run_read(
+                fetch_page,
+                collection,
+                request.limit,
+                cursor=request.cursor or None,
+                offset=request.offset or 0,
+                where=request.where,
+                where_document=request.where_document,
+                include=request.include,
+            )
+            return encode_result(results, media_type, extra={"next_cursor": next_cursor})
+
+        results = await run_read(
+            collection.get,
+            ids=request.ids or None,
             where=request.where or None,
             where_document=request.where_document or None,
             include=request.include,
             limit=request.limit,
             offset=request.offset,
         )
-        return GetDocumentsResponse(data=results)
+        return encode_result(results, media_type, extra={"next_cursor": None})
+
+    try:
+        return await _cached_read("get", request, media_type, read)
+    except HTTPException:
+        raise
+    except StaleCursorError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get documents from collection '{request.collection_name}': {str(e)}"
         )
 
 
+def _write_batch(
+    request: UpdateDocumentsRequest, operation: WriteOperation
+) -> tuple[list[str] | None, list[dict[str, Any]] | None, list[list[float]] | None]:
+    """Validate an update or upsert request and return its documents, metadatas and embeddings.
+
+    Raises:
+        HTTPException: If nothing is written, the lists do not match ``ids`` or the embeddings differ in size
+    """
+    if not request.ids:
+        raise HTTPException(status_code=400, detail="The 'ids' list cannot be empty.")
+
+    # MCP clients send empty lists for omitted optional fields.
+    documents, metadatas, embeddings = request.documents or None, request.metadatas or None, request.embeddings or None
+    if documents is None and embeddings is None and (operation == "upsert" or metadatas is None):
+        required = (
+            "'documents' or 'embeddings'" if operation == "upsert" else "'documents', 'metadatas' or 'embeddings'"
+        )
+        raise HTTPException(status_code=400, detail=f"Provide {required} to {operation}.")
+    for field_name, values in (("documents", documents), ("metadatas", metadatas), ("embeddings", embeddings)):
+        if values is not None and len(values) != len(request.ids):
+            raise HTTPException(
+                status_code=400,
+                detail=f"'{field_name}' has {len(values)} entries but there are {len(request.ids)} ids.",
+            )
+    if embeddings is not None and len({len(embedding) for embedding in embeddings}) > 1:
+        raise HTTPException(status_code=400, detail="All embeddings must have the same dimension.")
+    return documents, metadatas, embeddings
+
+
+async def _check_dimension(collection: Collection, embeddings: list[list[float]] | None) -> None:
+    """Check precomputed embeddings against the dimension of the vectors already stored in ``collection``.
+
+    Raises:
+        HTTPException: If the dimensions differ
+    """
+    if embeddings is None:
+        return
+    dimension = await run_read(stored_dimension, collection)
+    if dimension is not None and dimension != len(embeddings[0]):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Embeddings have dimension {len(embeddings[0])} but collection "
+            f"'{collection.name}' stores vectors of dimension {dimension}.",
+        )
+
+
+async def _write_documents(request: UpdateDocumentsRequest, operation: WriteOperation) -> WriteDocumentsResponse:
+    """Run an update or upsert through the chunked ingestion pipeline."""
+    documents, metadatas, embeddings = _write_batch(request, operation)
+    client = get_chroma_client()
+    try:
+        collection = await get_collection(request.collection_name, create=operation == "upsert")
+        await _check_dimension(collection, embeddings)
+        embedding_function = collection_registry.embedding_function(request.collection_name)
+        chunks = iter_chunks(request.ids, documents, metadatas, max_size=chunk_size_for(client), embeddings=embeddings)
+        results = await add_in_chunks(collection, chunks, embedding_function, operation=operation)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to {operation} documents in collection '{request.collection_name}': {str(e)}",
+        )
+
+    written = sum(result.count for result in results if result.ok)
+    failed = len(request.ids) - written
+    if not written:
+        errors = "; ".join(f"chunk {result.index}: {result.error}" for result in results)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to {operation} documents in collection '{request.collection_name}': {errors}",
+        )
+
+    verb = "updated" if operation == "update" else "upserted"
+    message = f"Successfully {verb} {written} documents in collection {request.collection_name}"
+    if operation == "update":
+        message += ". Note: Non-existent IDs are ignored by ChromaDB."
+    if failed:
+        message += f" ({failed} documents in {sum(not result.ok for result in results)} chunks failed)"
+    return WriteDocumentsResponse(message=message, written=written, failed=failed, chunks=results)
+
+
+@router.put("/update", response_model=WriteDocumentsResponse)
+async def update_documents(request: UpdateDocumentsRequest) -> WriteDocumentsResponse:
+    """Update the documents, metadatas and/or embeddings of existing documents in a collection.
+
+    Documents are embedded with the collection's embedding function unless ``embeddings`` are
+    given, in which case they are written as-is after checking their dimension against the vectors
+    already stored. Large requests are written in chunks, like additions.
+
+    Args:
+        request: Document update parameters
+
+    Returns:
+        A WriteDocumentsResponse with per-chunk results
+    """
+    return await _write_documents(request, "update")
+
+
+@router.post("/upsert", response_model=WriteDocumentsResponse)
+async def upsert_documents(request: UpsertDocumentsRequest) -> WriteDocumentsResponse:
+    """Insert documents, replacing those whose IDs already exist in the collection.
+
+    Either ``documents`` or precomputed ``embeddings`` are required. Embeddings are written as-is
+    after checking their dimension against the vectors already stored, so vectors computed offline
+    do not go through the embedding provider again. Large requests are written in chunks.
+
+    Args:
+        request: Document upsert parameters
+
+    Returns:
+        A WriteDocumentsResponse with per-chunk results
+    """
+    return await _write_documents(request, "upsert")
+
+
+async def _enqueue_write(request: UpdateDocumentsRequest, operation: WriteOperation) -> JobResponse:
+    """Validate an update or upsert request and enqueue it as a background job."""
+    documents, metadatas, embeddings = _write_batch(request, operation)
+    try:
+        collection = await get_collection(request.collection_name, create=operation == "upsert")
+        await _check_dimension(collection, embeddings)
+        job = await job_manager.enqueue(
+            operation, request.collection_name, request.ids, documents, metadatas, embeddings
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to enqueue {operation} of documents in collection '{request.collection_name}': {str(e)}",
+        )
+    return JobResponse(**job)
+
+
+@router.put("/update/background", response_model=JobResponse, status_code=202)
+async def update_documents_background(request: UpdateDocumentsRequest) -> JobResponse:
+    """Enqueue an update of existing documents to be run by a background job.
+
+    Poll ``GET /api/jobs/{job_id}`` for its progress.
+
+    Args:
+        request: Document update parameters
+
+    Returns:
+        The status of the queued job
+    """
+    return await _enqueue_write(request, "update")
+
+
+@router.post("/upsert/background", response_model=JobResponse, status_code=202)
+async def upsert_documents_background(request: UpsertDocumentsRequest) -> JobResponse:
+    """Enqueue an upsert of documents to be run by a background job.
+
+    Poll ``GET /api/jobs/{job_id}`` for its progress.
+
+    Args:
+        request: Document upsert parameters
+
+    Returns:
+        The status of the queued job
+    """
+    return await _enqueue_write(request, "upsert")
+
+
 @router.delete("/delete", response_model=SuccessResponse)
 async def delete_documents(request: DeleteDocumentsRequest) -> SuccessResponse:
     """Delete documents from a Chroma collection.
@@ -137,18 +727,28 @@ async def delete_documents(request: DeleteDocumentsRequest) -> SuccessResponse:
     if not request.ids:
         raise HTTPException(status_code=400, detail="The 'ids' list cannot be empty.")
 
-    client = get_chroma_client()
     try:
-        collection = client.get_collection(request.collection_name)
+        collection = await get_collection(request.collection_name)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get collection '{request.collection_name}': {str(e)}")
 
-    try:
+    def delete() -> None:
         collection.delete(ids=request.ids)
+        lexical_indexes.apply(collection, "delete", request.ids)
+
+    try:
+        try:
+            await run_write(delete)
+        finally:
+            result_cache.invalidate(request.collection_name)
         return SuccessResponse(
             message=f"Successfully deleted {len(request.ids)} documents from "
             f"collection '{request.collection_name}'. Note: Non-existent IDs are ignored by ChromaDB."
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to delete documents from collection '{request.collection_name}': {str(e)}"
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, HTTPException
+
+from app.db.executor import run_read, run_write
+from app.db.jobs import job_manager
+from app.models.job import JobListResponse, JobResponse
+
+router = APIRouter()
+
+
+@router.get("/", response_model=JobListResponse)
+async def list_jobs(status: str | None = None, limit: int = 50) -> JobListResponse:
+    """List background ingestion jobs, most recently created first.
+
+    Args:
+        status: Only list jobs in this state: ``queued``, ``running``, ``completed``, ``failed`` or ``cancelled``
+        limit: Maximum number of jobs to return
+
+    Returns:
+        A JobListResponse with the status of each job
+    """
+    try:
+        jobs = await run_read(job_manager.recent, status or None, limit or 50)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list jobs: {str(e)}")
+    return JobListResponse(jobs=[JobResponse(**job) for job in jobs])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str) -> JobResponse:
+    """Get the progress of a background ingestion job.
+
+    Args:
+        job_id: ID returned when the job was enqueued
+
+    Returns:
+        The job's status, documents done, throughput and errors
+    """
+    try:
+        job = await run_read(job_manager.get, job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get job '{job_id}': {str(e)}")
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return JobResponse(**job)
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str) -> JobResponse:
+    """Cancel a background ingestion job.
+
+    A queued job is cancelled at once. A running job stops after the chunk it is writing, keeping
+    the documents already written.
+
+    Args:
+        job_id: ID returned when the job was enqueued
+
+    Returns:
+        The job's status after the cancellation request
+    """
+    try:
+        job = await run_write(job_manager.cancel, job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to cancel job '{job_id}': {str(e)}")
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    if job["status"] in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' already {job['status']}")
+    return JobResponse(**job)
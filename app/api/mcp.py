@@ -0,0 +1,132 @@
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from types import TracebackType
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from fastapi_mcp import add_mcp_server, http_tools
+from mcp.server.fastmcp import FastMCP
+
+from app.core.config import get_settings
+from app.core.metrics import MCP_TOOL_SECONDS
+
+settings = get_settings()
+
+IN_PROCESS_BASE_URL = "http://mcp.in-process"
+
+# HTTP status of the API response behind the MCP tool call running in the current task.
+_tool_status: ContextVar[list[int] | None] = ContextVar("mcp_tool_status", default=None)
+
+
+async def _record_status(response: httpx.Response) -> None:
+    statuses = _tool_status.get()
+    if statuses is not None:
+        statuses.append(response.status_code)
+
+
+class _SharedAsyncClient:
+    """Async context manager that hands out a long-lived client without closing it on exit."""
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        return self._client
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        return None
+
+
+class _LoopbackHttpx:
+    """Stand-in for the ``httpx`` module used by fastapi_mcp's generated tool functions.
+
+    fastapi_mcp's tools return error responses as their result instead of raising, so the clients
+    handed out here record the status of each response for the MCP tool latency histogram.
+    """
+
+    def AsyncClient(self, *args: Any, **kwargs: Any) -> Any:  # noqa: N802
+        return httpx.AsyncClient(*args, event_hooks={"response": [_record_status]}, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(httpx, name)
+
+
+class _InProcessHttpx(_LoopbackHttpx):
+    """Stand-in for the ``httpx`` module that dispatches tool calls into the app itself.
+
+    fastapi_mcp opens ``httpx.AsyncClient()`` for every tool call and sends the request to
+    ``base_url``. Handing it a shared client with an ASGI transport dispatches the request straight
+    into the FastAPI app instead of through a new loopback TCP connection.
+    """
+
+    def __init__(self, app: FastAPI) -> None:
+        self._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url=IN_PROCESS_BASE_URL,
+            timeout=None,
+            event_hooks={"response": [_record_status]},
+        )
+
+    def AsyncClient(self, *args: Any, **kwargs: Any) -> _SharedAsyncClient:  # noqa: N802
+        return _SharedAsyncClient(self._client)
+
+
+def mount_mcp(app: FastAPI) -> FastMCP:
+    """Mount the MCP server on ``app`` using the dispatch mode from ``MCP_DISPATCH``.
+
+    ``in_process`` (the default) routes tool calls through an ASGI transport into ``app``;
+    ``loopback`` sends them over HTTP to ``MCP_BASE_URL`` (or ``http://APP_HOST:APP_PORT``).
+
+    Args:
+        app: The FastAPI application whose routes become MCP tools
+
+    Returns:
+        The mounted FastMCP server
+    """
+    # The generated tools share fastapi_mcp's module-level ``httpx``, so each mount sets it for its own mode.
+    if settings.MCP_DISPATCH == "in_process":
+        http_tools.httpx = _InProcessHttpx(app)
+        base_url = IN_PROCESS_BASE_URL
+    else:
+        http_tools.httpx = _LoopbackHttpx()
+        base_url = settings.MCP_BASE_URL or f"http://{settings.APP_HOST}:{settings.APP_PORT}"
+
+    mcp_server = add_mcp_server(
+        app,
+        mount_path="/mcp",
+        name="ChromaDB FastAPI MCP",
+        base_url=base_url,
+    )
+    for tool in mcp_server._tool_manager.list_tools():
+        tool.fn = _timed_tool(tool.name, tool.fn)
+    return mcp_server
+
+
+def _timed_tool(name: str, fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a generated tool function so each call is recorded in the MCP tool latency histogram.
+
+    Calls are labelled with the HTTP status code of the API response, or ``error`` when the call
+    failed before a response arrived.
+    """
+
+    @functools.wraps(fn)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        statuses: list[int] = []
+        token = _tool_status.set(statuses)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _tool_status.reset(token)
+            status = str(statuses[-1]) if statuses else "error"
+            MCP_TOOL_SECONDS.observe(time.perf_counter() - started, name, status)
+
+    return timed
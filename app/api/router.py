@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import collections, documents
+from app.api.endpoints import cache, collections, documents, jobs
 
 api_router = APIRouter()
 
 api_router.include_router(collections.router, prefix="/collections", tags=["collections"])
 api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -12,15 +13,101 @@ class Settings(BaseSettings):
     APP_DESCRIPTION: str = "FastAPI server for ChromaDB"
     APP_HOST: str = Field(description="Host for the FastAPI server")
     APP_PORT: int = Field(description="Port for the FastAPI server")
+    APP_WORKERS: int = Field(default=1, description="Number of worker processes started by `python -m app.serve`")
+    APP_RELOAD: bool = Field(default=False, description="Restart the server on code changes (`python -m app.main`)")
+    PREWARM_COLLECTIONS: str = Field(
+        default="",
+        description="Comma-separated collections whose indexes are loaded at startup, or * for all of them",
+    )
     MCP_BASE_URL: str | None = Field(description="Base URL for the MCP server")
+    MCP_DISPATCH: Literal["in_process", "loopback"] = Field(
+        default="in_process",
+        description="How MCP tool calls reach the API: in-process through ASGI, or loopback HTTP to MCP_BASE_URL",
+    )
 
     # ChromaDB settings
     CHROMA_CLIENT_TYPE: str = Field(
-        description="Type of Chroma client to use (persistent or ephemeral)",
+        description="Type of Chroma client to use (persistent, ephemeral or http)",
     )
     CHROMA_DATA_DIR: str | None = Field(
         description="Directory for persistent client data (only used with persistent client)",
     )
+    CHROMA_HOST: str = Field(default="127.0.0.1", description="Host of the Chroma server used by the http client")
+    CHROMA_PORT: int = Field(default=8001, description="Port of the Chroma server used by the http client")
+    SHARED_STATE_FILE: str | None = Field(
+        default=None, description="File through which worker processes share cache invalidations (set by app.serve)"
+    )
+
+    # Execution settings for blocking Chroma calls
+    CHROMA_READ_WORKERS: int = Field(default=8, description="Number of threads serving Chroma reads")
+    CHROMA_WRITE_WORKERS: int = Field(default=2, description="Number of threads serving Chroma writes")
+    CHROMA_READ_QUEUE_SIZE: int = Field(
+        default=64, description="Maximum number of reads waiting for a thread before requests are rejected with 503"
+    )
+    CHROMA_WRITE_QUEUE_SIZE: int = Field(
+        default=16, description="Maximum number of writes waiting for a thread before requests are rejected with 503"
+    )
+
+    # Ingestion settings
+    INGEST_CHUNK_SIZE: int = Field(
+        default=500, description="Maximum documents per ingestion chunk (capped by the client's max batch size)"
+    )
+    EMBEDDING_BATCH_MAX_TOKENS: int = Field(
+        default=250_000, description="Approximate token budget of a single embedding request"
+    )
+
+    # Embedding provider settings
+    EMBEDDING_PROVIDER: Literal["openai", "hashing"] = Field(
+        default="openai",
+        description="Embedding provider for new collections: OpenAI, or a local deterministic hashing vectorizer",
+    )
+    EMBEDDING_DIMENSIONS: int = Field(default=384, description="Vector size of the hashing embedding provider")
+    EMBEDDING_BATCH_SIZE: int = Field(default=256, description="Texts per batch for the hashing embedding provider")
+    EMBEDDING_THREADS: int = Field(default=4, description="Threads used by the hashing embedding provider")
+
+    # Embedding cache settings
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True, description="Cache embeddings by (model, sha256(text))")
+    EMBEDDING_CACHE_MEMORY_MB: int = Field(default=256, description="Size limit of the in-memory embedding cache")
+    EMBEDDING_CACHE_DISK: bool = Field(
+        default=False, description="Also cache embeddings in a SQLite file inside CHROMA_DATA_DIR"
+    )
+    EMBEDDING_CACHE_DISK_MB: int = Field(default=2048, description="Size limit of the on-disk embedding cache")
+
+    # Query result cache settings
+    QUERY_CACHE_ENABLED: bool = Field(default=True, description="Cache /query and /get responses per collection")
+    QUERY_CACHE_MEMORY_MB: int = Field(default=64, description="Size limit of the query result cache")
+    QUERY_CACHE_TTL_SECONDS: float = Field(default=300.0, description="Lifetime of a cached query result")
+
+    # Query micro-batching settings
+    QUERY_BATCH_WINDOW_MS: float = Field(
+        default=2.0, description="How long concurrent /query requests are held to be batched together (0 disables)"
+    )
+    QUERY_BATCH_MAX_TEXTS: int = Field(default=256, description="Distinct query texts that flush a batch early")
+
+    # Background ingestion job settings
+    INGEST_JOB_CONCURRENCY: int = Field(default=2, description="Ingestion jobs run at the same time per process")
+    INGEST_JOB_QUEUE_SIZE: int = Field(
+        default=100, description="Ingestion jobs that may wait for a worker before new ones are rejected"
+    )
+    INGEST_JOB_RETENTION_HOURS: float = Field(
+        default=168.0, description="How long finished ingestion jobs are kept for status lookups"
+    )
+
+    # Hybrid search settings
+    LEXICAL_FLUSH_SECONDS: float = Field(
+        default=30.0, description="Delay before a changed BM25 index is saved inside CHROMA_DATA_DIR"
+    )
+
+    # Near-duplicate detection settings
+    SIMILARITY_JOIN_WORKERS: int = Field(
+        default=0, description="Threads computing blocks of a similarity join (0 uses every core)"
+    )
+    SIMILARITY_JOIN_BLOCK_SIZE: int = Field(
+        default=2048, description="Rows per block of a similarity join; each thread holds a square of scores"
+    )
+
+    # Observability settings
+    METRICS_ENABLED: bool = Field(default=True, description="Record per-route request latency for /metrics")
 
     # OpenAI API key for embedding
     OPENAI_API_KEY: str | None = Field(description="OpenAI API key for embedding function")
@@ -0,0 +1,225 @@
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels, rendered in the Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        """Add ``amount`` to the series identified by ``label_values``."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative histogram with optional labels, rendered in the Prometheus text format."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record ``value`` in the series identified by ``label_values``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Collected:
+    """Metric whose series are read from a callback at scrape time, e.g. counters kept by a cache."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labels: tuple[str, ...],
+        collect: Callable[[], dict[LabelValues, float]],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labels = labels
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+class MetricsRegistry:
+    """Ordered set of metrics rendered together by the ``/metrics`` endpoint."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram | Collected] = {}
+
+    def register(self, metric: Any) -> Any:
+        """Add ``metric``, replacing any metric registered under the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+MCP_TOOL_SECONDS = registry.histogram("mcp_tool_call_duration_seconds", "MCP tool call latency", ("tool", "status"))
+STAGE_SECONDS = registry.histogram(
+    "stage_duration_seconds",
+    "Time spent in internal stages: embedding, chroma_read, chroma_write, serialization",
+    ("stage",),
+)
+EXECUTOR_WAIT_SECONDS = registry.histogram(
+    "executor_queue_wait_seconds", "Time blocking calls waited for a pool thread", ("pool",)
+)
+DOCUMENTS_INGESTED = registry.counter("documents_ingested_total", "Documents written to Chroma")
+EMBEDDING_TEXTS = registry.counter("embedding_texts_total", "Texts sent to the embedding provider", ("provider",))
+EMBEDDING_TOKENS = registry.counter(
+    "embedding_tokens_total", "Estimated tokens sent to the embedding provider", ("provider",)
+)
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "embedding_batch_size", "Texts per embedding provider call", ("provider",), SIZE_BUCKETS
+)
+INGEST_CHUNK_SIZE = registry.histogram("ingest_chunk_size", "Documents per ingestion chunk", (), SIZE_BUCKETS)
+QUERY_BATCH_SIZE = registry.histogram(
+    "query_batch_size", "Distinct query texts per coalesced /query batch", (), SIZE_BUCKETS
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time an internal stage (embedding, chroma_read, chroma_write, serialization)."""
+    with STAGE_SECONDS.time(name):
+        yield
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per method, route template and status code.
+
+    The route template (e.g. ``/api/collections/{collection_name}/count``) is read from the scope
+    after routing, so paths with identifiers do not create a series each. Requests served by the MCP
+    tools in-process go through the app, so they are counted under their API route as well.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Mounted sub-apps (the MCP SSE server) have no route object but extend root_path with their mount path.
+            template = getattr(scope.get("route"), "path", None) or scope.get("root_path") or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], template, str(status))
@@ -0,0 +1,150 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any
+
+import orjson
+from chromadb.api.types import QueryResult
+
+from app.core.config import get_settings
+from app.core.metrics import QUERY_BATCH_SIZE
+from app.db.client import collection_registry, get_collection
+from app.db.executor import run_read
+
+settings = get_settings()
+
+# Query parameters that must match for requests to share one ``collection.query`` call.
+BatchKey = tuple[str, int, bytes, tuple[str, ...]]
+
+
+@dataclass
+class _PendingBatch:
+    """Requests collected for one batch key during the batching window."""
+
+    key: BatchKey
+    where: dict[str, Any] | None
+    where_document: dict[str, Any] | None
+    texts: dict[str, int] = field(default_factory=dict)
+    waiters: list[tuple[list[int], "asyncio.Future[QueryResult]"]] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class QueryBatcher:
+    """Coalesces concurrent queries against the same collection into one embedding call and one query.
+
+    Requests with the same collection, ``n_results``, filters and ``include`` that arrive within
+    ``window_seconds`` of the first one are flushed together: their distinct query texts are embedded
+    in a single call and sent as one multi-query, and each caller gets back the rows for its own
+    texts. A request identical to one that is still pending or running waits for that one's result.
+    """
+
+    def __init__(self, window_seconds: float, max_texts: int) -> None:
+        self.window_seconds = window_seconds
+        self.max_texts = max_texts
+        self.requests = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.texts = 0
+        self._pending: dict[BatchKey, _PendingBatch] = {}
+        self._inflight: dict[tuple[BatchKey, tuple[str, ...]], asyncio.Future[QueryResult]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def query(
+        self,
+        collection_name: str,
+        query_texts: list[str],
+        n_results: int,
+        where: dict[str, Any] | None = None,
+        where_document: dict[str, Any] | None = None,
+        include: list[str] | None = None,
+    ) -> QueryResult:
+        """Queue a query for the next batch of its collection and wait for its share of the result."""
+        include = list(include or ["documents", "metadatas", "distances"])
+        where, where_document = where or None, where_document or None
+        filters = orjson.dumps([where, where_document], option=orjson.OPT_SORT_KEYS)
+        key: BatchKey = (collection_name, n_results, filters, tuple(include))
+        request_key = (key, tuple(query_texts))
+        self.requests += 1
+
+        future = self._inflight.get(request_key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[request_key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(request_key, None))
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(key=key, where=where, where_document=where_document)
+            batch.timer = loop.call_later(self.window_seconds, self._flush, key)
+            self._pending[key] = batch
+        positions = [batch.texts.setdefault(text, len(batch.texts)) for text in query_texts]
+        batch.waiters.append((positions, future))
+        if len(batch.texts) >= self.max_texts:
+            self._flush(key)
+
+        return await asyncio.shield(future)
+
+    def _flush(self, key: BatchKey) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _PendingBatch) -> None:
+        collection_name, n_results, _, include = batch.key
+        texts = list(batch.texts)
+        self.batches += 1
+        self.texts += len(texts)
+        QUERY_BATCH_SIZE.observe(len(texts))
+        try:
+            collection = await get_collection(collection_name)
+            embeddings = await run_read(collection_registry.embedding_function(collection_name), texts)
+            result = await run_read(
+                collection.query,
+                query_embeddings=embeddings,
+                n_results=n_results,
+                where=batch.where,
+                where_document=batch.where_document,
+                include=list(include),
+            )
+        except Exception as e:
+            for _, future in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for positions, future in batch.waiters:
+            if not future.done():
+                future.set_result(_select(result, positions))
+
+    def stats(self) -> dict[str, Any]:
+        """Return request, batch and de-duplication counters."""
+        return {
+            "requests": self.requests,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "texts": self.texts,
+            "requests_per_batch": (self.requests - self.deduplicated) / self.batches if self.batches else 0.0,
+        }
+
+
+def _select(result: QueryResult, positions: list[int]) -> QueryResult:
+    selected: dict[str, Any] = {}
+    for name, value in result.items():
+        if name == "included" or value is None:
+            selected[name] = value
+        else:
+            selected[name] = [value[position] for position in positions]
+    return selected  # type: ignore[return-value]
+
+
+query_batcher = QueryBatcher(
+    window_seconds=settings.QUERY_BATCH_WINDOW_MS / 1000, max_texts=settings.QUERY_BATCH_MAX_TEXTS
+)
@@ -1,11 +1,23 @@
+import logging
+import threading
+
 import chromadb
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Documents, EmbeddingFunction
 
 from app.core.config import get_settings
+from app.db.embedding import PROVIDER_METADATA_KEY, get_embedding_function, provider_for
+from app.db.executor import run_read, run_write
+from app.db.generations import generation_counters
+from app.db.reduced import reduced_dimensions, truncated_embedding_function
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Global client instance
 _chroma_client = None
+# Startup prewarming and resumed ingestion jobs may ask for the client from different threads at once.
+_client_lock = threading.Lock()
 
 
 def get_chroma_client() -> chromadb.Client:
@@ -16,16 +28,142 @@ def get_chroma_client() -> chromadb.Client:
     """
     global _chroma_client
 
-    if _chroma_client is None:
+    if _chroma_client is not None:
+        return _chroma_client
+    with _client_lock:
+        if _chroma_client is not None:
+            return _chroma_client
         if settings.CHROMA_CLIENT_TYPE == "persistent":
             if not settings.CHROMA_DATA_DIR:
                 raise ValueError(
                     "Data directory must be provided via CHROMA_DATA_DIR environment variable when using persistent client"
                 )
             _chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DATA_DIR)
-            print(f"Using persistent Chroma client with data directory: {settings.CHROMA_DATA_DIR}")
+            logger.info("Using persistent Chroma client with data directory: %s", settings.CHROMA_DATA_DIR)
+        elif settings.CHROMA_CLIENT_TYPE == "http":
+            _chroma_client = chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+            logger.info("Using Chroma server at %s:%s", settings.CHROMA_HOST, settings.CHROMA_PORT)
         else:  # ephemeral
             _chroma_client = chromadb.EphemeralClient()
-            print("Using ephemeral Chroma client")
+            logger.info("Using ephemeral Chroma client")
 
     return _chroma_client
+
+
+class CollectionRegistry:
+    """Process-wide cache of collection handles and the embedding functions bound to them.
+
+    Looking a collection up costs a metadata query, so handles are kept until the collection is
+    modified or deleted, at which point the entry must be invalidated. Handles are stored with the
+    collection's generation, so an invalidation made by another worker process sharing
+    ``SHARED_STATE_FILE`` also forces a reload here.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._collections: dict[str, tuple[int, Collection]] = {}
+        self._embedding_functions: dict[str, EmbeddingFunction[Documents]] = {}
+
+    @staticmethod
+    def _generation(name: str) -> int:
+        return generation_counters.get(f"collection:{name}")
+
+    def lookup(self, name: str) -> Collection | None:
+        """Return the cached handle for ``name`` without touching the database."""
+        entry = self._collections.get(name)
+        if entry is None or entry[0] != self._generation(name):
+            return None
+        return entry[1]
+
+    def embedding_function(self, name: str) -> EmbeddingFunction[Documents]:
+        """Return the embedding function for ``name``, falling back to the default provider's."""
+        return self._embedding_functions.get(name) or get_embedding_function()
+
+    def load(self, name: str, create: bool = False) -> Collection:
+        """Fetch (or create) the collection and cache its handle. This is blocking."""
+        collection = self.lookup(name)
+        if collection is not None:
+            return collection
+
+        generation = self._generation(name)
+        client = get_chroma_client()
+        embedding_function = get_embedding_function()
+        if create:
+            collection = client.get_or_create_collection(
+                name,
+                metadata={PROVIDER_METADATA_KEY: settings.EMBEDDING_PROVIDER},
+                embedding_function=embedding_function,
+            )
+        else:
+            collection = client.get_collection(name, embedding_function=embedding_function)
+
+        # Reopen the handle with the collection's own provider so query_texts are embedded consistently.
+        provider_function = get_embedding_function(provider_for(collection.metadata))
+        dimensions = reduced_dimensions(collection.metadata)
+        if dimensions:
+            provider_function = truncated_embedding_function(provider_function, dimensions)
+        if provider_function is not embedding_function:
+            collection = client.get_collection(name, embedding_function=provider_function)
+        return self.register(collection, provider_function, generation)
+
+    def register(
+        self,
+        collection: Collection,
+        embedding_function: EmbeddingFunction[Documents],
+        generation: int | None = None,
+    ) -> Collection:
+        """Cache a handle obtained elsewhere, e.g. from ``create_collection``.
+
+        Args:
+            collection: The collection handle
+            embedding_function: The embedding function bound to the handle
+            generation: The collection's generation observed before the handle was fetched
+
+        Returns:
+            The cached handle, which is an earlier one if that is still current
+        """
+        name = collection.name
+        if generation is None:
+            generation = self._generation(name)
+        with self._lock:
+            cached = self._collections.get(name)
+            if cached is not None and cached[0] == self._generation(name):
+                return cached[1]
+            self._collections[name] = (generation, collection)
+            self._embedding_functions[name] = embedding_function
+        return collection
+
+    def invalidate(self, *names: str) -> None:
+        """Drop cached handles for ``names`` in this and every other worker process."""
+        generation_counters.bump(*(f"collection:{name}" for name in names))
+        with self._lock:
+            for name in names:
+                self._collections.pop(name, None)
+                self._embedding_functions.pop(name, None)
+
+    def clear(self) -> None:
+        """Drop every cached handle."""
+        with self._lock:
+            self._collections.clear()
+            self._embedding_functions.clear()
+
+
+collection_registry = CollectionRegistry()
+
+
+async def get_collection(name: str, create: bool = False) -> Collection:
+    """Get a collection handle from the registry, loading it on the read (or write) pool on a miss.
+
+    Args:
+        name: Name of the collection
+        create: Whether to create the collection if it does not exist
+
+    Returns:
+        The cached collection handle
+    """
+    collection = collection_registry.lookup(name)
+    if collection is not None:
+        return collection
+    if create:
+        return await run_write(collection_registry.load, name, create=True)
+    return await run_read(collection_registry.load, name)
@@ -0,0 +1,93 @@
+import base64
+import hashlib
+from typing import Any
+
+import orjson
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import GetResult
+
+RECORD_FIELDS = ("ids", "embeddings", "documents", "uris", "data", "metadatas")
+
+
+class StaleCursorError(ValueError):
+    """Raised when a cursor no longer points into the collection it was issued for."""
+
+
+def filter_fingerprint(where: dict[str, Any] | None, where_document: dict[str, Any] | None) -> str:
+    """Short digest of the filters a cursor was issued for, so it cannot be replayed with other filters."""
+    payload = orjson.dumps([where or None, where_document or None], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, last_id: str, fingerprint: str) -> str:
+    """Encode the position after ``last_id`` as an opaque, URL-safe cursor."""
+    payload = orjson.dumps({"o": offset, "l": last_id, "f": fingerprint})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> tuple[int, str]:
+    """Decode a cursor into ``(offset, last_id)``.
+
+    Raises:
+        StaleCursorError: If the cursor is malformed or was issued for different filters
+    """
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset, last_id, cursor_fingerprint = int(payload["o"]), str(payload["l"]), payload["f"]
+    except Exception:
+        raise StaleCursorError("Malformed cursor")
+    if offset < 1:
+        raise StaleCursorError("Malformed cursor")
+    if cursor_fingerprint != fingerprint:
+        raise StaleCursorError("Cursor was issued for different filters")
+    return offset, last_id
+
+
+def fetch_page(
+    collection: Collection,
+    page_size: int,
+    cursor: str | None = None,
+    offset: int = 0,
+    where: dict[str, Any] | None = None,
+    where_document: dict[str, Any] | None = None,
+    include: list[str] | None = None,
+) -> tuple[GetResult, str | None]:
+    """Fetch one page of a collection scan and the cursor for the next page.
+
+    Chroma only pages by offset, so the cursor remembers both the offset and the id of the last
+    row returned. The next page is read together with that row; if deletes have shifted it, the
+    row is located again within one page of its old offset. The scan therefore neither skips nor
+    repeats documents while the collection is modified, unless the last returned document itself
+    is deleted or more than a page of documents in front of it is removed.
+
+    This is blocking and must be run on the read pool.
+
+    Returns:
+        The page in Chroma's GetResult layout and the next cursor, or None once the scan is complete
+    """
+    include = include if include is not None else ["documents", "metadatas"]
+    fingerprint = filter_fingerprint(where, where_document)
+    filters = {"where": where or None, "where_document": where_document or None}
+
+    if cursor is None:
+        page = collection.get(limit=page_size, offset=offset, include=include, **filters)
+    else:
+        offset, last_id = decode_cursor(cursor, fingerprint)
+        page = collection.get(limit=page_size + 1, offset=offset - 1, include=include, **filters)
+        if not page["ids"] or page["ids"][0] != last_id:
+            window_start = max(offset - page_size, 0)
+            window = collection.get(limit=2 * page_size, offset=window_start, include=[], **filters)
+            if last_id not in window["ids"]:
+                raise StaleCursorError(f"Document '{last_id}' the cursor points after no longer exists")
+            offset = window_start + window["ids"].index(last_id) + 1
+            page = collection.get(limit=page_size + 1, offset=offset - 1, include=include, **filters)
+        page = _drop_first(page)
+
+    ids = page["ids"]
+    next_offset = offset + len(ids)
+    next_cursor = encode_cursor(next_offset, ids[-1], fingerprint) if len(ids) == page_size else None
+    return page, next_cursor
+
+
+def _drop_first(page: GetResult) -> GetResult:
+    return {key: value[1:] if key in RECORD_FIELDS and value is not None else value for key, value in page.items()}
@@ -0,0 +1,225 @@
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import IO, Any
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+
+from app.core.config import get_settings
+from app.db.cursor import fetch_page
+from app.db.reduced import reduced_dimensions, vector_sidecars
+
+settings = get_settings()
+
+# Metadata key set on each duplicate by the ``tag`` action, holding the ID of the document it duplicates.
+DUPLICATE_OF_KEY = "duplicate_of"
+SPOOL_PAGE_SIZE = 1000
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def spool_embeddings(
+    collection: Collection,
+    file: IO[bytes],
+    where: dict[str, Any] | None = None,
+    where_document: dict[str, Any] | None = None,
+    page_size: int = SPOOL_PAGE_SIZE,
+) -> tuple[list[str], np.ndarray]:
+    """Stream the embeddings of ``collection`` page by page into ``file`` as unit-length float32 rows.
+
+    Only one page is held in memory at a time; the rows are then read back through a memory map.
+    Reduced collections are read from their sidecar, so similarities are those of the full vectors.
+    This is blocking.
+
+    Returns:
+        The ID of each row and a read-only ``(len(ids), dimension)`` map of ``file``
+    """
+    sidecar = vector_sidecars.get(collection) if reduced_dimensions(collection.metadata) else None
+    include = [] if sidecar is not None else ["embeddings"]
+    ids: list[str] = []
+    dimension = 0
+    cursor = None
+    while True:
+        page, cursor = fetch_page(
+            collection, page_size, cursor=cursor, where=where, where_document=where_document, include=include
+        )
+        if page["ids"]:
+            if sidecar is not None:
+                vectors, found = sidecar.lookup(page["ids"])
+                page_ids = [id_ for id_, ok in zip(page["ids"], found, strict=True) if ok]
+                vectors = vectors[found]
+            else:
+                page_ids, vectors = page["ids"], np.asarray(page["embeddings"], dtype=np.float32)
+            file.write(np.ascontiguousarray(_normalize(vectors), dtype=np.float32).tobytes())
+            ids.extend(page_ids)
+            dimension = vectors.shape[1]
+        if cursor is None:
+            break
+
+    file.flush()
+    if not ids:
+        return ids, np.empty((0, 0), dtype=np.float32)
+    return ids, np.memmap(file, dtype=np.float32, mode="r", shape=(len(ids), dimension))
+
+
+def similar_pairs(
+    matrix: np.ndarray, threshold: float, block_size: int, workers: int, max_pairs: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool, int]:
+    """Find every pair of unit-length rows whose cosine similarity reaches ``threshold``. This is blocking.
+
+    The upper triangle of the similarity matrix is cut into ``block_size`` squares, each computed
+    with one matrix product on a pool of ``workers`` threads (NumPy releases the GIL). At most
+    ``2 * workers`` squares are in flight and only the pairs above the threshold are kept, so memory
+    is bounded by that many blocks of scores plus the pairs.
+
+    Returns:
+        Row ``a`` and row ``b > a`` of each pair, its similarity, whether the search stopped at ``max_pairs``
+        and the number of pairs compared
+    """
+    rows = len(matrix)
+    starts = range(0, rows, block_size)
+    tiles = iter([(i, j) for i in starts for j in starts if j >= i])
+
+    def compare(tile: tuple[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        i, j = tile
+        scores = np.asarray(matrix[i : i + block_size]) @ np.asarray(matrix[j : j + block_size]).T
+        if i == j:
+            # Keep each pair once and leave out the diagonal; the threshold is positive.
+            scores = np.triu(scores, k=1)
+        rows_a, rows_b = np.nonzero(scores >= threshold)
+        return rows_a + i, rows_b + j, scores[rows_a, rows_b]
+
+    def compared(tile: tuple[int, int]) -> int:
+        i, j = tile
+        size_i, size_j = min(block_size, rows - i), min(block_size, rows - j)
+        return size_i * (size_i - 1) // 2 if i == j else size_i * size_j
+
+    found: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    total = 0
+    comparisons = 0
+    truncated = False
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="similarity-join")
+    pending: deque[tuple[tuple[int, int], Future]] = deque()
+    try:
+        for tile in islice(tiles, 2 * workers):
+            pending.append((tile, pool.submit(compare, tile)))
+        # Tiles are consumed in submission order and one is submitted per tile done, keeping the window full.
+        while pending:
+            tile, future = pending.popleft()
+            pairs = future.result()
+            found.append(pairs)
+            total += len(pairs[0])
+            comparisons += compared(tile)
+            if total >= max_pairs:
+                truncated = True
+                break
+            next_tile = next(tiles, None)
+            if next_tile is not None:
+                pending.append((next_tile, pool.submit(compare, next_tile)))
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    if not found:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32), truncated, comparisons
+    rows_a, rows_b, scores = (np.concatenate(parts) for parts in zip(*found, strict=True))
+    return rows_a[:max_pairs], rows_b[:max_pairs], scores[:max_pairs], truncated, comparisons
+
+
+def cluster_pairs(rows_a: np.ndarray, rows_b: np.ndarray, scores: np.ndarray) -> list[tuple[list[int], float]]:
+    """Group the rows linked by pairs into clusters, the connected components of the pair graph.
+
+    Returns:
+        The rows of each cluster, lowest first, and the lowest similarity among the pairs linking it;
+        largest clusters first
+    """
+    parent: dict[int, int] = {}
+
+    def find(row: int) -> int:
+        root = parent.setdefault(row, row)
+        while parent[root] != root:
+            root = parent[root]
+        while parent[row] != root:
+            parent[row], row = root, parent[row]
+        return root
+
+    for a, b in zip(rows_a.tolist(), rows_b.tolist(), strict=True):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            # The lowest row stays the root, so it is the document kept in each cluster.
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    members: dict[int, list[int]] = {}
+    for row in parent:
+        members.setdefault(find(row), []).append(row)
+    lowest: dict[int, float] = {}
+    for a, score in zip(rows_a.tolist(), scores.tolist(), strict=True):
+        root = find(a)
+        lowest[root] = min(lowest.get(root, score), score)
+
+    clusters = [(sorted(rows), lowest[root]) for root, rows in members.items()]
+    clusters.sort(key=lambda cluster: (-len(cluster[0]), cluster[0][0]))
+    return clusters
+
+
+def join_workers() -> int:
+    """Threads used by a similarity join."""
+    return settings.SIMILARITY_JOIN_WORKERS or os.cpu_count() or 1
+
+
+def find_duplicates(
+    collection: Collection,
+    threshold: float,
+    max_pairs: int,
+    where: dict[str, Any] | None = None,
+    where_document: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Find the clusters of near-duplicate documents in ``collection`` with a blocked similarity self-join.
+
+    Embeddings are spooled to a temporary file first, so the join reads them back from a memory map
+    instead of holding the collection in memory. This is blocking.
+
+    Args:
+        collection: Collection to search
+        threshold: Cosine similarity from which two documents are duplicates
+        max_pairs: Stop collecting pairs after this many
+        where: Optional metadata filter restricting the documents compared
+        where_document: Optional document content filter restricting the documents compared
+
+    Returns:
+        Document count, clusters as ``(ids, lowest similarity)`` with the kept document first,
+        the number of pairs found and compared, and the timing of both stages
+    """
+    block_size = max(1, settings.SIMILARITY_JOIN_BLOCK_SIZE)
+    workers = join_workers()
+    with tempfile.TemporaryFile(prefix="chromadb-fastapi-join-") as file:
+        started = time.perf_counter()
+        ids, matrix = spool_embeddings(collection, file, where, where_document)
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows_a, rows_b, scores, truncated, comparisons = similar_pairs(
+            matrix, threshold, block_size, workers, max_pairs
+        )
+        clusters = cluster_pairs(rows_a, rows_b, scores)
+        join_seconds = time.perf_counter() - started
+        del matrix
+
+    return {
+        "count": len(ids),
+        "clusters": [([ids[row] for row in rows], similarity) for rows, similarity in clusters],
+        "pairs_found": len(scores),
+        "truncated": truncated,
+        "comparisons": comparisons,
+        "block_size": block_size,
+        "workers": workers,
+        "load_seconds": load_seconds,
+        "join_seconds": join_seconds,
+    }
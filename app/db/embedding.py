@@ -0,0 +1,381 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any
+
+import httpx
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.core.config import get_settings
+from app.core.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_TEXTS, EMBEDDING_TOKENS, Collected, registry, stage
+from app.db.ingest import estimate_tokens
+
+settings = get_settings()
+
+EMBEDDING_MODEL_NAME = "text-embedding-3-small"
+
+EMBEDDING_PROVIDERS = ("openai", "hashing")
+# Collection metadata key recording the provider a collection was created with.
+PROVIDER_METADATA_KEY = "embedding_provider"
+# Collections created before providers were recorded were always embedded with OpenAI.
+LEGACY_PROVIDER = "openai"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+CacheKey = tuple[str, bytes]
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store with an in-memory LRU tier and an optional SQLite tier.
+
+    Entries are keyed by ``(model, sha256(text))`` and stored as float32 vectors. Both tiers are
+    bounded in bytes; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_memory_bytes: int, disk_path: str | None = None, max_disk_bytes: int = 0) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[CacheKey, np.ndarray] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._disk: sqlite3.Connection | None = None
+        self._disk_bytes = 0
+
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL, accessed REAL NOT NULL, "
+                "PRIMARY KEY (model, digest)) WITHOUT ROWID"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)")
+            (self._disk_bytes,) = self._disk.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+
+    @staticmethod
+    def key(model: str, text: str) -> CacheKey:
+        """Build the cache key for ``text`` embedded with ``model``."""
+        return model, hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, keys: list[CacheKey]) -> dict[CacheKey, np.ndarray]:
+        """Look up ``keys`` in memory, then on disk, promoting disk hits into memory."""
+        found: dict[CacheKey, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+            missing = [key for key in keys if key not in found]
+            if missing and self._disk is not None:
+                now = time.time()
+                for model, digest in missing:
+                    row = self._disk.execute(
+                        "SELECT vector FROM embeddings WHERE model = ? AND digest = ?", (model, digest)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    found[(model, digest)] = vector
+                    self._store_memory((model, digest), vector)
+                    self._disk.execute(
+                        "UPDATE embeddings SET accessed = ? WHERE model = ? AND digest = ?", (now, model, digest)
+                    )
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: dict[CacheKey, np.ndarray]) -> None:
+        """Store freshly computed embeddings in every enabled tier."""
+        with self._lock:
+            for key, vector in items.items():
+                self._store_memory(key, vector)
+            if self._disk is not None and items:
+                now = time.time()
+                self._disk.execute("BEGIN")
+                for (model, digest), vector in items.items():
+                    blob = vector.tobytes()
+                    previous = self._disk.execute(
+                        "SELECT LENGTH(vector) FROM embeddings WHERE model = ? AND digest = ?", (model, digest)
+                    ).fetchone()
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO embeddings (model, digest, vector, accessed) VALUES (?, ?, ?, ?)",
+                        (model, digest, blob, now),
+                    )
+                    self._disk_bytes += len(blob) - (previous[0] if previous else 0)
+                self._evict_disk()
+                self._disk.execute("COMMIT")
+
+    def _store_memory(self, key: CacheKey, vector: np.ndarray) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        if vector.nbytes > self.max_memory_bytes:
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _evict_disk(self) -> None:
+        assert self._disk is not None
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._disk.execute(
+                "SELECT model, digest, LENGTH(vector) FROM embeddings ORDER BY accessed LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for model, digest, size in rows:
+                self._disk.execute("DELETE FROM embeddings WHERE model = ? AND digest = ?", (model, digest))
+                self._disk_bytes -= size
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the current size of each tier."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_enabled": self._disk is not None,
+            "disk_bytes": self._disk_bytes,
+        }
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding function that serves repeated texts from an :class:`EmbeddingCache`.
+
+    Texts missing from the cache are de-duplicated and embedded with a single call to the
+    wrapped embedding function.
+    """
+
+    def __init__(self, embedding_function: EmbeddingFunction[Documents], model_name: str, cache: EmbeddingCache):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if not input:
+            return []
+
+        keys = [self.cache.key(self.model_name, text) for text in input]
+        found = self.cache.get_many(keys)
+
+        pending: dict[CacheKey, str] = {}
+        for key, text in zip(keys, input, strict=True):
+            if key not in found and key not in pending:
+                pending[key] = text
+
+        if pending:
+            computed = self.embedding_function(list(pending.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(pending, computed, strict=True)}
+            self.cache.put_many(fresh)
+            found.update(fresh)
+
+        return [found[key] for key in keys]
+
+    def name(self) -> str:  # type: ignore[override]
+        return self.embedding_function.name()
+
+    def is_legacy(self) -> bool:
+        # The cache is a process-local concern, so collections never persist this wrapper's config.
+        return True
+
+    def get_config(self) -> dict[str, Any]:
+        return self.embedding_function.get_config()
+
+
+class MeteredEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding function that records the time, texts, estimated tokens and batch size of each call."""
+
+    def __init__(self, embedding_function: EmbeddingFunction[Documents], provider: str):
+        self.embedding_function = embedding_function
+        self.provider = provider
+
+    def __call__(self, input: Documents) -> Embeddings:
+        EMBEDDING_TEXTS.inc(len(input), self.provider)
+        EMBEDDING_TOKENS.inc(sum(estimate_tokens(text) for text in input), self.provider)
+        EMBEDDING_BATCH_SIZE.observe(len(input), self.provider)
+        with stage("embedding"):
+            return self.embedding_function(input)
+
+    def name(self) -> str:  # type: ignore[override]
+        return self.embedding_function.name()
+
+    def is_legacy(self) -> bool:
+        return True
+
+    def get_config(self) -> dict[str, Any]:
+        return self.embedding_function.get_config()
+
+
+@lru_cache(maxsize=1 << 18)
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic, offline embedding function based on the hashing trick.
+
+    Lower-cased word unigrams (CRC32, memoized per token) and bigrams (mixed from the unigram
+    hashes) are hashed into ``dimensions`` signed buckets and the counts are L2-normalized.
+    Texts are processed in batches of ``batch_size``, each batch accumulated into one dense
+    matrix with a single ``bincount``, and batches are spread over ``threads`` worker threads.
+    """
+
+    def __init__(self, dimensions: int = 384, batch_size: int = 256, threads: int = 1) -> None:
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.threads = threads
+        self._executor = (
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix="hashing-embed") if threads > 1 else None
+        )
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if not input:
+            return []
+        return list(self.embed(input))
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed ``texts`` into a ``(len(texts), dimensions)`` float32 matrix.
+
+        Unlike ``__call__``, this skips Chroma's per-value validation of the returned embeddings.
+        """
+        batches = [texts[start : start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if self._executor is None or len(batches) <= 1:
+            matrices = [self._embed_batch(batch) for batch in batches]
+        else:
+            matrices = list(self._executor.map(self._embed_batch, batches))
+        return np.concatenate(matrices) if matrices else np.empty((0, self.dimensions), dtype=np.float32)
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        hashes: list[int] = []
+        counts: list[int] = []
+        for text in texts:
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            hashes.extend(map(_token_hash, tokens))
+            counts.append(len(tokens))
+
+        unigrams = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), counts)
+        # Bigram hashes are mixed from adjacent unigram hashes of the same text, without building strings.
+        same_text = rows[1:] == rows[:-1]
+        bigrams = ((unigrams[:-1] << np.uint64(32)) | unigrams[1:]) * np.uint64(0x9E3779B97F4A7C15) >> np.uint64(32)
+        digests = np.concatenate([unigrams, bigrams[same_text]])
+        rows = np.concatenate([rows, rows[1:][same_text]])
+
+        buckets = rows * self.dimensions + (digests % np.uint64(self.dimensions)).astype(np.int64)
+        # The top bit of the hash picks the sign so that collisions tend to cancel out.
+        signs = np.where(digests >> np.uint64(31) & np.uint64(1), -1.0, 1.0)
+        matrix = np.bincount(buckets, weights=signs, minlength=len(texts) * self.dimensions)
+        matrix = matrix.reshape(len(texts), self.dimensions).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    @staticmethod
+    def name() -> str:
+        return "hashing"
+
+    def is_legacy(self) -> bool:
+        # The provider is recorded in collection metadata, so Chroma never persists this config.
+        return True
+
+    def get_config(self) -> dict[str, Any]:
+        return {"dimensions": self.dimensions}
+
+
+def provider_for(metadata: dict[str, Any] | None) -> str:
+    """Return the embedding provider recorded in a collection's metadata."""
+    return (metadata or {}).get(PROVIDER_METADATA_KEY) or LEGACY_PROVIDER
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache."""
+    disk_path = None
+    if settings.EMBEDDING_CACHE_DISK:
+        if not settings.CHROMA_DATA_DIR:
+            raise ValueError("CHROMA_DATA_DIR must be set to enable the on-disk embedding cache")
+        os.makedirs(settings.CHROMA_DATA_DIR, exist_ok=True)
+        disk_path = os.path.join(settings.CHROMA_DATA_DIR, "embedding_cache.sqlite3")
+
+    cache = EmbeddingCache(
+        max_memory_bytes=settings.EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024,
+        disk_path=disk_path,
+        max_disk_bytes=settings.EMBEDDING_CACHE_DISK_MB * 1024 * 1024,
+    )
+    registry.register(
+        Collected(
+            "embedding_cache_lookups_total",
+            "Embedding cache lookups by outcome",
+            "counter",
+            ("result",),
+            lambda: {("hit",): cache.hits, ("miss",): cache.misses},
+        )
+    )
+    return cache
+
+
+def get_embedding_function(provider: str | None = None) -> EmbeddingFunction[Documents]:
+    """Get the shared embedding function of ``provider`` (``EMBEDDING_PROVIDER`` by default).
+
+    Raises:
+        ValueError: If the provider is unknown
+    """
+    return _build_embedding_function(provider or settings.EMBEDDING_PROVIDER)
+
+
+@lru_cache
+def _build_embedding_function(provider: str) -> EmbeddingFunction[Documents]:
+    if provider == "hashing":
+        hashing = HashingEmbeddingFunction(
+            dimensions=settings.EMBEDDING_DIMENSIONS,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            threads=settings.EMBEDDING_THREADS,
+        )
+        return MeteredEmbeddingFunction(hashing, provider)
+    if provider != "openai":
+        raise ValueError(f"Unknown embedding provider '{provider}'; expected one of {', '.join(EMBEDDING_PROVIDERS)}")
+
+    # Deferred: the OpenAI SDK takes about half a second to import and is not needed by the hashing provider.
+    import openai
+    from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+    embedding_function = OpenAIEmbeddingFunction(api_key=settings.OPENAI_API_KEY, model_name=EMBEDDING_MODEL_NAME)
+    # Every pool thread may embed concurrently; keep that many TLS connections alive instead of reconnecting.
+    connections = settings.CHROMA_READ_WORKERS + settings.CHROMA_WRITE_WORKERS
+    embedding_function.client = openai.OpenAI(
+        api_key=embedding_function.api_key,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        ),
+    )
+    # Metered inside the cache, so only texts actually sent to OpenAI are counted.
+    metered = MeteredEmbeddingFunction(embedding_function, provider)
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return metered
+    return CachedEmbeddingFunction(metered, EMBEDDING_MODEL_NAME, get_embedding_cache())
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from chromadb.api.types import EmbeddingFunction
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+from app.core.metrics import EXECUTOR_WAIT_SECONDS, STAGE_SECONDS, Collected, registry
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """Thread pool for blocking Chroma calls that rejects work once its queue is full.
+
+    The ChromaDB client and the embedding functions it drives are synchronous, so every call
+    made from an ``async def`` handler has to be pushed off the event loop. Work is counted from
+    submission until the worker finishes it (even if the awaiting request was cancelled), and
+    new work is refused with a 503 once ``max_workers + max_queue`` calls are in flight.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"chroma-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or waiting for a worker."""
+        return self._pending
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Run ``func(*args, **kwargs)`` on the pool and await its result.
+
+        Raises:
+            HTTPException: 503 with a ``Retry-After`` header when the pool is saturated
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Server is busy: too many pending {self.name} operations, retry later",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+        # Embedding calls also run on the pools; they are timed as the "embedding" stage by the embedding function.
+        stage = None if isinstance(func, EmbeddingFunction) else f"chroma_{self.name}"
+        submitted = time.perf_counter()
+
+        def call() -> T:
+            started = time.perf_counter()
+            EXECUTOR_WAIT_SECONDS.observe(started - submitted, self.name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if stage is not None:
+                    STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running calls to finish."""
+        self._executor.shutdown(wait=True)
+
+
+read_executor = BoundedExecutor("read", settings.CHROMA_READ_WORKERS, settings.CHROMA_READ_QUEUE_SIZE)
+write_executor = BoundedExecutor("write", settings.CHROMA_WRITE_WORKERS, settings.CHROMA_WRITE_QUEUE_SIZE)
+
+registry.register(
+    Collected(
+        "executor_pending_calls",
+        "Blocking calls running or waiting for a pool thread",
+        "gauge",
+        ("pool",),
+        lambda: {(executor.name,): executor.pending for executor in (read_executor, write_executor)},
+    )
+)
+
+
+async def run_read(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking read (get, query, count, peek, list) on the read pool."""
+    return await read_executor.run(func, *args, **kwargs)
+
+
+async def run_write(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking write (add, update, delete, create, modify) on the write pool."""
+    return await write_executor.run(func, *args, **kwargs)
@@ -0,0 +1,78 @@
+import os
+import threading
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+DEFAULT_SLOTS = 4096
+
+
+class GenerationCounters:
+    """Per-name write generation counters, optionally shared by every worker process through a mapped file.
+
+    Caches key their entries on a name's generation and treat an entry as stale once the generation
+    has moved on. Names are hashed into a fixed number of slots, so two names may share a counter,
+    which only causes extra invalidation. With ``path`` set, the counters live in a memory-mapped file
+    that all workers map, so a write handled by one worker invalidates the caches of the others.
+    """
+
+    def __init__(self, path: str | None = None, slots: int = DEFAULT_SLOTS) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        if path is None:
+            self._counters = np.zeros(slots, dtype=np.int64)
+            return
+
+        self._file = open(path, "a+b")  # noqa: SIM115 - held open for the lifetime of the process
+        with self._exclusive():
+            if os.path.getsize(path) < slots * 8:
+                self._file.truncate(slots * 8)
+        self._counters = np.memmap(path, dtype=np.int64, mode="r+", shape=(slots,))
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock:
+            if self._file is None:
+                yield
+                return
+            import fcntl
+
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _slot(self, name: str) -> int:
+        return zlib.crc32(name.encode()) % len(self._counters)
+
+    def get(self, name: str) -> int:
+        """Current generation of ``name``."""
+        return int(self._counters[self._slot(name)])
+
+    def advance(self, name: str) -> int:
+        """Advance the generation of ``name`` and return the new value.
+
+        A caller that last saw generation ``g`` and gets back ``g + 1`` knows nobody else advanced it in between.
+        """
+        slot = self._slot(name)
+        with self._exclusive():
+            self._counters[slot] += 1
+            return int(self._counters[slot])
+
+    def bump(self, *names: str) -> None:
+        """Advance the generation of ``names``, invalidating everything cached under the previous ones."""
+        slots = {self._slot(name) for name in names}
+        with self._exclusive():
+            for slot in slots:
+                self._counters[slot] += 1
+
+
+generation_counters = GenerationCounters(settings.SHARED_STATE_FILE)
@@ -0,0 +1,376 @@
+import asyncio
+import hashlib
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import IO, Any, Literal
+
+import orjson
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.core.config import get_settings
+from app.core.metrics import DOCUMENTS_INGESTED, INGEST_CHUNK_SIZE
+from app.db.executor import run_read, run_write
+from app.db.lexical import lexical_indexes
+from app.db.reduced import TruncatedEmbeddingFunction, reduced_dimensions, vector_sidecars
+from app.db.result_cache import result_cache
+from app.models.document import ChunkResult
+
+settings = get_settings()
+
+MAX_REPORTED_ERRORS = 20
+
+WriteOperation = Literal["add", "upsert", "update"]
+
+# Metadata key holding the hash of a document and its metadata, compared to skip unchanged documents.
+CONTENT_HASH_KEY = "content_hash"
+
+
+@dataclass
+class IngestChunk:
+    """A slice of an ingestion request that is embedded and written in one Chroma call.
+
+    ``documents`` is None only for updates that change metadatas alone.
+    """
+
+    index: int
+    start: int
+    ids: list[str]
+    documents: list[str] | None
+    metadatas: list[dict[str, Any]] | None = None
+    embeddings: Embeddings | None = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound token estimate used to keep embedding requests under the provider limit."""
+    return len(text) // 4 + 1
+
+
+def content_id(document: str) -> str:
+    """Deterministic ID of a document, so ingesting the same text twice addresses the same record."""
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+def with_content_hash(document: str, metadata: dict[str, Any] | None) -> dict[str, Any]:
+    """Return a copy of ``metadata`` stamped with the hash of ``document`` and the rest of the metadata."""
+    metadata = {key: value for key, value in (metadata or {}).items() if key != CONTENT_HASH_KEY}
+    payload = orjson.dumps([document, metadata], option=orjson.OPT_SORT_KEYS)
+    metadata[CONTENT_HASH_KEY] = hashlib.sha256(payload).hexdigest()
+    return metadata
+
+
+def stored_dimension(collection: Collection) -> int | None:
+    """Dimension of the vectors stored in ``collection``, or None while it is empty. This is blocking.
+
+    For a reduced collection this is the dimension of the full vectors kept in its sidecar.
+    """
+    if reduced_dimensions(collection.metadata):
+        return vector_sidecars.get(collection).dimension
+    embeddings = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    return len(embeddings[0]) if embeddings is not None and len(embeddings) else None
+
+
+def chunk_size_for(client: Any) -> int:
+    """Largest chunk the ingestion pipeline may send to ``client`` in a single write."""
+    return max(1, min(settings.INGEST_CHUNK_SIZE, client.get_max_batch_size()))
+
+
+def iter_chunks(
+    ids: list[str],
+    documents: list[str] | None,
+    metadatas: list[dict[str, Any]] | None,
+    max_size: int,
+    max_tokens: int | None = None,
+    embeddings: Embeddings | None = None,
+) -> Iterator[IngestChunk]:
+    """Split parallel id/document/metadata/embedding lists into chunks bounded by count and token budget.
+
+    The token budget only applies when the documents still have to be embedded.
+    """
+    max_tokens = max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+    budgeted = documents if embeddings is None else None
+    index = 0
+    start = 0
+    while start < len(ids):
+        end = start
+        tokens = 0
+        while end < len(ids) and end - start < max_size:
+            if budgeted is not None:
+                tokens += estimate_tokens(budgeted[end])
+                if tokens > max_tokens and end > start:
+                    break
+            end += 1
+
+        yield IngestChunk(
+            index=index,
+            start=start,
+            ids=ids[start:end],
+            documents=documents[start:end] if documents is not None else None,
+            metadatas=metadatas[start:end] if metadatas is not None else None,
+            embeddings=embeddings[start:end] if embeddings is not None else None,
+        )
+        index += 1
+        start = end
+
+
+async def _aiter(chunks: Iterable[IngestChunk] | AsyncIterable[IngestChunk]) -> AsyncIterator[IngestChunk]:
+    if isinstance(chunks, AsyncIterable):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+
+async def _embed(chunk: IngestChunk, embedding_function: EmbeddingFunction[Documents]) -> Embeddings | None:
+    if chunk.embeddings is not None or chunk.documents is None:
+        return chunk.embeddings
+    if isinstance(embedding_function, TruncatedEmbeddingFunction):
+        # Reduced collections index truncated vectors but keep the full ones for re-ranking.
+        embedding_function = embedding_function.embedding_function
+    return await run_read(embedding_function, chunk.documents)
+
+
+async def _write(
+    collection: Collection, chunk: IngestChunk, embeddings: Embeddings | None, operation: WriteOperation
+) -> ChunkResult:
+    def write() -> None:
+        vectors = embeddings
+        if vectors is not None and reduced_dimensions(collection.metadata):
+            vectors = vector_sidecars.store(collection, chunk.ids, vectors)
+        getattr(collection, operation)(
+            ids=chunk.ids, embeddings=vectors, documents=chunk.documents, metadatas=chunk.metadatas
+        )
+        lexical_indexes.apply(collection, operation, chunk.ids, chunk.documents)
+
+    try:
+        await run_write(write)
+    except Exception as e:
+        return ChunkResult(index=chunk.index, start=chunk.start, count=len(chunk.ids), ok=False, error=str(e))
+    finally:
+        result_cache.invalidate(collection.name)
+    DOCUMENTS_INGESTED.inc(len(chunk.ids))
+    INGEST_CHUNK_SIZE.observe(len(chunk.ids))
+    return ChunkResult(index=chunk.index, start=chunk.start, count=len(chunk.ids), ok=True)
+
+
+async def add_in_chunks(
+    collection: Collection,
+    chunks: Iterable[IngestChunk] | AsyncIterable[IngestChunk],
+    embedding_function: EmbeddingFunction[Documents],
+    on_result: Callable[[ChunkResult], Awaitable[None]] | None = None,
+    operation: WriteOperation = "add",
+) -> list[ChunkResult]:
+    """Embed and write ``chunks`` in order, overlapping the embedding of chunk N+1 with the write of chunk N.
+
+    A failing chunk is reported in its :class:`ChunkResult` and does not stop the remaining chunks,
+    so work that already succeeded is kept.
+
+    Args:
+        collection: Collection to add the documents to
+        chunks: Chunks to ingest, typically produced by :func:`iter_chunks`
+        embedding_function: Embedding function for chunks that do not carry precomputed embeddings
+        on_result: Optional coroutine function awaited with each ChunkResult as soon as it is known, for progress
+            reporting. It runs on the event loop, so blocking work in it belongs on the executors
+        operation: Collection method used for the writes: ``add``, ``upsert`` (replacing documents whose
+            IDs already exist) or ``update`` (changing existing documents only)
+
+    Returns:
+        One ChunkResult per chunk, in input order
+    """
+    results: list[ChunkResult] = []
+
+    async def record(result: ChunkResult) -> None:
+        results.append(result)
+        if on_result is not None:
+            await on_result(result)
+
+    write_task: asyncio.Task[ChunkResult] | None = None
+    try:
+        async for chunk in _aiter(chunks):
+            embed_task = asyncio.ensure_future(_embed(chunk, embedding_function))
+            if write_task is not None:
+                await record(await write_task)
+                write_task = None
+
+            try:
+                embeddings = await embed_task
+            except Exception as e:
+                await record(
+                    ChunkResult(index=chunk.index, start=chunk.start, count=len(chunk.ids), ok=False, error=str(e))
+                )
+                continue
+
+            write_task = asyncio.ensure_future(_write(collection, chunk, embeddings, operation))
+
+        if write_task is not None:
+            await record(await write_task)
+            write_task = None
+    finally:
+        if write_task is not None:
+            write_task.cancel()
+
+    return results
+
+
+@dataclass
+class ImportStats:
+    """Record-level counters collected while parsing or deduplicating ingested documents."""
+
+    received: int = 0
+    invalid: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def reject(self, position: int, reason: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"record {position}: {reason}")
+
+
+async def aiter_changed(
+    collection: Collection, chunks: Iterable[IngestChunk] | AsyncIterable[IngestChunk], stats: ImportStats
+) -> AsyncIterator[IngestChunk]:
+    """Drop documents that are already stored with the same content hash, before they are embedded.
+
+    Chunks must carry metadatas stamped by :func:`with_content_hash`. When an ID repeats within a
+    chunk only its last occurrence is kept, since a single upsert cannot contain the same ID twice.
+    Chunks left empty are not yielded.
+    """
+    async for chunk in _aiter(chunks):
+        latest = {id_: position for position, id_ in enumerate(chunk.ids)}
+        existing = await run_read(collection.get, ids=list(latest), include=["metadatas"])
+        stored = {
+            id_: (metadata or {}).get(CONTENT_HASH_KEY)
+            for id_, metadata in zip(existing["ids"], existing["metadatas"] or [], strict=False)
+        }
+        keep = sorted(
+            position
+            for id_, position in latest.items()
+            if stored.get(id_) != chunk.metadatas[position][CONTENT_HASH_KEY]
+        )
+        stats.skipped += len(chunk.ids) - len(keep)
+        if not keep:
+            continue
+        yield IngestChunk(
+            index=chunk.index,
+            start=chunk.start,
+            ids=[chunk.ids[position] for position in keep],
+            documents=[chunk.documents[position] for position in keep],
+            metadatas=[chunk.metadatas[position] for position in keep],
+            embeddings=[chunk.embeddings[position] for position in keep] if chunk.embeddings is not None else None,
+        )
+
+
+async def aiter_ndjson_records(stream: AsyncIterable[bytes], stats: ImportStats) -> AsyncIterator[dict[str, Any]]:
+    """Parse newline-delimited JSON records from a byte stream without buffering the whole body."""
+    pending = b""
+    async for data in stream:
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                stats.received += 1
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError as e:
+                    stats.reject(stats.received, f"invalid JSON: {e}")
+
+    if pending.strip():
+        stats.received += 1
+        try:
+            yield orjson.loads(pending)
+        except orjson.JSONDecodeError as e:
+            stats.reject(stats.received, f"invalid JSON: {e}")
+
+
+async def aiter_parquet_records(file: IO[bytes], batch_size: int, stats: ImportStats) -> AsyncIterator[dict[str, Any]]:
+    """Read records from a Parquet file one record batch at a time.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    import pyarrow.parquet as pq
+
+    batches = pq.ParquetFile(file).iter_batches(batch_size=batch_size)
+    while True:
+        batch = await run_read(next, batches, None)
+        if batch is None:
+            return
+        for record in batch.to_pylist():
+            stats.received += 1
+            metadata = record.get("metadata")
+            if isinstance(metadata, str | bytes):
+                try:
+                    record["metadata"] = orjson.loads(metadata)
+                except orjson.JSONDecodeError as e:
+                    stats.reject(stats.received, f"invalid metadata JSON: {e}")
+                    continue
+            yield record
+
+
+async def aiter_record_chunks(
+    records: AsyncIterable[dict[str, Any]], max_size: int, stats: ImportStats, content_ids: bool = False
+) -> AsyncIterator[IngestChunk]:
+    """Group import records into chunks, validating each record as it arrives.
+
+    Records are ``{"id"?: str, "document": str, "metadata"?: dict, "embedding"?: list[float]}``.
+    Records with and without precomputed embeddings are never mixed in one chunk, so chunks that
+    carry embeddings skip the embedding step entirely. With ``content_ids``, records without an ID
+    get one derived from their document and every metadata is stamped with its content hash.
+    """
+    index = 0
+    start = 0
+    chunk: IngestChunk | None = None
+    tokens = 0
+
+    async for record in records:
+        position = stats.received
+        document = record.get("document") if isinstance(record, dict) else None
+        if not isinstance(document, str):
+            stats.reject(position, "'document' must be a string")
+            continue
+        _id = record.get("id") or (content_id(document) if content_ids else str(uuid.uuid4()))
+        metadata = record.get("metadata") or None
+        embedding = record.get("embedding")
+        if metadata is not None and not isinstance(metadata, dict):
+            stats.reject(position, "'metadata' must be an object")
+            continue
+        if content_ids:
+            metadata = with_content_hash(document, metadata)
+        if embedding is not None and not isinstance(embedding, list):
+            stats.reject(position, "'embedding' must be a list of numbers")
+            continue
+
+        record_tokens = estimate_tokens(document)
+        if chunk is not None and (
+            len(chunk.ids) >= max_size
+            or (embedding is not None) != (chunk.embeddings is not None)
+            or (chunk.embeddings is None and tokens + record_tokens > settings.EMBEDDING_BATCH_MAX_TOKENS)
+        ):
+            yield chunk
+            index += 1
+            start += len(chunk.ids)
+            chunk = None
+
+        if chunk is None:
+            chunk = IngestChunk(
+                index=index,
+                start=start,
+                ids=[],
+                documents=[],
+                metadatas=[],
+                embeddings=[] if embedding is not None else None,
+            )
+            tokens = 0
+
+        chunk.ids.append(str(_id))
+        chunk.documents.append(document)
+        chunk.metadatas.append(metadata)
+        if chunk.embeddings is not None:
+            chunk.embeddings.append(embedding)
+        tokens += record_tokens
+
+    if chunk is not None:
+        yield chunk
@@ -0,0 +1,430 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from typing import Any, Literal
+
+import orjson
+from chromadb.api.types import Embeddings
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+from app.core.metrics import Collected, registry
+from app.db.client import collection_registry, get_chroma_client, get_collection
+from app.db.executor import run_read, run_write
+from app.db.ingest import (
+    MAX_REPORTED_ERRORS,
+    ImportStats,
+    IngestChunk,
+    WriteOperation,
+    add_in_chunks,
+    aiter_changed,
+    chunk_size_for,
+    iter_chunks,
+)
+from app.models.document import ChunkResult
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+JOBS_DATABASE = "jobs.sqlite3"
+
+# Columns returned by status lookups; the payload is only read by the worker running the job.
+STATUS_COLUMNS = (
+    "id, kind, collection_name, status, total, done, failed, skipped, errors, error, cancel_requested, "
+    "created_at, started_at, finished_at"
+)
+# Counters saved with ``resume_from``, restored when an interrupted job is resumed from there.
+CHECKPOINT_COLUMNS = ("checkpoint_done", "checkpoint_skipped")
+
+
+class JobCancelledError(Exception):
+    """Raised from the progress callback to stop a job whose cancellation was requested."""
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobManager:
+    """Runs ingestion requests in the background and tracks their progress in SQLite.
+
+    A job stores the IDs, documents, metadatas and embeddings of its request, resolved when it was
+    enqueued, so running it again writes the same records. Worker tasks take jobs from an in-process
+    queue, at most ``max_concurrent`` at a time, and push them through the chunked ingestion pipeline.
+    After every chunk the job's counters are saved, along with the offset to resume from, which does
+    not advance past a failed chunk.
+    With ``path`` set the jobs survive a restart: jobs left queued or running by a process that is
+    gone are claimed by the next process that starts and resumed from that offset. Several worker
+    processes may share the file; each only runs the jobs it owns, and any of them can report status.
+    """
+
+    def __init__(self, path: str | None, max_concurrent: int, max_queued: int, retention_seconds: float) -> None:
+        self.path = path
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[str] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting in this process's queue."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            if self.path is not None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path or ":memory:", check_same_thread=False, isolation_level=None)
+            if self.path is not None:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA busy_timeout=5000")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, collection_name TEXT NOT NULL, status TEXT NOT NULL, "
+                "owner INTEGER, total INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0, "
+                "failed INTEGER NOT NULL DEFAULT 0, skipped INTEGER NOT NULL DEFAULT 0, "
+                "resume_from INTEGER NOT NULL DEFAULT 0, errors TEXT NOT NULL DEFAULT '[]', error TEXT, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, started_at REAL, "
+                "finished_at REAL, payload BLOB, checkpoint_done INTEGER NOT NULL DEFAULT 0, "
+                "checkpoint_skipped INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            for column in CHECKPOINT_COLUMNS:
+                if column not in columns:
+                    db.execute(f"ALTER TABLE jobs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)")
+            self._db = db
+        return self._db
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection().execute(sql, parameters)
+
+    @staticmethod
+    def _status(row: tuple) -> dict[str, Any]:
+        (job_id, kind, collection_name, status, total, done, failed, skipped, errors, error, cancel_requested,
+         created_at, started_at, finished_at) = row  # fmt: skip
+        elapsed = ((finished_at or time.time()) - started_at) if started_at else 0.0
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "collection_name": collection_name,
+            "status": status,
+            "total": total,
+            "done": done,
+            "failed": failed,
+            "skipped": skipped,
+            "errors": orjson.loads(errors),
+            "error": error,
+            "cancel_requested": bool(cancel_requested),
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "elapsed_seconds": elapsed,
+            "docs_per_second": done / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """Status of a job, or None if it is unknown. This is blocking."""
+        row = self._execute(f"SELECT {STATUS_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._status(row) if row is not None else None
+
+    def recent(self, status: JobStatus | None = None, limit: int = 50) -> list[dict[str, Any]]:
+        """Status of the most recently created jobs, optionally only those in ``status``. This is blocking."""
+        if status is None:
+            rows = self._execute(f"SELECT {STATUS_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        else:
+            rows = self._execute(
+                f"SELECT {STATUS_COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, limit),
+            )
+        return [self._status(row) for row in rows.fetchall()]
+
+    def cancel(self, job_id: str) -> dict[str, Any] | None:
+        """Cancel a queued job, or ask a running one to stop after its current chunk. This is blocking.
+
+        Returns:
+            The job's status afterwards, or None if it is unknown
+        """
+        self._execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, payload = NULL WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        self._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def _insert(
+        self,
+        kind: WriteOperation,
+        collection_name: str,
+        ids: list[str],
+        documents: list[str] | None,
+        metadatas: list[dict[str, Any]] | None,
+        embeddings: Embeddings | None,
+        deduplicate: bool,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        payload = orjson.dumps(
+            {
+                "ids": ids,
+                "documents": documents,
+                "metadatas": metadatas,
+                "embeddings": embeddings,
+                "deduplicate": deduplicate,
+            },
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+        self._execute(
+            "INSERT INTO jobs (id, kind, collection_name, status, owner, total, created_at, payload) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, collection_name, os.getpid(), len(ids), time.time(), payload),
+        )
+        return job_id
+
+    async def enqueue(
+        self,
+        kind: WriteOperation,
+        collection_name: str,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+        embeddings: Embeddings | None = None,
+        deduplicate: bool = False,
+    ) -> dict[str, Any]:
+        """Persist an ingestion job and queue it for a background worker.
+
+        Args:
+            kind: Write operation of the job: ``add``, ``upsert`` or ``update``
+            collection_name: Name of the collection to write to
+            ids: IDs of the documents
+            documents: Documents to embed and write
+            metadatas: Metadatas of the documents
+            embeddings: Precomputed embeddings, written as-is
+            deduplicate: For ``add``, skip documents whose stored content hash matches and upsert the rest
+
+        Returns:
+            The status of the queued job
+
+        Raises:
+            HTTPException: 503 with a ``Retry-After`` header when ``max_queued`` jobs are already waiting
+        """
+        self.start()
+        if self.pending >= self.max_queued:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server is busy: {self.pending} ingestion jobs are already queued, retry later",
+                headers={"Retry-After": "5"},
+            )
+        job_id = await run_write(
+            self._insert, kind, collection_name, ids, documents, metadatas, embeddings, deduplicate
+        )
+        self._queue.put_nowait(job_id)
+        return await run_read(self.get, job_id)
+
+    def _claim_orphans(self) -> list[str]:
+        """Take over the unfinished jobs of processes that are gone, oldest first."""
+        pid = os.getpid()
+        cutoff = time.time() - self.retention_seconds
+        self._execute("DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND finished_at < ?", (cutoff,))
+        rows = self._execute(
+            "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+        claimed = []
+        for job_id, owner in rows:
+            if owner is not None and owner != pid and _process_alive(owner):
+                continue
+            # Chunks past the checkpoint run again, so their counts and errors are dropped.
+            cursor = self._execute(
+                "UPDATE jobs SET owner = ?, status = 'queued', done = checkpoint_done, skipped = checkpoint_skipped, "
+                "failed = 0, errors = '[]' WHERE id = ? AND owner IS ? AND status IN ('queued', 'running')",
+                (pid, job_id, owner),
+            )
+            if cursor.rowcount:
+                claimed.append(job_id)
+        return claimed
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop and resume jobs left unfinished.
+
+        Calling it again on the same loop does nothing, so enqueuing can start the workers lazily.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.max_concurrent)]
+        claimed = self._claim_orphans()
+        for job_id in claimed:
+            self._queue.put_nowait(job_id)
+        if claimed:
+            logger.info("Resuming %d unfinished ingestion jobs", len(claimed))
+
+    async def stop(self) -> None:
+        """Stop the worker tasks. Jobs they were running stay ``running`` and are resumed on the next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ingestion job %s could not be run", job_id)
+            finally:
+                self._queue.task_done()
+
+    def _begin(self, job_id: str) -> tuple[str, str, dict[str, Any], int] | None:
+        cursor = self._execute(
+            "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) "
+            "WHERE id = ? AND owner = ? AND status = 'queued'",
+            (time.time(), job_id, os.getpid()),
+        )
+        if not cursor.rowcount:
+            return None
+        kind, collection_name, payload, resume_from = self._execute(
+            "SELECT kind, collection_name, payload, resume_from FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return kind, collection_name, orjson.loads(payload), resume_from
+
+    def _record(self, job_id: str, result: ChunkResult, resume_from: int | None, skipped: int) -> None:
+        """Save the outcome of one chunk and, if given, the offset to resume from along with the counters.
+
+        Raises:
+            JobCancelledError: If the job's cancellation was requested
+        """
+        with self._lock:
+            db = self._connection()
+            if not result.ok:
+                (errors,) = db.execute("SELECT errors FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                errors = orjson.loads(errors)
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"documents {result.start}-{result.start + result.count - 1}: {result.error}")
+                    db.execute("UPDATE jobs SET errors = ? WHERE id = ?", (orjson.dumps(errors).decode(), job_id))
+            (cancel_requested,) = db.execute(
+                "UPDATE jobs SET done = done + :done, failed = failed + :failed, skipped = skipped + :skipped, "
+                "resume_from = COALESCE(:resume_from, resume_from), "
+                "checkpoint_done = CASE WHEN :resume_from IS NULL THEN checkpoint_done ELSE done + :done END, "
+                "checkpoint_skipped = CASE WHEN :resume_from IS NULL THEN checkpoint_skipped ELSE skipped + :skipped END "
+                "WHERE id = :id RETURNING cancel_requested",
+                {
+                    "done": result.count if result.ok else 0,
+                    "failed": 0 if result.ok else result.count,
+                    "skipped": skipped,
+                    "resume_from": resume_from,
+                    "id": job_id,
+                },
+            ).fetchone()
+        if cancel_requested:
+            raise JobCancelledError
+
+    def _finish(self, job_id: str, status: JobStatus, error: str | None = None, skipped: int = 0) -> None:
+        self._execute(
+            "UPDATE jobs SET status = CASE WHEN ? = 'completed' AND done = 0 AND failed > 0 THEN 'failed' ELSE ? END, "
+            "error = ?, skipped = skipped + ?, finished_at = ?, payload = NULL WHERE id = ?",
+            (status, status, error, skipped, time.time(), job_id),
+        )
+
+    async def _run(self, job_id: str) -> None:
+        job = await run_read(self._begin, job_id)
+        if job is None:
+            return
+        kind, collection_name, payload, resume_from = job
+        stats = ImportStats()
+        recorded_skipped = 0
+        ends: dict[int, int] = {}
+        failed = False
+
+        def bounded(chunks: Iterator[IngestChunk]) -> Iterator[IngestChunk]:
+            # Remember where each chunk ends before deduplication shrinks it, to know where to resume.
+            for chunk in chunks:
+                ends[chunk.index] = resume_from + chunk.start + len(chunk.ids)
+                yield chunk
+
+        async def record(result: ChunkResult) -> None:
+            nonlocal recorded_skipped, failed
+            skipped, recorded_skipped = stats.skipped - recorded_skipped, stats.skipped
+            # A chunk may fail only because the process is going down, so a resumed job retries it and
+            # everything after it: the resume offset stops advancing at the first failed chunk.
+            failed = failed or not result.ok
+            checkpoint = None if failed else ends[result.index]
+            result = result.model_copy(update={"start": resume_from + result.start})
+            await run_write(self._record, job_id, result, checkpoint, skipped)
+
+        def remaining(name: str) -> list | None:
+            values = payload[name]
+            return values[resume_from:] if values is not None else None
+
+        try:
+            collection = await get_collection(collection_name, create=kind != "update")
+            embedding_function = collection_registry.embedding_function(collection_name)
+            chunks = bounded(
+                iter_chunks(
+                    remaining("ids"),
+                    remaining("documents"),
+                    remaining("metadatas"),
+                    max_size=chunk_size_for(get_chroma_client()),
+                    embeddings=remaining("embeddings"),
+                )
+            )
+            operation = kind
+            if payload["deduplicate"]:
+                chunks = aiter_changed(collection, chunks, stats)
+                operation = "upsert"
+            await add_in_chunks(collection, chunks, embedding_function, on_result=record, operation=operation)
+        except JobCancelledError:
+            await run_write(self._finish, job_id, "cancelled", None, stats.skipped - recorded_skipped)
+            logger.info("Ingestion job %s cancelled", job_id)
+            return
+        except Exception as e:
+            await run_write(self._finish, job_id, "failed", str(e), stats.skipped - recorded_skipped)
+            logger.warning("Ingestion job %s failed: %s", job_id, e)
+            return
+        await run_write(self._finish, job_id, "completed", None, stats.skipped - recorded_skipped)
+        logger.info("Ingestion job %s finished", job_id)
+
+
+def _jobs_path() -> str | None:
+    if settings.CHROMA_CLIENT_TYPE == "ephemeral" or not settings.CHROMA_DATA_DIR:
+        return None
+    return os.path.join(settings.CHROMA_DATA_DIR, JOBS_DATABASE)
+
+
+job_manager = JobManager(
+    _jobs_path(),
+    max_concurrent=settings.INGEST_JOB_CONCURRENCY,
+    max_queued=settings.INGEST_JOB_QUEUE_SIZE,
+    retention_seconds=settings.INGEST_JOB_RETENTION_HOURS * 3600,
+)
+registry.register(
+    Collected(
+        "ingest_jobs_pending",
+        "Ingestion jobs waiting for a background worker in this process",
+        "gauge",
+        (),
+        lambda: {(): job_manager.pending},
+    )
+)
@@ -0,0 +1,346 @@
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import orjson
+from chromadb.api.models.Collection import Collection
+
+from app.core.config import get_settings
+from app.db.generations import generation_counters
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+LOAD_PAGE_SIZE = 1000
+INDEX_DIRECTORY = "lexical"
+INDEX_SUFFIX = ".bm25.npz"
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """BM25 inverted index over the documents of one collection.
+
+    Documents are numbered by row; postings map each term to the rows and term frequencies of the
+    documents containing it. A term's postings are converted to NumPy arrays the first time it is
+    searched and again only after a write touches it, so searches over a stable index score whole
+    posting lists with vectorized arithmetic.
+    """
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self._ids: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._free: list[int] = []
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._total_length = 0
+        self._postings: dict[str, dict[int, int]] = {}
+        self._doc_terms: dict[int, list[str]] = {}
+        self._arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(
+        self, ids: list[str], documents: list[str | None], existing_only: bool = False, new_only: bool = False
+    ) -> None:
+        """Index ``documents`` under ``ids``, replacing earlier versions.
+
+        Args:
+            ids: Document IDs
+            documents: Document texts; None entries are indexed as empty
+            existing_only: Only replace documents that are already indexed, like Chroma's ``update``
+            new_only: Only index documents that are not indexed yet, keeping the postings of the others
+        """
+        with self._lock:
+            for id_, document in zip(ids, documents, strict=True):
+                if (existing_only and id_ not in self._rows) or (new_only and id_ in self._rows):
+                    continue
+                self._remove(id_)
+                self._insert(id_, Counter(tokenize(document or "")))
+
+    def remove(self, ids: list[str]) -> None:
+        """Remove ``ids`` from the index; unknown IDs are ignored."""
+        with self._lock:
+            for id_ in ids:
+                self._remove(id_)
+
+    def _insert(self, id_: str, counts: Counter[str]) -> None:
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._ids)
+            self._ids.append(None)
+            if row >= len(self._lengths):
+                self._lengths = np.concatenate([self._lengths, np.zeros(max(1024, row), dtype=np.int32)])
+        self._ids[row] = id_
+        self._rows[id_] = row
+        length = sum(counts.values())
+        self._lengths[row] = length
+        self._total_length += length
+        self._doc_terms[row] = list(counts)
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[row] = frequency
+            self._arrays.pop(term, None)
+
+    def _remove(self, id_: str) -> None:
+        row = self._rows.pop(id_, None)
+        if row is None:
+            return
+        for term in self._doc_terms.pop(row):
+            posting = self._postings[term]
+            del posting[row]
+            if not posting:
+                del self._postings[term]
+            self._arrays.pop(term, None)
+        self._total_length -= int(self._lengths[row])
+        self._lengths[row] = 0
+        self._ids[row] = None
+        self._free.append(row)
+
+    def _posting_arrays(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self._postings.get(term)
+            if not posting:
+                return None
+            rows = np.fromiter(posting.keys(), dtype=np.int64, count=len(posting))
+            frequencies = np.fromiter(posting.values(), dtype=np.float32, count=len(posting))
+            arrays = self._arrays[term] = (rows, frequencies)
+        return arrays
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Return up to ``k`` ``(id, score)`` pairs with the highest BM25 scores for ``query``, best first."""
+        with self._lock:
+            count = len(self._rows)
+            if not count or k <= 0:
+                return []
+            average_length = self._total_length / count or 1.0
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in set(tokenize(query)):
+                arrays = self._posting_arrays(term)
+                if arrays is None:
+                    continue
+                rows, frequencies = arrays
+                idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+                norms = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[rows] / average_length)
+                scores[rows] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norms)
+
+            matched = np.flatnonzero(scores)
+            if len(matched) > k:
+                matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            matched = matched[np.argsort(-scores[matched], kind="stable")]
+            return [(self._ids[row], float(scores[row])) for row in matched]
+
+    def save(self, path: Path) -> None:
+        """Write the index to ``path`` atomically, compacting away deleted rows."""
+        with self._lock:
+            live = [row for row, id_ in enumerate(self._ids) if id_ is not None]
+            compact = np.full(len(self._ids), -1, dtype=np.int64)
+            compact[live] = np.arange(len(live))
+            terms = list(self._postings)
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(self._postings[term]) for term in terms])
+            rows = np.fromiter(
+                (row for term in terms for row in self._postings[term]), dtype=np.int64, count=int(offsets[-1])
+            )
+            frequencies = np.fromiter(
+                (frequency for term in terms for frequency in self._postings[term].values()),
+                dtype=np.int32,
+                count=int(offsets[-1]),
+            )
+            arrays = {
+                "ids": np.frombuffer(orjson.dumps([self._ids[row] for row in live]), dtype=np.uint8),
+                "terms": np.frombuffer(orjson.dumps(terms), dtype=np.uint8),
+                "lengths": self._lengths[live],
+                "offsets": offsets,
+                "rows": compact[rows],
+                "frequencies": frequencies,
+            }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "InvertedIndex":
+        """Read an index written by :meth:`save`."""
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            ids = orjson.loads(data["ids"].tobytes())
+            terms = orjson.loads(data["terms"].tobytes())
+            offsets, rows, frequencies = data["offsets"], data["rows"], data["frequencies"]
+            index._lengths = data["lengths"].astype(np.int32)
+
+        index._ids = ids
+        index._rows = {id_: row for row, id_ in enumerate(ids)}
+        index._total_length = int(index._lengths.sum())
+        index._doc_terms = {row: [] for row in range(len(ids))}
+        for position, term in enumerate(terms):
+            term_rows = rows[offsets[position] : offsets[position + 1]]
+            term_frequencies = frequencies[offsets[position] : offsets[position + 1]]
+            index._postings[term] = dict(zip(term_rows.tolist(), term_frequencies.tolist(), strict=True))
+            index._arrays[term] = (term_rows, term_frequencies.astype(np.float32))
+            for row in term_rows.tolist():
+                index._doc_terms[row].append(term)
+        return index
+
+
+class LexicalIndexes:
+    """Builds, incrementally maintains and persists the BM25 index of each collection.
+
+    An index is loaded from ``directory`` (or built from the collection's documents) the first time
+    the collection is searched. Writes through this server then update it in place. The saved copy is
+    removed as soon as the index changes and written again ``flush_seconds`` later, so a crash leads to
+    a rebuild rather than stale postings. Writes to collections whose index is not loaded only remove
+    the saved copy. Indexes are keyed by collection ID, so renaming a collection keeps its index.
+
+    Each index remembers the generation of its collection it was synced at. When another worker
+    process sharing ``SHARED_STATE_FILE`` writes to the collection, the generation moves past the
+    index's and the index is rebuilt on the next search.
+    """
+
+    def __init__(self, directory: Path | None, flush_seconds: float) -> None:
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._indexes: dict[str, InvertedIndex] = {}
+        self._dirty: set[str] = set()
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(collection_id: str) -> str:
+        return f"lexical:{collection_id}"
+
+    def _path(self, collection_id: str) -> Path | None:
+        return self.directory / f"{collection_id}{INDEX_SUFFIX}" if self.directory is not None else None
+
+    def get(self, collection: Collection) -> InvertedIndex:
+        """Return the collection's index, loading or building it if needed. This is blocking."""
+        collection_id = str(collection.id)
+        index = self._indexes.get(collection_id)
+        if index is not None and index.generation == generation_counters.get(self._key(collection_id)):
+            return index
+
+        generation = generation_counters.get(self._key(collection_id))
+        path = self._path(collection_id)
+        index = None
+        if path is not None and path.exists():
+            index = InvertedIndex.load(path)
+            if len(index) != collection.count():
+                logger.info("Saved BM25 index of '%s' is out of date, rebuilding", collection.name)
+                index = None
+        if index is None:
+            index = self._build(collection)
+            if path is not None:
+                index.save(path)
+        index.generation = generation
+        with self._lock:
+            self._indexes[collection_id] = index
+        return index
+
+    @staticmethod
+    def _build(collection: Collection) -> InvertedIndex:
+        index = InvertedIndex()
+        offset = 0
+        while True:
+            page = collection.get(include=["documents"], limit=LOAD_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            index.add(page["ids"], page["documents"])
+            offset += len(page["ids"])
+            if len(page["ids"]) < LOAD_PAGE_SIZE:
+                break
+        logger.info("Built BM25 index of '%s' with %d documents", collection.name, len(index))
+        return index
+
+    def apply(self, collection: Collection, operation: str, ids: list[str], documents: list[str] | None = None) -> None:
+        """Reflect a successful ``add``, ``upsert``, ``update`` or ``delete`` in the collection's index.
+
+        Chroma keeps the stored text of documents written without one, so updates without documents do not
+        change the index and upserts without documents only add the IDs that are new, as empty. This is blocking.
+        """
+        if operation == "update" and documents is None:
+            return
+        collection_id = str(collection.id)
+        generation = generation_counters.advance(self._key(collection_id))
+        index = self._indexes.get(collection_id)
+        if index is None or index.generation != generation - 1:
+            # Not loaded, or another worker wrote in between: rebuild on the next search.
+            self._discard(collection_id)
+            return
+
+        if operation == "delete":
+            index.remove(ids)
+        elif documents is None:
+            index.add(ids, [None] * len(ids), new_only=True)
+        else:
+            index.add(ids, documents, existing_only=operation == "update")
+        index.generation = generation
+        self._mark_dirty(collection_id)
+
+    def drop(self, collection_id: str) -> None:
+        """Forget the index of a deleted collection and remove its saved copy."""
+        generation_counters.bump(self._key(collection_id))
+        self._discard(collection_id)
+
+    def _discard(self, collection_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(collection_id, None)
+            self._dirty.discard(collection_id)
+        path = self._path(collection_id)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def _mark_dirty(self, collection_id: str) -> None:
+        path = self._path(collection_id)
+        if path is None:
+            return
+        with self._lock:
+            if collection_id in self._dirty:
+                return
+            self._dirty.add(collection_id)
+            path.unlink(missing_ok=True)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Save every index changed since it was last saved. This is blocking."""
+        with self._lock:
+            self._timer = None
+            dirty = [(collection_id, self._indexes.get(collection_id)) for collection_id in self._dirty]
+            self._dirty.clear()
+        for collection_id, index in dirty:
+            path = self._path(collection_id)
+            if index is None or path is None:
+                continue
+            index.save(path)
+            with self._lock:
+                # Changed again while saving: the saved copy may miss that change.
+                if collection_id in self._dirty:
+                    path.unlink(missing_ok=True)
+
+
+def _index_directory() -> Path | None:
+    if settings.CHROMA_CLIENT_TYPE == "ephemeral" or not settings.CHROMA_DATA_DIR:
+        return None
+    return Path(settings.CHROMA_DATA_DIR) / INDEX_DIRECTORY
+
+
+lexical_indexes = LexicalIndexes(_index_directory(), settings.LEXICAL_FLUSH_SECONDS)
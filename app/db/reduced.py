@@ -0,0 +1,306 @@
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Collection metadata key holding the number of leading dimensions kept in the HNSW index.
+REDUCED_DIMENSIONS_KEY = "reduced_dimensions"
+SIDECAR_DIRECTORY = "vectors"
+
+
+def reduced_dimensions(metadata: dict[str, Any] | None) -> int | None:
+    """Number of dimensions indexed by a reduced collection, or None for a regular collection."""
+    value = (metadata or {}).get(REDUCED_DIMENSIONS_KEY)
+    return int(value) if value else None
+
+
+def truncate(embeddings: Embeddings | np.ndarray, dimensions: int) -> np.ndarray:
+    """Keep the first ``dimensions`` components of each vector and rescale it to unit length.
+
+    Models trained with Matryoshka representation learning, such as OpenAI's ``text-embedding-3``
+    family, put most of the information in the leading dimensions, so the prefix is a usable
+    embedding on its own.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)[:, :dimensions]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class TruncatedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding function of a reduced collection: the provider's vectors truncated to the indexed dimensions.
+
+    Query paths that embed texts through the collection get vectors matching its HNSW index, while
+    ingestion unwraps ``embedding_function`` to keep the full vectors for the sidecar.
+    """
+
+    def __init__(self, embedding_function: EmbeddingFunction[Documents], dimensions: int) -> None:
+        self.embedding_function = embedding_function
+        self.dimensions = dimensions
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return list(truncate(self.embedding_function(input), self.dimensions))
+
+    def name(self) -> str:  # type: ignore[override]
+        return self.embedding_function.name()
+
+    def is_legacy(self) -> bool:
+        return True
+
+    def get_config(self) -> dict[str, Any]:
+        return {**self.embedding_function.get_config(), REDUCED_DIMENSIONS_KEY: self.dimensions}
+
+
+@lru_cache
+def truncated_embedding_function(
+    embedding_function: EmbeddingFunction[Documents], dimensions: int
+) -> TruncatedEmbeddingFunction:
+    """Shared truncating wrapper of ``embedding_function``, so collection handles can be compared by identity."""
+    return TruncatedEmbeddingFunction(embedding_function, dimensions)
+
+
+class VectorSidecar:
+    """Full-precision float32 vectors of one reduced collection, memory-mapped from disk.
+
+    Vectors are rows of a raw float32 file and the ID of each row is a line of a companion file,
+    which starts with a header line recording the dimension.
+    New IDs are appended and known IDs are overwritten in place, so a row never moves. Rows of
+    deleted documents are left behind: lookups are only made for IDs the HNSW index returns.
+    Writers hold an exclusive ``flock`` and readers pick up rows appended by other processes by
+    reading the tail of the ID file.
+    """
+
+    def __init__(self, prefix: Path) -> None:
+        self.vectors_path = prefix.with_suffix(".f32")
+        self.ids_path = prefix.with_suffix(".ids")
+        self.rows: dict[str, int] = {}
+        self.count = 0
+        self.dimension: int | None = None
+        self._ids_offset = 0
+        self._matrix: np.ndarray | None = None
+        self._lock = threading.Lock()
+        self._file = open(self.ids_path, "a+b")  # noqa: SIM115 - held open for the lifetime of the sidecar
+
+    @contextmanager
+    def _flock(self, exclusive: bool) -> Iterator[None]:
+        import fcntl
+
+        fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock, self._flock(exclusive=True):
+            self._read_new_ids()
+            yield
+
+    def _refresh(self) -> None:
+        # Another process appends vectors before their IDs, so read both under its lock.
+        if os.path.getsize(self.ids_path) != self._ids_offset:
+            with self._flock(exclusive=False):
+                self._read_new_ids()
+
+    def _read_new_ids(self) -> None:
+        size = os.path.getsize(self.ids_path)
+        if size == self._ids_offset:
+            return
+        with open(self.ids_path, "rb") as f:
+            f.seek(self._ids_offset)
+            tail = f.read(size - self._ids_offset)
+        # A line still being written by another process is picked up on the next refresh.
+        complete = tail[: tail.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            entry = orjson.loads(line)
+            if isinstance(entry, dict):
+                self.dimension = entry["dimension"]
+                continue
+            self.rows[entry] = self.count
+            self.count += 1
+        self._ids_offset += len(complete)
+        self._remap()
+
+    def _remap(self) -> None:
+        if not self.count:
+            return
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.count, self.dimension))
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the vector file on disk."""
+        return self.count * (self.dimension or 0) * 4
+
+    def store(self, ids: list[str], vectors: np.ndarray) -> None:
+        """Write the full vectors of ``ids``, replacing the rows of IDs already stored. This is blocking.
+
+        Raises:
+            ValueError: If the vectors' dimension differs from the vectors already stored
+        """
+        with self._exclusive():
+            if self.dimension is not None and vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embeddings have dimension {vectors.shape[1]} but the collection stores {self.dimension}"
+                )
+            latest = {id_: position for position, id_ in enumerate(ids)}
+            known = [(self.rows[id_], position) for id_, position in latest.items() if id_ in self.rows]
+            new = [(id_, position) for id_, position in latest.items() if id_ not in self.rows]
+            if known:
+                rows, positions = zip(*known, strict=True)
+                self._matrix[list(rows)] = vectors[list(positions)]
+                self._matrix.flush()
+            if not new:
+                return
+
+            lines = b"".join(orjson.dumps(id_) + b"\n" for id_, _ in new)
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                lines = orjson.dumps({"dimension": self.dimension}) + b"\n" + lines
+            with open(self.vectors_path, "r+b" if self.vectors_path.exists() else "wb") as f:
+                # Start right after the last row with an ID, dropping rows left by an interrupted write.
+                f.seek(self.count * self.dimension * 4)
+                f.write(np.ascontiguousarray(vectors[[position for _, position in new]]).tobytes())
+                f.truncate()
+            self._file.write(lines)
+            self._file.flush()
+            for id_, _ in new:
+                self.rows[id_] = self.count
+                self.count += 1
+            self._ids_offset += len(lines)
+            self._remap()
+
+    def lookup(self, ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Full vectors of ``ids``, read from the mapped file. This is blocking.
+
+        Returns:
+            A ``(len(ids), dimension)`` matrix and a mask of the IDs that were found; missing rows are zero
+        """
+        with self._lock:
+            self._refresh()
+            matrix, dimension = self._matrix, self.dimension or 0
+            rows = np.asarray([self.rows.get(id_, -1) for id_ in ids], dtype=np.int64)
+        found = rows >= 0
+        vectors = np.zeros((len(ids), dimension), dtype=np.float32)
+        if found.any():
+            vectors[found] = matrix[rows[found]]
+        return vectors, found
+
+    def matrix(self) -> tuple[list[str], np.ndarray]:
+        """Every stored ID and the mapped matrix of their vectors, in row order. This is blocking."""
+        with self._lock:
+            self._refresh()
+            ids = [""] * self.count
+            for id_, row in self.rows.items():
+                ids[row] = id_
+            return ids, self._matrix if self._matrix is not None else np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self.count
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def exact_distances(vectors: np.ndarray, query: np.ndarray, space: str) -> np.ndarray:
+    """Distances from ``query`` to each row of ``vectors`` as Chroma computes them in ``space``."""
+    if space == "l2":
+        difference = vectors - query
+        return np.einsum("ij,ij->i", difference, difference)
+    products = vectors @ query
+    if space == "cosine":
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        products = products / np.where(norms > 0, norms, 1.0)
+    return 1.0 - products
+
+
+def rerank(
+    sidecar: VectorSidecar, ids: list[str], query: np.ndarray, space: str, n_results: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Order candidate ``ids`` by their exact distance to the full ``query`` vector. This is blocking.
+
+    Candidates missing from the sidecar sort last with an infinite distance.
+
+    Returns:
+        Positions into ``ids`` of the best ``n_results``, their distances and their full vectors
+    """
+    vectors, found = sidecar.lookup(ids)
+    distances = np.where(found, exact_distances(vectors, query, space), np.inf)
+    order = np.argsort(distances, kind="stable")[:n_results]
+    return order, distances[order], vectors[order]
+
+
+class VectorSidecars:
+    """The vector sidecars of all reduced collections, keyed by collection ID.
+
+    Sidecars live in ``directory``; without one (ephemeral client) they are kept in a temporary
+    directory removed at exit, since the collections do not outlive the process either.
+    """
+
+    def __init__(self, directory: Path | None) -> None:
+        self.directory = directory
+        self.persistent = directory is not None
+        self._lock = threading.Lock()
+        self._sidecars: dict[str, VectorSidecar] = {}
+
+    def _directory(self) -> Path:
+        if self.directory is None:
+            self.directory = Path(tempfile.mkdtemp(prefix="chromadb-fastapi-vectors-"))
+            atexit.register(shutil.rmtree, self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory
+
+    def get(self, collection: Collection) -> VectorSidecar:
+        """Sidecar of a reduced collection, opened on first use."""
+        collection_id = str(collection.id)
+        with self._lock:
+            sidecar = self._sidecars.get(collection_id)
+            if sidecar is None:
+                sidecar = self._sidecars[collection_id] = VectorSidecar(self._directory() / collection_id)
+            return sidecar
+
+    def store(self, collection: Collection, ids: list[str], embeddings: Embeddings) -> Embeddings:
+        """Keep the full ``embeddings`` of a reduced collection and return the truncated ones to index.
+
+        This is blocking.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        self.get(collection).store(ids, vectors)
+        return list(truncate(vectors, reduced_dimensions(collection.metadata)))
+
+    def drop(self, collection_id: str) -> None:
+        """Forget and delete the sidecar of a deleted collection."""
+        with self._lock:
+            sidecar = self._sidecars.pop(collection_id, None)
+        if sidecar is not None:
+            sidecar.close()
+        if self.directory is not None:
+            for suffix in (".f32", ".ids"):
+                (self.directory / collection_id).with_suffix(suffix).unlink(missing_ok=True)
+
+
+def _sidecar_directory() -> Path | None:
+    if settings.CHROMA_CLIENT_TYPE == "ephemeral" or not settings.CHROMA_DATA_DIR:
+        return None
+    return Path(settings.CHROMA_DATA_DIR) / SIDECAR_DIRECTORY
+
+
+vector_sidecars = VectorSidecars(_sidecar_directory())
@@ -0,0 +1,136 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+from app.core.metrics import Collected, registry
+from app.db.generations import GenerationCounters, generation_counters
+
+settings = get_settings()
+
+# Request fields where an empty value means "not set"; MCP clients send empty forms instead of null.
+EMPTY_AS_NONE = ("ids", "where", "where_document", "cursor")
+
+# Fixed per-entry allowance for the key, bookkeeping and Response headers on top of the body size.
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class ResultCache:
+    """Memory-bounded LRU cache of encoded read responses, invalidated by per-collection generations.
+
+    Every write to a collection bumps its generation counter. Entries are keyed on the generation
+    observed *before* the read started, so a result computed concurrently with a write is stored
+    under a generation that is already stale and can never be served. Entries also expire after a TTL.
+    Generations come from ``generations``, which worker processes can share so that a write handled
+    by one worker invalidates what the others have cached.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, generations: GenerationCounters | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, int, bytes], tuple[float, bytes, str]] = OrderedDict()
+        self._bytes = 0
+        self._generations = generations or GenerationCounters()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(kind: str, request: BaseModel, media_type: str) -> bytes:
+        """Hash a normalized request model together with the endpoint kind and response media type."""
+        payload = request.model_dump(mode="json")
+        for field in EMPTY_AS_NONE:
+            if field in payload and not payload[field]:
+                payload[field] = None
+        return hashlib.sha256(orjson.dumps([kind, media_type, payload], option=orjson.OPT_SORT_KEYS)).digest()
+
+    def generation(self, collection_name: str) -> int:
+        """Current write generation of ``collection_name``."""
+        return self._generations.get(collection_name)
+
+    def invalidate(self, *collection_names: str) -> None:
+        """Bump the generation of ``collection_names`` and drop their cached entries."""
+        self._generations.bump(*collection_names)
+        with self._lock:
+            stale = [key for key in self._entries if key[0] in collection_names]
+            for key in stale:
+                self._drop(key)
+
+    def get(self, collection_name: str, generation: int, digest: bytes) -> tuple[bytes, str] | None:
+        """Return the cached ``(body, media_type)`` if it is current and not expired."""
+        key = (collection_name, generation, digest)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or generation != self.generation(collection_name) or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, collection_name: str, generation: int, digest: bytes, body: bytes, media_type: str) -> None:
+        """Store an encoded response computed while ``collection_name`` was at ``generation``."""
+        size = len(body) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        key = (collection_name, generation, digest)
+        with self._lock:
+            if generation != self.generation(collection_name):
+                return
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body, media_type)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: tuple[str, int, bytes]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1]) + ENTRY_OVERHEAD_BYTES
+
+    def clear(self) -> None:
+        """Drop every entry; generations are kept so in-flight reads still cannot store stale results."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the current size of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.QUERY_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+result_cache = ResultCache(
+    max_bytes=settings.QUERY_CACHE_MEMORY_MB * 1024 * 1024,
+    ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+    generations=generation_counters,
+)
+
+registry.register(
+    Collected(
+        "query_cache_lookups_total",
+        "Query result cache lookups by outcome",
+        "counter",
+        ("result",),
+        lambda: {("hit",): result_cache.hits, ("miss",): result_cache.misses},
+    )
+)
@@ -0,0 +1,350 @@
+import asyncio
+import heapq
+import time
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Embeddings, QueryResult
+
+from app.core.config import get_settings
+from app.db.batcher import query_batcher
+from app.db.client import collection_registry, get_collection
+from app.db.executor import run_read
+from app.db.lexical import lexical_indexes
+from app.db.reduced import reduced_dimensions, rerank, truncate, vector_sidecars
+from app.models.document import CollectionTiming
+
+settings = get_settings()
+
+MERGED_FIELDS = ("ids", "documents", "metadatas", "embeddings", "uris", "distances")
+
+# Fields a hybrid result carries per hit besides ids, distances and scores.
+HYBRID_FIELDS = ("documents", "metadatas", "embeddings", "uris")
+# Each ranking contributes this many candidates per requested result, but at least MIN_CANDIDATES.
+CANDIDATE_MULTIPLIER = 4
+MIN_CANDIDATES = 50
+# BM25 hits fetched per candidate when filters are applied afterwards.
+FILTERED_OVERFETCH = 4
+# Reduced collections re-rank this many index hits per requested result, but at least MIN_RERANK_CANDIDATES.
+RERANK_MULTIPLIER = 4
+MIN_RERANK_CANDIDATES = 40
+
+
+def merge_query_results(results: dict[str, QueryResult], n_results: int) -> dict[str, Any]:
+    """Merge per-collection query results into a global top-k per query text, ordered by distance.
+
+    Distances are only comparable when every collection uses the same embedding model and space.
+
+    Args:
+        results: Query results keyed by collection name; each must include distances
+        n_results: Number of results to keep per query text
+
+    Returns:
+        A QueryResult-shaped dict with an extra ``collections`` field naming each hit's source
+    """
+    num_queries = max((len(result["ids"]) for result in results.values()), default=0)
+    merged: dict[str, Any] = {field: [] for field in MERGED_FIELDS}
+    merged["collections"] = []
+    present = {field for result in results.values() for field in MERGED_FIELDS if result.get(field) is not None}
+
+    for query_index in range(num_queries):
+        candidates = (
+            (distance, name, position)
+            for name, result in results.items()
+            for position, distance in enumerate(result["distances"][query_index])
+        )
+        top = heapq.nsmallest(n_results, candidates, key=lambda candidate: candidate[0])
+
+        for field in MERGED_FIELDS:
+            if field in present:
+                merged[field].append([results[name][field][query_index][position] for _, name, position in top])
+        merged["collections"].append([name for _, name, _ in top])
+
+    for field in MERGED_FIELDS:
+        if field not in present:
+            merged[field] = None
+    return merged
+
+
+async def fanout_query(
+    collection_names: list[str],
+    query_texts: list[str],
+    n_results: int,
+    where: dict[str, Any] | None = None,
+    where_document: dict[str, Any] | None = None,
+    include: list[str] | None = None,
+) -> tuple[dict[str, Any], list[CollectionTiming], float]:
+    """Query several collections concurrently, embedding the query texts once.
+
+    Texts are embedded once per distinct embedding function among the target collections, and
+    the per-collection ``query`` calls run concurrently on the read pool with those embeddings.
+    A collection that fails is reported in its timing entry and left out of the merge.
+
+    Returns:
+        The merged result, per-collection timings, and the time spent embedding in seconds
+    """
+    include = list(include or ["documents", "metadatas", "distances"])
+    if "distances" not in include:
+        include.append("distances")
+
+    collections = {}
+    timings: dict[str, CollectionTiming] = {}
+    for name, outcome in zip(
+        collection_names,
+        await asyncio.gather(*(get_collection(name) for name in collection_names), return_exceptions=True),
+        strict=True,
+    ):
+        if isinstance(outcome, BaseException):
+            timings[name] = CollectionTiming(collection_name=name, ok=False, seconds=0.0, error=str(outcome))
+        else:
+            collections[name] = outcome
+
+    embedding_started = time.perf_counter()
+    embedding_functions = {name: collection_registry.embedding_function(name) for name in collections}
+    embeddings_by_function: dict[int, Embeddings] = {}
+    for embedding_function in {id(ef): ef for ef in embedding_functions.values()}.values():
+        embeddings_by_function[id(embedding_function)] = await run_read(embedding_function, query_texts)
+    embedding_seconds = time.perf_counter() - embedding_started
+
+    async def query_one(name: str) -> QueryResult | None:
+        started = time.perf_counter()
+        try:
+            result = await run_read(
+                collections[name].query,
+                query_embeddings=embeddings_by_function[id(embedding_functions[name])],
+                n_results=n_results,
+                where=where or None,
+                where_document=where_document or None,
+                include=include,
+            )
+        except Exception as e:
+            timings[name] = CollectionTiming(
+                collection_name=name, ok=False, seconds=time.perf_counter() - started, error=str(e)
+            )
+            return None
+        timings[name] = CollectionTiming(
+            collection_name=name,
+            ok=True,
+            seconds=time.perf_counter() - started,
+            results=sum(len(ids) for ids in result["ids"]),
+        )
+        return result
+
+    outcomes = await asyncio.gather(*(query_one(name) for name in collections))
+    results = {name: result for name, result in zip(collections, outcomes, strict=True) if result is not None}
+    merged = merge_query_results(results, n_results)
+    return merged, [timings[name] for name in collection_names if name in timings], embedding_seconds
+
+
+def reciprocal_rank_fusion(
+    rankings: list[tuple[list[str], float]], rrf_k: int, n_results: int
+) -> list[tuple[str, float]]:
+    """Fuse rankings of IDs; an ID scores ``weight / (rrf_k + rank)`` in every ranking it appears in.
+
+    Args:
+        rankings: ``(ids, weight)`` pairs, each list of IDs ordered best first
+        rrf_k: Rank offset damping the influence of the top positions
+        n_results: Number of fused results to return
+
+    Returns:
+        Up to ``n_results`` ``(id, score)`` pairs, best first
+    """
+    scores: dict[str, float] = {}
+    for ids, weight in rankings:
+        for rank, id_ in enumerate(ids, start=1):
+            scores[id_] = scores.get(id_, 0.0) + weight / (rrf_k + rank)
+    return heapq.nlargest(n_results, scores.items(), key=itemgetter(1))
+
+
+def _lexical_candidates(
+    collection: Collection,
+    query_texts: list[str],
+    limit: int,
+    where: dict[str, Any] | None,
+    where_document: dict[str, Any] | None,
+) -> list[list[str]]:
+    """Rank documents by BM25 for each query text, keeping those that match the filters. This is blocking."""
+    index = lexical_indexes.get(collection)
+    filtered = bool(where or where_document)
+    hits = [
+        [id_ for id_, _ in index.search(text, limit * FILTERED_OVERFETCH if filtered else limit)]
+        for text in query_texts
+    ]
+    if not filtered:
+        return hits
+
+    candidates = list({id_ for query_hits in hits for id_ in query_hits})
+    allowed = set()
+    if candidates:
+        allowed = set(collection.get(ids=candidates, where=where, where_document=where_document, include=[])["ids"])
+    return [[id_ for id_ in query_hits if id_ in allowed][:limit] for query_hits in hits]
+
+
+async def _vector_candidates(
+    collection: Collection,
+    query_texts: list[str],
+    limit: int,
+    where: dict[str, Any] | None,
+    where_document: dict[str, Any] | None,
+    include: list[str],
+) -> QueryResult:
+    if settings.QUERY_BATCH_WINDOW_MS > 0:
+        return await query_batcher.query(
+            collection.name, query_texts, n_results=limit, where=where, where_document=where_document, include=include
+        )
+    return await run_read(
+        collection.query,
+        query_texts=query_texts,
+        n_results=limit,
+        where=where,
+        where_document=where_document,
+        include=include,
+    )
+
+
+async def hybrid_query(
+    collection_name: str,
+    query_texts: list[str],
+    n_results: int,
+    where: dict[str, Any] | None = None,
+    where_document: dict[str, Any] | None = None,
+    include: list[str] | None = None,
+    vector_weight: float = 1.0,
+    lexical_weight: float = 1.0,
+    rrf_k: int = 60,
+    candidates: int | None = None,
+) -> dict[str, Any]:
+    """Rank documents by vector similarity and by BM25, and fuse both rankings with reciprocal rank fusion.
+
+    Both rankings are computed with the same filters, ``candidates`` deep each. Hits that only the
+    lexical ranking found are fetched with one ``get`` call; their distance is NaN. A weight of 0
+    skips that ranking entirely.
+
+    Returns:
+        A QueryResult-shaped dict with an extra ``scores`` field holding each hit's fused score
+    """
+    include = list(include or ["documents", "metadatas", "distances"])
+    fields = [field for field in HYBRID_FIELDS if field in include]
+    limit = candidates or max(n_results * CANDIDATE_MULTIPLIER, MIN_CANDIDATES)
+    where, where_document = where or None, where_document or None
+    collection = await get_collection(collection_name)
+
+    async def no_vector_ranking() -> None:
+        return None
+
+    async def no_lexical_ranking() -> list[list[str]]:
+        return [[] for _ in query_texts]
+
+    vector, lexical = await asyncio.gather(
+        _vector_candidates(collection, query_texts, limit, where, where_document, [*fields, "distances"])
+        if vector_weight
+        else no_vector_ranking(),
+        run_read(_lexical_candidates, collection, query_texts, limit, where, where_document)
+        if lexical_weight
+        else no_lexical_ranking(),
+    )
+
+    fused: list[list[tuple[str, float]]] = []
+    known: list[dict[str, int]] = []
+    for position in range(len(query_texts)):
+        vector_ids = vector["ids"][position] if vector is not None else []
+        known.append({id_: row for row, id_ in enumerate(vector_ids)})
+        fused.append(
+            reciprocal_rank_fusion([(vector_ids, vector_weight), (lexical[position], lexical_weight)], rrf_k, n_results)
+        )
+
+    missing = list({id_ for hits, rows in zip(fused, known, strict=True) for id_, _ in hits if id_ not in rows})
+    fetched: dict[str, dict[str, Any]] = {}
+    if missing:
+        page = await run_read(collection.get, ids=missing, include=fields)
+        for row, id_ in enumerate(page["ids"]):
+            fetched[id_] = {field: page[field][row] for field in fields if page.get(field) is not None}
+
+    result: dict[str, Any] = {"ids": [], "scores": [], "distances": [] if "distances" in include else None}
+    for field in HYBRID_FIELDS:
+        result[field] = [] if field in fields else None
+    for position, (hits, rows) in enumerate(zip(fused, known, strict=True)):
+        result["ids"].append([id_ for id_, _ in hits])
+        result["scores"].append([score for _, score in hits])
+        if result["distances"] is not None:
+            result["distances"].append(
+                [vector["distances"][position][rows[id_]] if id_ in rows else float("nan") for id_, _ in hits]
+            )
+        for field in fields:
+            result[field].append(
+                [
+                    vector[field][position][rows[id_]] if id_ in rows else fetched.get(id_, {}).get(field)
+                    for id_, _ in hits
+                ]
+            )
+    result["included"] = include
+    return result
+
+
+def rerank_candidates(n_results: int, candidates: int | None = None) -> int:
+    """Number of hits fetched from a reduced index to return ``n_results`` after re-ranking."""
+    return candidates or max(n_results * RERANK_MULTIPLIER, MIN_RERANK_CANDIDATES)
+
+
+async def reranked_query(
+    collection: Collection,
+    query_texts: list[str],
+    n_results: int,
+    where: dict[str, Any] | None = None,
+    where_document: dict[str, Any] | None = None,
+    include: list[str] | None = None,
+    candidates: int | None = None,
+) -> dict[str, Any]:
+    """Query a reduced collection in two stages: over-fetch from its compact index, then re-rank exactly.
+
+    The query texts are embedded at full dimension once. The truncated vectors search the HNSW
+    index for ``candidates`` hits per text, and the hits are re-ranked by their exact distance to
+    the full query vector, using the full vectors memory-mapped from the collection's sidecar.
+    Returned distances and embeddings are the full-dimension ones.
+
+    Returns:
+        A QueryResult-shaped dict
+
+    Raises:
+        RuntimeError: If the index returns candidates but the sidecar holds no vectors
+    """
+    include = list(include or ["documents", "metadatas", "distances"])
+    fields = [field for field in HYBRID_FIELDS if field in include and field != "embeddings"]
+    embedding_function = collection_registry.embedding_function(collection.name)
+    full = np.asarray(await run_read(embedding_function.embedding_function, query_texts), dtype=np.float32)
+    found = await run_read(
+        collection.query,
+        query_embeddings=list(truncate(full, reduced_dimensions(collection.metadata))),
+        n_results=rerank_candidates(n_results, candidates),
+        where=where or None,
+        where_document=where_document or None,
+        include=fields,
+    )
+
+    sidecar = vector_sidecars.get(collection)
+    if any(found["ids"]) and not await run_read(len, sidecar):
+        # Every candidate would sort last with an infinite distance, returning an arbitrary order.
+        raise RuntimeError(
+            f"The full vectors of reduced collection '{collection.name}' are missing; "
+            "they are kept under CHROMA_DATA_DIR and were lost or never stored"
+        )
+    space = (collection.configuration_json.get("hnsw") or {}).get("space", "l2")
+    result: dict[str, Any] = {"ids": [], "distances": [] if "distances" in include else None}
+    result["embeddings"] = [] if "embeddings" in include else None
+    for field in HYBRID_FIELDS:
+        if field != "embeddings":
+            result[field] = [] if field in fields else None
+    for position, query in enumerate(full):
+        ids = found["ids"][position]
+        order, distances, vectors = await run_read(rerank, sidecar, ids, query, space, n_results)
+        result["ids"].append([ids[row] for row in order])
+        if result["distances"] is not None:
+            result["distances"].append(distances.tolist())
+        if result["embeddings"] is not None:
+            result["embeddings"].append(vectors)
+        for field in fields:
+            result[field].append([found[field][position][row] for row in order])
+    result["included"] = include
+    return result
@@ -0,0 +1,238 @@
+import time
+from typing import Any
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+
+from app.db.reduced import VectorSidecar, rerank, truncate
+from app.models.collection import TuningResult
+
+EXACT_BLOCK_SIZE = 8192
+LOAD_PAGE_SIZE = 1000
+
+
+def load_embeddings(collection: Collection, page_size: int = LOAD_PAGE_SIZE) -> tuple[list[str], np.ndarray]:
+    """Read every id and embedding of ``collection`` page by page into a float32 matrix. This is blocking."""
+    ids: list[str] = []
+    blocks: list[np.ndarray] = []
+    while True:
+        page = collection.get(include=["embeddings"], limit=page_size, offset=len(ids))
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        blocks.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if len(page["ids"]) < page_size:
+            break
+    if not blocks:
+        return ids, np.empty((0, 0), dtype=np.float32)
+    return ids, np.concatenate(blocks)
+
+
+def _prepare(vectors: np.ndarray, space: str) -> np.ndarray:
+    if space != "cosine":
+        return vectors
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def exact_neighbors(
+    data: np.ndarray, queries: np.ndarray, k: int, space: str, exclude: np.ndarray | None = None
+) -> np.ndarray:
+    """Brute-force the ``k`` nearest rows of ``data`` for each query, scanning ``data`` in blocks.
+
+    Args:
+        data: Stored vectors, one per row
+        queries: Query vectors, one per row
+        k: Number of neighbors
+        space: Chroma distance space ('l2', 'cosine' or 'ip')
+        exclude: Optional row of ``data`` to leave out for each query (the query's own document)
+
+    Returns:
+        A ``(len(queries), k)`` matrix of row indices, nearest first
+    """
+    data, queries = _prepare(data, space), _prepare(queries, space)
+    query_norms = (queries**2).sum(axis=1, keepdims=True)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+    for start in range(0, len(data), EXACT_BLOCK_SIZE):
+        block = data[start : start + EXACT_BLOCK_SIZE]
+        products = queries @ block.T
+        if space == "l2":
+            scores = query_norms - 2 * products + (block**2).sum(axis=1)
+        else:
+            scores = 1.0 - products
+        rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+        if exclude is not None:
+            scores = np.where(rows == exclude[:, None], np.inf, scores)
+
+        scores = np.concatenate([best_scores, scores], axis=1)
+        rows = np.concatenate([best_rows, rows], axis=1)
+        keep = np.argpartition(scores, k - 1, axis=1)[:, :k] if scores.shape[1] > k else np.argsort(scores, axis=1)
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_rows = np.take_along_axis(rows, keep, axis=1)
+
+    order = np.argsort(best_scores, axis=1)
+    return np.take_along_axis(best_rows, order, axis=1)
+
+
+def _recall(found: list[list[int]], expected: np.ndarray) -> float:
+    k = expected.shape[1]
+    return float(np.mean([len(set(rows[:k]) & set(truth)) / k for rows, truth in zip(found, expected, strict=True)]))
+
+
+def _result(ef_search: int, recall: float, seconds: list[float]) -> TuningResult:
+    latencies = np.asarray(seconds) * 1000
+    return TuningResult(
+        ef_search=ef_search,
+        recall=recall,
+        mean_ms=float(latencies.mean()),
+        p50_ms=float(np.percentile(latencies, 50)),
+        p95_ms=float(np.percentile(latencies, 95)),
+        p99_ms=float(np.percentile(latencies, 99)),
+    )
+
+
+def measure_collection(
+    collection: Collection,
+    ids: list[str],
+    queries: np.ndarray,
+    expected: np.ndarray,
+    exclude: np.ndarray | None,
+    ef_search: int,
+) -> TuningResult:
+    """Measure recall and single-query latency of the collection itself. This is blocking."""
+    k = expected.shape[1]
+    extra = 1 if exclude is not None else 0
+    rows_by_id = {id_: row for row, id_ in enumerate(ids)}
+    found: list[list[int]] = []
+    seconds: list[float] = []
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k + extra, include=[])
+        seconds.append(time.perf_counter() - started)
+        rows = [rows_by_id.get(id_, -1) for id_ in result["ids"][0]]
+        if exclude is not None:
+            rows = [row for row in rows if row != exclude[position]]
+        found.append(rows)
+    return _result(ef_search, _recall(found, expected), seconds)
+
+
+def measure_replica(
+    data: np.ndarray,
+    queries: np.ndarray,
+    expected: np.ndarray,
+    exclude: np.ndarray | None,
+    hnsw: dict[str, Any],
+    ef_search_values: list[int],
+) -> tuple[list[TuningResult], float]:
+    """Build an hnswlib index with the collection's HNSW parameters and measure each ef_search on it.
+
+    Chroma's index is loaded once per process and does not pick up a new ef_search until it is
+    reloaded, so candidates are measured on this replica instead. This is blocking.
+
+    Returns:
+        One result per candidate and the time spent building the replica in seconds
+    """
+    import hnswlib
+
+    started = time.perf_counter()
+    index = hnswlib.Index(space=hnsw.get("space", "l2"), dim=data.shape[1])
+    index.init_index(
+        max_elements=len(data), ef_construction=hnsw.get("ef_construction", 100), M=hnsw.get("max_neighbors", 16)
+    )
+    index.set_num_threads(hnsw.get("num_threads") or 1)
+    index.add_items(data, np.arange(len(data)))
+    build_seconds = time.perf_counter() - started
+
+    # Queries run one at a time on one thread, like a single request to the server.
+    index.set_num_threads(1)
+    k = expected.shape[1]
+    extra = 1 if exclude is not None else 0
+    results = []
+    for ef_search in ef_search_values:
+        index.set_ef(max(ef_search, k + extra))
+        found: list[list[int]] = []
+        seconds: list[float] = []
+        for position, query in enumerate(queries):
+            started = time.perf_counter()
+            labels, _ = index.knn_query(query, k=min(k + extra, len(data)))
+            seconds.append(time.perf_counter() - started)
+            rows = [int(row) for row in labels[0]]
+            if exclude is not None:
+                rows = [row for row in rows if row != exclude[position]]
+            found.append(rows)
+        results.append(_result(ef_search, _recall(found, expected), seconds))
+    return results, build_seconds
+
+
+def recommend_ef_search(candidates: list[TuningResult], target_recall: float) -> int | None:
+    """Pick the smallest candidate ef_search whose recall reaches ``target_recall``."""
+    reaching = [candidate.ef_search for candidate in candidates if candidate.recall >= target_recall]
+    return min(reaching) if reaching else None
+
+
+def live_sidecar_rows(collection: Collection, sidecar: VectorSidecar) -> tuple[list[str], np.ndarray]:
+    """IDs of the documents still in a reduced collection and their full vectors from its sidecar. This is blocking.
+
+    The mapped matrix is used as-is unless rows of deleted documents have to be left out.
+    """
+    stored_ids, matrix = sidecar.matrix()
+    live = set(collection.get(include=[])["ids"])
+    rows = [row for row, id_ in enumerate(stored_ids) if id_ in live]
+    if len(rows) == len(stored_ids):
+        return stored_ids, matrix
+    return [stored_ids[row] for row in rows], np.asarray(matrix[rows])
+
+
+def measure_reduction(
+    collection: Collection,
+    sidecar: VectorSidecar,
+    dimensions: int,
+    space: str,
+    sample_size: int,
+    k: int,
+    candidates: int,
+    seed: int,
+) -> dict[str, Any]:
+    """Measure recall@k of a reduced collection, alone and with re-ranking, against full-dimension search.
+
+    Stored documents are sampled as queries, and their exact full-dimension neighbors (leaving the
+    document itself out) are brute-forced over the sidecar. This is blocking.
+
+    Returns:
+        Sample size, recall and mean latency of both stages
+    """
+    ids, data = live_sidecar_rows(collection, sidecar)
+    rng = np.random.default_rng(seed)
+    exclude = rng.choice(len(data), size=min(sample_size, len(data)), replace=False)
+    queries = np.asarray(data[exclude], dtype=np.float32)
+    expected = exact_neighbors(data, queries, k, space, exclude)
+    rows_by_id = {id_: row for row, id_ in enumerate(ids)}
+
+    reduced_found: list[list[int]] = []
+    reranked_found: list[list[int]] = []
+    reduced_seconds: list[float] = []
+    reranked_seconds: list[float] = []
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        reduced_query = truncate(query[None, :], dimensions)
+        hits = collection.query(query_embeddings=list(reduced_query), n_results=k + 1, include=[])["ids"][0]
+        reduced_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        hits_wide = collection.query(query_embeddings=list(reduced_query), n_results=candidates, include=[])["ids"][0]
+        order, _, _ = rerank(sidecar, hits_wide, query, space, k + 1)
+        reranked_seconds.append(time.perf_counter() - started)
+
+        for found, ranked in ((reduced_found, hits), (reranked_found, [hits_wide[row] for row in order])):
+            rows = [rows_by_id.get(id_, -1) for id_ in ranked]
+            found.append([row for row in rows if row != exclude[position]])
+
+    return {
+        "sample_size": len(queries),
+        "reduced_recall": _recall(reduced_found, expected),
+        "reranked_recall": _recall(reranked_found, expected),
+        "reduced_ms": float(np.mean(reduced_seconds) * 1000),
+        "reranked_ms": float(np.mean(reranked_seconds) * 1000),
+    }
@@ -1,19 +1,45 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_mcp import add_mcp_server
+from fastapi.responses import JSONResponse
 
+from app.api.mcp import mount_mcp
 from app.api.router import api_router
 from app.core.config import get_settings
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.db.executor import run_write
+from app.db.jobs import job_manager
+from app.db.lexical import lexical_indexes
+from app.db.prewarm import prewarm, readiness
 
 dotenv.load_dotenv(override=True)
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Open the client and load indexes in the background so the liveness probe answers at once.
+    warmup = asyncio.ensure_future(prewarm(settings.PREWARM_COLLECTIONS, readiness))
+    # Start the background ingestion workers, resuming jobs interrupted by a restart.
+    job_manager.start()
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        await job_manager.stop()
+        await run_write(lexical_indexes.flush)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
+    lifespan=lifespan,
 )
 
 
@@ -26,6 +52,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -39,13 +68,25 @@ async def root():
     }
 
 
+# Prometheus metrics; kept out of the OpenAPI schema so it is not exposed as an MCP tool
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+# Kubernetes-style probes; kept out of the OpenAPI schema like /metrics
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness_probe() -> JSONResponse:
+    return JSONResponse(readiness.snapshot(), status_code=200 if readiness.ready else 503)
+
+
 # Add MCP server to the FastAPI app
-add_mcp_server(
-    app,  # Your FastAPI app
-    mount_path="/mcp",  # Where to mount the MCP server
-    name="ChromaDB FastAPI MCP",  # Name for the MCP server
-    base_url=settings.MCP_BASE_URL or f"http://{settings.APP_HOST}:{settings.APP_PORT}",  # Base URL for the MCP server
-)
+mcp_server = mount_mcp(app)
 
 if __name__ == "__main__":
     import uvicorn
@@ -54,5 +95,5 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.APP_HOST,
         port=settings.APP_PORT,
-        reload=True,
+        reload=settings.APP_RELOAD,
     )
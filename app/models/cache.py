@@ -0,0 +1,13 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class CacheStatsResponse(BaseModel):
+    """Response model for cache statistics."""
+
+    query: dict[str, Any] = Field(..., description="Statistics of the /query and /get result cache")
+    embedding: dict[str, Any] | None = Field(
+        default=None, description="Statistics of the embedding cache, or None when it is disabled"
+    )
+    query_batcher: dict[str, Any] = Field(..., description="Request, batch and de-duplication counters of /query")
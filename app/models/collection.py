@@ -3,18 +3,191 @@ from typing import Any
 from pydantic import BaseModel, Field
 
 
-class CreateCollectionRequest(BaseModel):
-    """Request model for creating a new collection."""
+class UpdateHNSWParams(BaseModel):
+    """HNSW parameters that can be changed after a collection is created. Unset (or 0) keeps the current value."""
 
-    collection_name: str = Field(..., description="Name of the collection to create")
+    ef_search: int | None = Field(
+        default=None, description="Size of the candidate list searched per query; higher is more accurate and slower"
+    )
+    num_threads: int | None = Field(default=None, description="Threads used to build and search the index")
+    batch_size: int | None = Field(default=None, description="Number of vectors buffered before they are indexed")
+    sync_threshold: int | None = Field(
+        default=None, description="Number of vectors written before the index is persisted (>= batch_size)"
+    )
+    resize_factor: float | None = Field(default=None, description="Growth factor of the index when it is full")
+
+
+class CreateHNSWParams(UpdateHNSWParams):
+    """HNSW parameters that are fixed when a collection is created. Unset (or 0) uses Chroma's default."""
+
+    space: str | None = Field(default=None, description="Distance function: 'l2' (default), 'cosine' or 'ip'")
+    ef_construction: int | None = Field(
+        default=None, description="Size of the candidate list used while building the index"
+    )
+    max_neighbors: int | None = Field(default=None, description="Maximum edges per node in the graph (HNSW 'M')")
 
 
-class ModifyCollectionRequest(BaseModel):
+class CreateCollectionRequest(CreateHNSWParams):
+    """Request model for creating a new collection."""
+
+    collection_name: str = Field(..., description="Name of the collection to create")
+    embedding_provider: str | None = Field(
+        default=None,
+        description="Embedding provider for the collection ('openai' or 'hashing'). default is EMBEDDING_PROVIDER.",
+    )
+    reduced_dimensions: int | None = Field(
+        default=None,
+        description="Index only the first N dimensions of each embedding in HNSW and keep the full vectors in a "
+        "memory-mapped float32 sidecar used to re-rank query candidates exactly. default indexes full vectors.",
+    )
+
+
+class ModifyCollectionRequest(UpdateHNSWParams):
     """Request model for modifying a collection."""
 
     new_name: str | None = Field(default=None, description="Optional new name for the collection")
 
 
+class TuneCollectionRequest(BaseModel):
+    """Request model for measuring recall against latency for candidate ef_search values."""
+
+    ef_search_values: list[int] = Field(
+        default=[10, 20, 40, 80, 160, 320], description="Candidate ef_search values to measure"
+    )
+    sample_size: int = Field(default=100, description="Number of sample queries")
+    n_results: int = Field(default=10, description="Number of neighbors whose recall is measured (recall@k)")
+    query_texts: list[str] | None = Field(
+        default=None,
+        description="Optional query texts to use as samples. default samples stored embeddings, "
+        "excluding each sample's own document from its neighbors.",
+    )
+    target_recall: float = Field(default=0.95, description="Recall the recommended ef_search must reach")
+    apply: bool = Field(default=False, description="Store the recommended ef_search in the collection's configuration")
+    max_documents: int = Field(
+        default=200_000, description="Refuse to tune collections larger than this, since all embeddings are loaded"
+    )
+    seed: int = Field(default=0, description="Seed for sampling stored embeddings")
+
+
+class TuningResult(BaseModel):
+    """Recall and latency of one ef_search value."""
+
+    ef_search: int = Field(..., description="ef_search value")
+    recall: float = Field(..., description="Mean recall@k against the exact neighbors")
+    mean_ms: float = Field(..., description="Mean latency of a single query")
+    p50_ms: float = Field(..., description="Median latency of a single query")
+    p95_ms: float = Field(..., description="95th percentile latency of a single query")
+    p99_ms: float = Field(..., description="99th percentile latency of a single query")
+
+
+class TuneCollectionResponse(BaseModel):
+    """Response model for collection tuning."""
+
+    collection_name: str = Field(..., description="Name of the collection")
+    count: int = Field(..., description="Number of documents in the collection")
+    dimensions: int = Field(..., description="Embedding dimensions")
+    hnsw: dict[str, Any] = Field(..., description="Current HNSW configuration of the collection")
+    sample_size: int = Field(..., description="Number of sample queries measured")
+    n_results: int = Field(..., description="k of the measured recall@k")
+    current: TuningResult = Field(..., description="Measured on the collection itself with its current ef_search")
+    candidates: list[TuningResult] = Field(
+        ..., description="Measured on an in-memory replica index built with the collection's HNSW parameters"
+    )
+    replica_build_seconds: float = Field(..., description="Time spent building the replica index")
+    recommended_ef_search: int | None = Field(
+        ..., description="Smallest candidate reaching target_recall, or None if none does"
+    )
+    applied: bool = Field(..., description="Whether the recommended ef_search was stored")
+
+
+class EvaluateReductionRequest(BaseModel):
+    """Request model for measuring the recall of a reduced-dimension collection."""
+
+    sample_size: int = Field(default=100, description="Number of stored documents used as sample queries")
+    n_results: int = Field(default=10, description="Number of neighbors whose recall is measured (recall@k)")
+    candidates: int | None = Field(
+        default=None, description="Candidates fetched from the reduced index and re-ranked. default is as /query"
+    )
+    max_documents: int = Field(
+        default=200_000, description="Refuse collections larger than this, since ground truth is brute-forced"
+    )
+    seed: int = Field(default=0, description="Seed for sampling stored documents")
+
+
+class ReductionReport(BaseModel):
+    """Response model for the memory use and recall of a reduced-dimension collection."""
+
+    collection_name: str = Field(..., description="Name of the collection")
+    count: int = Field(..., description="Number of documents in the collection")
+    full_dimensions: int = Field(..., description="Dimensions of the full vectors kept in the sidecar")
+    reduced_dimensions: int = Field(..., description="Dimensions indexed by HNSW")
+    index_vector_bytes: int = Field(..., description="Memory taken by vectors in the HNSW index")
+    full_index_vector_bytes: int = Field(..., description="Memory the vectors would take at full dimension")
+    memory_saved_bytes: int = Field(..., description="Index memory saved by indexing reduced vectors")
+    sidecar_bytes: int = Field(..., description="Size of the sidecar file, paged in on demand")
+    sample_size: int = Field(..., description="Number of sample queries measured")
+    n_results: int = Field(..., description="k of the measured recall@k")
+    candidates: int = Field(..., description="Candidates re-ranked per query")
+    reduced_recall: float = Field(..., description="Recall@k of the reduced index alone against full-dimension search")
+    reranked_recall: float = Field(..., description="Recall@k after exact re-ranking against full-dimension search")
+    reduced_ms: float = Field(..., description="Mean latency of a reduced index query")
+    reranked_ms: float = Field(..., description="Mean latency of a query with re-ranking")
+
+
+class FindDuplicatesRequest(BaseModel):
+    """Request model for finding near-duplicate documents in a collection."""
+
+    threshold: float = Field(
+        default=0.95, description="Cosine similarity (0 to 1] from which two documents are duplicates"
+    )
+    action: str | None = Field(
+        default=None,
+        description="What to do with the duplicates: 'none' (default, report only), 'tag' (set 'duplicate_of' in their "
+        "metadata to the ID of the document kept) or 'delete'. The first document of each cluster is kept",
+    )
+    where: dict[str, Any] | None = Field(default=None, description="Only compare documents matching this filter")
+    where_document: dict[str, Any] | None = Field(
+        default=None, description="Only compare documents whose content matches this filter"
+    )
+    max_pairs: int = Field(
+        default=1_000_000, description="Stop the search after finding this many duplicate pairs, bounding memory"
+    )
+    max_clusters: int = Field(
+        default=100, description="Number of clusters listed in the response; the action applies to all of them"
+    )
+
+
+class DuplicateCluster(BaseModel):
+    """A group of documents linked by pairs of near-duplicates."""
+
+    kept: str = Field(..., description="ID of the document kept, the first of the cluster in collection order")
+    duplicates: list[str] = Field(..., description="IDs of the other documents of the cluster")
+    min_similarity: float = Field(..., description="Lowest similarity among the pairs linking the cluster")
+
+
+class DuplicatesReport(BaseModel):
+    """Response model for the near-duplicate clusters of a collection."""
+
+    collection_name: str = Field(..., description="Name of the collection")
+    count: int = Field(..., description="Number of documents compared")
+    threshold: float = Field(..., description="Cosine similarity from which documents are duplicates")
+    pairs_found: int = Field(..., description="Number of duplicate pairs found")
+    truncated: bool = Field(..., description="Whether the search stopped at max_pairs, possibly missing pairs")
+    cluster_count: int = Field(..., description="Number of clusters of duplicates")
+    duplicate_count: int = Field(..., description="Number of documents duplicating a kept document")
+    clusters: list[DuplicateCluster] = Field(..., description="Largest clusters first, up to max_clusters")
+    action: str = Field(..., description="Action applied to the duplicates")
+    affected: int = Field(..., description="Number of documents tagged or deleted")
+    errors: list[str] = Field(default_factory=list, description="Errors of tag or delete chunks that failed")
+    comparisons: int = Field(..., description="Number of document pairs compared, fewer than all pairs when truncated")
+    block_size: int = Field(..., description="Rows per block of the similarity join")
+    workers: int = Field(..., description="Threads that computed the join")
+    load_seconds: float = Field(..., description="Time spent streaming embeddings out of the collection")
+    join_seconds: float = Field(..., description="Time spent comparing embeddings and clustering pairs")
+    docs_per_second: float = Field(..., description="Documents loaded and compared per second")
+    comparisons_per_second: float = Field(..., description="Pairs compared per second of the join")
+
+
 class CollectionListResponse(BaseModel):
     """Response model for listing collections."""
 
@@ -26,6 +199,10 @@ class CollectionInfoResponse(BaseModel):
 
     name: str = Field(..., description="Name of the collection")
     count: int = Field(..., description="Number of documents in the collection")
+    embedding_provider: str = Field(..., description="Embedding provider the collection was created with")
+    reduced_dimensions: int | None = Field(
+        default=None, description="Dimensions indexed in HNSW for a reduced collection, None for full vectors"
+    )
     sample_documents: dict[str, Any] = Field(..., description="Sample documents from the collection")
 
 
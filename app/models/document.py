@@ -11,6 +11,14 @@ class AddDocumentsRequest(BaseModel):
     metadatas: list[dict[str, Any]] | None = Field(
         default=None, description="Optional list of metadata dictionaries for each document"
     )
+    ids: list[str] | None = Field(
+        default=None, description="Optional IDs for each document, e.g. a stable key from the source system"
+    )
+    deduplicate: bool = Field(
+        default=False,
+        description="Derive IDs from the content of documents without an ID, skip documents stored with identical "
+        "content and metadata before embedding them, and upsert the rest",
+    )
 
 
 class QueryDocumentsRequest(BaseModel):
@@ -34,6 +42,39 @@ class QueryDocumentsRequest(BaseModel):
     )
 
 
+class HybridQueryRequest(QueryDocumentsRequest):
+    """Request model for fused lexical (BM25) and vector search in a collection."""
+
+    vector_weight: float = Field(
+        default=1.0, description="Weight of the vector ranking in the fusion; 0 disables it unless both weights are 0"
+    )
+    lexical_weight: float = Field(
+        default=1.0, description="Weight of the BM25 ranking in the fusion; 0 disables it unless both weights are 0"
+    )
+    rrf_k: int = Field(default=60, description="Reciprocal rank fusion constant; larger values flatten the ranks")
+    candidates: int = Field(
+        default=0, description="Candidates taken from each ranking (0 picks max(4 * n_results, 50))"
+    )
+
+
+class FanoutQueryRequest(BaseModel):
+    """Request model for querying several collections at once."""
+
+    collection_names: list[str] = Field(..., description="Names of the collections to query")
+    query_texts: list[str] = Field(..., description="List of query texts to search for")
+    n_results: int = Field(default=5, description="Number of merged results to return per query")
+    where: dict[str, Any] | None = Field(
+        default=None, description="Optional metadata filters applied to every collection. default is empty dict."
+    )
+    where_document: dict[str, Any] | None = Field(
+        default=None,
+        description="Optional document content filters applied to every collection. default is empty dict.",
+    )
+    include: list[str] = Field(
+        default=["documents", "metadatas", "distances"], description="List of what to include in response"
+    )
+
+
 class GetDocumentsRequest(BaseModel):
     """Request model for getting documents from a collection."""
 
@@ -52,6 +93,35 @@ class GetDocumentsRequest(BaseModel):
     include: list[str] = Field(default=["documents", "metadatas"], description="List of what to include in response")
     limit: int | None = Field(default=10, description="Optional maximum number of documents to return")
     offset: int | None = Field(default=0, description="Optional number of documents to skip before returning results")
+    cursor: str | None = Field(
+        default=None,
+        description="Optional cursor from a previous response's next_cursor; continues the scan after that page. "
+        "Must be used with the same filters and takes precedence over offset.",
+    )
+
+
+class UpdateDocumentsRequest(BaseModel):
+    """Request model for updating existing documents in a collection."""
+
+    collection_name: str = Field(..., description="Name of the collection to update documents in")
+    ids: list[str] = Field(..., description="IDs of the documents to update")
+    documents: list[str] | None = Field(
+        default=None, description="Optional new text for each document; embedded unless embeddings are given"
+    )
+    metadatas: list[dict[str, Any]] | None = Field(
+        default=None, description="Optional new metadata dictionary for each document"
+    )
+    embeddings: list[list[float]] | None = Field(
+        default=None,
+        description="Optional precomputed embedding for each document, written as-is without an embedding call",
+    )
+
+
+class UpsertDocumentsRequest(UpdateDocumentsRequest):
+    """Request model for inserting or replacing documents in a collection."""
+
+    collection_name: str = Field(..., description="Name of the collection to upsert documents into")
+    ids: list[str] = Field(..., description="IDs of the documents to insert or replace")
 
 
 class DeleteDocumentsRequest(BaseModel):
@@ -61,16 +131,84 @@ class DeleteDocumentsRequest(BaseModel):
     ids: list[str] = Field(..., description="List of document IDs to delete")
 
 
+class ChunkResult(BaseModel):
+    """Outcome of writing one chunk of an ingestion request."""
+
+    index: int = Field(..., description="Position of the chunk in the request")
+    start: int = Field(..., description="Offset of the chunk's first document in the request")
+    count: int = Field(..., description="Number of documents in the chunk")
+    ok: bool = Field(..., description="Whether the chunk was written")
+    error: str | None = Field(default=None, description="Error message if the chunk failed")
+
+
+class AddDocumentsResponse(BaseModel):
+    """Response model for adding documents to a collection."""
+
+    message: str = Field(..., description="Summary message")
+    added: int = Field(..., description="Number of documents written")
+    failed: int = Field(..., description="Number of documents in chunks that failed")
+    skipped: int = Field(default=0, description="Number of documents skipped because their content is unchanged")
+    chunks: list[ChunkResult] = Field(..., description="Per-chunk results")
+
+
+class WriteDocumentsResponse(BaseModel):
+    """Response model for updating or upserting documents."""
+
+    message: str = Field(..., description="Summary message")
+    written: int = Field(..., description="Number of documents written")
+    failed: int = Field(..., description="Number of documents in chunks that failed")
+    chunks: list[ChunkResult] = Field(..., description="Per-chunk results")
+
+
+class ImportDocumentsResponse(BaseModel):
+    """Response model for a bulk import."""
+
+    message: str = Field(..., description="Summary message")
+    received: int = Field(..., description="Number of records read from the input")
+    added: int = Field(..., description="Number of documents written")
+    failed: int = Field(..., description="Number of valid documents in chunks that failed to write")
+    invalid: int = Field(..., description="Number of records rejected during parsing or validation")
+    skipped: int = Field(default=0, description="Number of records skipped because their content is unchanged")
+    chunks: int = Field(..., description="Number of chunks written or attempted")
+    failed_chunks: list[ChunkResult] = Field(..., description="Results of the chunks that failed")
+    errors: list[str] = Field(..., description="First record-level validation errors")
+    elapsed_seconds: float = Field(..., description="Wall-clock duration of the import")
+    docs_per_second: float = Field(..., description="Throughput of written documents")
+
+
 class QueryResponse(BaseModel):
     """Response model for query results."""
 
     data: dict[str, Any] = Field(..., description="Query results")
 
 
+class CollectionTiming(BaseModel):
+    """Outcome of querying one collection in a fan-out query."""
+
+    collection_name: str = Field(..., description="Name of the collection")
+    ok: bool = Field(..., description="Whether the collection was queried")
+    seconds: float = Field(..., description="Time spent querying the collection")
+    results: int = Field(default=0, description="Number of candidates the collection returned")
+    error: str | None = Field(default=None, description="Error message if the query failed")
+
+
+class FanoutQueryResponse(BaseModel):
+    """Response model for fan-out query results."""
+
+    data: dict[str, Any] = Field(
+        ..., description="Merged query results; the 'collections' field names the source of each hit"
+    )
+    timings: list[CollectionTiming] = Field(..., description="Per-collection timings and errors")
+    embedding_seconds: float = Field(..., description="Time spent embedding the query texts")
+
+
 class GetDocumentsResponse(BaseModel):
     """Response model for get documents results."""
 
     data: dict[str, Any] = Field(..., description="Get documents results")
+    next_cursor: str | None = Field(
+        default=None, description="Cursor for the next page, or None when there are no more documents"
+    )
 
 
 class SuccessResponse(BaseModel):
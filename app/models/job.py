@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class JobResponse(BaseModel):
+    """Response model for the status of a background ingestion job."""
+
+    job_id: str = Field(..., description="ID of the job, used to poll its status")
+    kind: Literal["add", "upsert", "update"] = Field(..., description="Write operation of the job")
+    collection_name: str = Field(..., description="Name of the collection the job writes to")
+    status: Literal["queued", "running", "completed", "failed", "cancelled"] = Field(
+        ..., description="Current state of the job"
+    )
+    total: int = Field(..., description="Number of documents in the job")
+    done: int = Field(..., description="Number of documents written so far")
+    failed: int = Field(..., description="Number of documents in chunks that failed")
+    skipped: int = Field(..., description="Number of documents skipped because their content is unchanged")
+    errors: list[str] = Field(..., description="First errors of failed chunks")
+    error: str | None = Field(default=None, description="Error that stopped the job, if any")
+    cancel_requested: bool = Field(..., description="Whether the job was asked to stop after its current chunk")
+    created_at: datetime = Field(..., description="When the job was enqueued")
+    started_at: datetime | None = Field(default=None, description="When a worker first started the job")
+    finished_at: datetime | None = Field(default=None, description="When the job completed, failed or was cancelled")
+    elapsed_seconds: float = Field(..., description="Time spent since the job started, until it finished")
+    docs_per_second: float = Field(..., description="Throughput of written documents")
+
+
+class JobListResponse(BaseModel):
+    """Response model for listing background ingestion jobs."""
+
+    jobs: list[JobResponse] = Field(..., description="Jobs, most recently created first")
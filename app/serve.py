@@ -0,0 +1,122 @@
+"""Production entry point running the API in several worker processes over one data directory.
+
+A ``PersistentClient`` must not be opened by more than one process, so with ``APP_WORKERS`` > 1
+and a persistent client this starts a local Chroma server as the single owner of
+``CHROMA_DATA_DIR`` and points every worker at it with the http client. Reads then scale with the
+number of workers and the server's own threads, and all writes go through one process.
+Cache invalidations are shared between workers through a memory-mapped file
+(``SHARED_STATE_FILE``), so a write handled by one worker is never hidden by another worker's
+cached results.
+
+Usage:
+    APP_WORKERS=4 CHROMA_CLIENT_TYPE=persistent CHROMA_DATA_DIR=./chroma uv run python -m app.serve
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+
+import dotenv
+import httpx
+import uvicorn
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHROMA_SERVER_START_TIMEOUT_SECONDS = 60.0
+
+# Runs the `chroma` console script of the current interpreter, which may not be on PATH.
+CHROMA_CLI = "import sys; from chromadb.cli.cli import app; sys.argv[0] = 'chroma'; app()"
+
+
+@contextmanager
+def chroma_server(data_dir: str, host: str, port: int) -> Iterator[None]:
+    """Run a Chroma server owning ``data_dir`` until the block exits.
+
+    Raises:
+        RuntimeError: If the server exits or does not answer its heartbeat in time
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-c", CHROMA_CLI, "run", "--path", data_dir, "--host", host, "--port", str(port)]
+    )
+    try:
+        deadline = time.monotonic() + CHROMA_SERVER_START_TIMEOUT_SECONDS
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Chroma server exited with status {process.returncode}")
+            try:
+                if httpx.get(f"http://{host}:{port}/api/v2/heartbeat", timeout=1.0).is_success:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Chroma server did not start on {host}:{port}")
+            time.sleep(0.2)
+        logger.info("Chroma server for %s listening on %s:%s", data_dir, host, port)
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextmanager
+def shared_state_file() -> Iterator[str]:
+    """Create the file worker processes map to share cache invalidations, removing it afterwards."""
+    fd, path = tempfile.mkstemp(prefix="chromadb-fastapi-", suffix=".state")
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def serve() -> None:
+    """Run the API with ``APP_WORKERS`` processes, starting a Chroma server when they share a data directory.
+
+    Raises:
+        ValueError: If several workers are requested with an ephemeral client, which cannot be shared
+    """
+    dotenv.load_dotenv()
+    settings = get_settings()
+    workers = max(1, settings.APP_WORKERS)
+    run = partial(uvicorn.run, "app.main:app", host=settings.APP_HOST, port=settings.APP_PORT, workers=workers)
+
+    if workers == 1:
+        run()
+        return
+    if settings.CHROMA_CLIENT_TYPE == "ephemeral":
+        raise ValueError("APP_WORKERS > 1 needs a persistent or http client; ephemeral data is not shared")
+
+    with shared_state_file() as state_path:
+        # Workers read their settings from the environment, which takes precedence over .env.
+        os.environ["SHARED_STATE_FILE"] = state_path
+        if settings.CHROMA_CLIENT_TYPE != "persistent":
+            run()
+            return
+        if not settings.CHROMA_DATA_DIR:
+            raise ValueError("CHROMA_DATA_DIR must be set when using persistent client")
+
+        with chroma_server(settings.CHROMA_DATA_DIR, settings.CHROMA_HOST, settings.CHROMA_PORT):
+            os.environ.update(
+                {
+                    "CHROMA_CLIENT_TYPE": "http",
+                    "CHROMA_HOST": settings.CHROMA_HOST,
+                    "CHROMA_PORT": str(settings.CHROMA_PORT),
+                }
+            )
+            run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    serve()
@@ -0,0 +1,107 @@
+"""Measure embeddings per second of an embedding provider.
+
+The local ``hashing`` provider is measured for every combination of ``--batch-sizes`` and
+``--threads``, both through ``embed`` (the vectorizer alone) and through ``__call__``, which adds
+Chroma's per-value validation of the returned embeddings. The ``openai`` provider calls the API with the configured key, so it needs network
+access and is billed; its batch size and threads are not configurable and only one row is reported.
+
+Usage:
+    uv run python -m benchmarks.embedding_throughput [--provider hashing] [--texts 20000] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+WORDS = (
+    "vector search index embedding query collection document metadata cosine distance neighbor graph "
+    "batch thread token chunk cache latency throughput recall shard replica segment filter"
+).split()
+
+
+def _corpus(texts: int, words_per_text: int) -> list[str]:
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(WORDS), size=(texts, words_per_text))
+    return [" ".join(WORDS[i] for i in row) + f" doc{n}" for n, row in enumerate(picks)]
+
+
+def _measure(embed, corpus: list[str], repeats: int) -> dict:
+    embed(corpus[: min(len(corpus), 100)])
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        embed(corpus)
+        seconds.append(time.perf_counter() - started)
+    best = min(seconds)
+    return {"best_seconds": best, "embeddings_per_second": len(corpus) / best}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=("hashing", "openai"), default="hashing", help="Provider to measure")
+    parser.add_argument("--texts", type=int, default=20_000, help="Number of texts per measured call")
+    parser.add_argument("--words", type=int, default=40, help="Words per text")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, 256, 1024], help="Hashing batch sizes")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="Hashing thread counts")
+    parser.add_argument("--dimensions", type=int, default=384, help="Hashing vector size")
+    parser.add_argument("--repeats", type=int, default=3, help="Measured calls per configuration; the best is kept")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    for name, value in {
+        "APP_HOST": "127.0.0.1",
+        "APP_PORT": "8000",
+        "MCP_BASE_URL": "",
+        "CHROMA_CLIENT_TYPE": "ephemeral",
+        "CHROMA_DATA_DIR": "",
+        "OPENAI_API_KEY": "unused",
+    }.items():
+        os.environ.setdefault(name, value)
+
+    from app.db.embedding import HashingEmbeddingFunction, get_embedding_function
+
+    corpus = _corpus(args.texts, args.words)
+    results = []
+    if args.provider == "hashing":
+        for batch_size in args.batch_sizes:
+            for threads in args.threads:
+                embedding_function = HashingEmbeddingFunction(
+                    dimensions=args.dimensions, batch_size=batch_size, threads=threads
+                )
+                # ``embed`` is the vectorizer alone; ``__call__`` adds Chroma's per-value embedding validation.
+                for entry_point, embed in (("embed", embedding_function.embed), ("__call__", embedding_function)):
+                    results.append(
+                        {
+                            "batch_size": batch_size,
+                            "threads": threads,
+                            "entry_point": entry_point,
+                            **_measure(embed, corpus, args.repeats),
+                        }
+                    )
+    else:
+        results.append(
+            {
+                "batch_size": None,
+                "threads": None,
+                "entry_point": "__call__",
+                **_measure(get_embedding_function("openai"), corpus, args.repeats),
+            }
+        )
+
+    print(f"{'provider':<10}{'entry':<10}{'batch':>8}{'threads':>9}{'seconds':>10}{'emb/s':>12}")
+    for row in results:
+        print(
+            f"{args.provider:<10}{row['entry_point']:<10}{str(row['batch_size'] or '-'):>8}"
+            f"{str(row['threads'] or '-'):>9}{row['best_seconds']:>10.3f}{row['embeddings_per_second']:>12.0f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"provider": args.provider, "texts": args.texts, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Compare MCP tool-call latency for in-process and loopback dispatch.
+
+Each mode runs in its own subprocess because the dispatch mode is fixed when the app is
+imported. Loopback mode serves the app with uvicorn on a local port inside the same process,
+which is how a single-process deployment sends tool calls back to itself.
+
+Usage:
+    uv run python -m benchmarks.mcp_dispatch [--calls 500] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+MODES = ("in_process", "loopback")
+COLLECTION_NAME = "mcp-dispatch-bench"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q))
+
+
+def _tool_name(mcp_server, prefix: str) -> str:
+    return next(name for name in mcp_server._tool_manager._tools if name.startswith(prefix))
+
+
+def _check(tool: str, result) -> None:
+    """Fail on error responses, which fastapi_mcp returns as the tool's result instead of raising."""
+    for content in result:
+        try:
+            payload = json.loads(getattr(content, "text", ""))
+        except ValueError:
+            continue
+        if isinstance(payload, dict) and "detail" in payload:
+            raise RuntimeError(f"Tool '{tool}' failed: {payload['detail']}")
+
+
+async def _measure(mcp_server, tool: str, arguments: dict, calls: int) -> dict:
+    for _ in range(min(20, calls)):
+        _check(tool, await mcp_server.call_tool(tool, arguments))
+
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        result = await mcp_server.call_tool(tool, arguments)
+        samples.append((time.perf_counter() - started) * 1000)
+        _check(tool, result)
+
+    return {
+        "calls": calls,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": _percentile(samples, 50),
+        "p95_ms": _percentile(samples, 95),
+        "p99_ms": _percentile(samples, 99),
+    }
+
+
+def run_mode(mode: str, calls: int) -> dict:
+    """Benchmark one dispatch mode in the current process."""
+    port = _free_port()
+    os.environ.update(
+        {
+            "MCP_DISPATCH": mode,
+            "MCP_BASE_URL": f"http://127.0.0.1:{port}",
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": str(port),
+            "CHROMA_CLIENT_TYPE": "ephemeral",
+            "ANONYMIZED_TELEMETRY": "False",
+        }
+    )
+    os.environ.setdefault("CHROMA_DATA_DIR", "")
+    os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+    import uvicorn
+
+    from app.db.client import collection_registry, get_chroma_client
+    from app.db.embedding import PROVIDER_METADATA_KEY, get_embedding_function
+    from app.main import app, mcp_server
+
+    # Record the provider like POST /api/collections/ does, so the app reopens the collection with it.
+    embedding_function = get_embedding_function("hashing")
+    collection = get_chroma_client().create_collection(
+        COLLECTION_NAME, metadata={PROVIDER_METADATA_KEY: "hashing"}, embedding_function=embedding_function
+    )
+    collection_registry.register(collection, embedding_function)
+    documents = [f"document {i}" for i in range(1000)]
+    collection.add(
+        ids=[str(i) for i in range(1000)],
+        embeddings=embedding_function(documents),
+        documents=documents,
+    )
+
+    server = None
+    if mode == "loopback":
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+    async def main() -> dict:
+        count_tool = _tool_name(mcp_server, "get_collection_count")
+        get_tool = _tool_name(mcp_server, "get_documents")
+        return {
+            "get_collection_count": await _measure(mcp_server, count_tool, {"collection_name": COLLECTION_NAME}, calls),
+            "get_documents": await _measure(
+                mcp_server,
+                get_tool,
+                {
+                    "collection_name": COLLECTION_NAME,
+                    # fastapi_mcp marks optional fields as required, so send their empty forms.
+                    "ids": [],
+                    "where": {},
+                    "where_document": {},
+                    "cursor": "",
+                    "limit": 10,
+                },
+                calls,
+            ),
+        }
+
+    try:
+        return asyncio.run(main())
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="Measured tool calls per tool and mode")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.calls)))
+        return
+
+    results = {}
+    for mode in MODES:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.mcp_dispatch", "--mode", mode, "--calls", str(args.calls)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print(f"{'tool':<24}{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for tool in results[MODES[0]]:
+        for mode in MODES:
+            row = results[mode][tool]
+            print(
+                f"{tool:<24}{mode:<12}{row['mean_ms']:>10.2f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Measure the throughput of near-duplicate detection on large collections.
+
+A collection of random unit vectors is seeded directly through Chroma in an ephemeral client,
+with a share of near-copies (small perturbations of earlier vectors) planted in it. The
+similarity self-join behind ``POST /api/collections/{name}/duplicates`` is then run for every
+combination of ``--block-sizes`` and ``--workers``. Load time (streaming embeddings out of
+Chroma), join time, documents and pairs compared per second, and the share of planted pairs
+found are reported.
+
+Usage:
+    uv run python -m benchmarks.similarity_join [--size 100000] [--dimensions 384] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+COLLECTION_NAME = "similarity-join-bench"
+SEED_BATCH_SIZE = 5000
+
+
+def _seed(size: int, dimensions: int, duplicate_share: float, noise: float) -> set[tuple[str, str]]:
+    from app.db.client import get_chroma_client
+
+    client = get_chroma_client()
+    collection = client.create_collection(COLLECTION_NAME, embedding_function=None)
+    rng = np.random.default_rng(size)
+    vectors = rng.standard_normal((size, dimensions)).astype(np.float32)
+    # Copies come from the second half and originals from the first, so no copy is copied again.
+    copies = rng.choice(np.arange(size // 2, size), size=int(size * duplicate_share), replace=False)
+    originals = rng.integers(0, size // 2, size=len(copies))
+    vectors[copies] = vectors[originals] + noise * rng.standard_normal((len(copies), dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    batch_size = min(SEED_BATCH_SIZE, client.get_max_batch_size())
+    for start in range(0, size, batch_size):
+        end = min(size, start + batch_size)
+        collection.add(ids=[f"doc-{i:09d}" for i in range(start, end)], embeddings=vectors[start:end])
+    return {(f"doc-{a:09d}", f"doc-{b:09d}") for a, b in zip(originals.tolist(), copies.tolist(), strict=True)}
+
+
+def _planted_recall(clusters: list[tuple[list[str], float]], planted: set[tuple[str, str]]) -> float:
+    cluster_of = {id_: position for position, (ids, _) in enumerate(clusters) for id_ in ids}
+    found = sum(1 for a, b in planted if a in cluster_of and cluster_of.get(a) == cluster_of.get(b))
+    return found / len(planted) if planted else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000, help="Documents in the collection")
+    parser.add_argument("--dimensions", type=int, default=384, help="Embedding dimensions")
+    parser.add_argument("--duplicate-share", type=float, default=0.02, help="Share of documents planted as copies")
+    parser.add_argument("--noise", type=float, default=0.01, help="Scale of the perturbation of planted copies")
+    parser.add_argument("--threshold", type=float, default=0.95, help="Cosine similarity of duplicates")
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=[1024, 2048, 4096], help="Rows per join block")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1], help="Join threads")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    for name, value in {
+        "APP_HOST": "127.0.0.1",
+        "APP_PORT": "8000",
+        "MCP_BASE_URL": "",
+        "CHROMA_CLIENT_TYPE": "ephemeral",
+        "CHROMA_DATA_DIR": "",
+        "OPENAI_API_KEY": "unused",
+    }.items():
+        os.environ.setdefault(name, value)
+
+    from app.core.config import get_settings
+    from app.db.client import get_chroma_client
+    from app.db.duplicates import find_duplicates
+
+    planted = _seed(args.size, args.dimensions, args.duplicate_share, args.noise)
+    collection = get_chroma_client().get_collection(COLLECTION_NAME, embedding_function=None)
+    settings = get_settings()
+
+    results = []
+    for block_size in args.block_sizes:
+        for workers in sorted(set(args.workers)):
+            settings.SIMILARITY_JOIN_BLOCK_SIZE, settings.SIMILARITY_JOIN_WORKERS = block_size, workers
+            found = find_duplicates(collection, args.threshold, max_pairs=10 * len(planted) + 1000)
+            seconds = found["load_seconds"] + found["join_seconds"]
+            results.append(
+                {
+                    "block_size": block_size,
+                    "workers": workers,
+                    "load_seconds": found["load_seconds"],
+                    "join_seconds": found["join_seconds"],
+                    "docs_per_second": found["count"] / seconds,
+                    "comparisons_per_second": found["comparisons"] / found["join_seconds"],
+                    "pairs_found": found["pairs_found"],
+                    "planted_recall": _planted_recall(found["clusters"], planted),
+                }
+            )
+
+    print(f"{'block':>7}{'workers':>9}{'load s':>9}{'join s':>9}{'docs/s':>11}{'pairs/s':>12}{'recall':>8}")
+    for row in results:
+        print(
+            f"{row['block_size']:>7}{row['workers']:>9}{row['load_seconds']:>9.2f}{row['join_seconds']:>9.2f}"
+            f"{row['docs_per_second']:>11.0f}{row['comparisons_per_second']:>12.3g}{row['planted_recall']:>8.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"size": args.size, "dimensions": args.dimensions, "threshold": args.threshold, "results": results},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Load-test the API in-process and compare runs for regressions.
+
+The app runs in this process with an ephemeral Chroma client and the deterministic ``hashing``
+embedding provider, so runs need no network and are reproducible. For every collection size, a
+collection is seeded directly through Chroma. Then ``/count``, ``/get``, ``/peek``, ``/query``, the
+MCP ``query_documents`` tool and ``/add`` are driven through an in-process HTTP client at each
+concurrency level. Throughput and latency percentiles are reported per operation, size and
+concurrency.
+
+The query result cache is disabled unless ``--with-cache`` is given, so repeated queries measure
+real work. ``--compare`` checks the run against an earlier JSON result and exits with status 1
+when p95 latency or throughput regressed by more than ``--threshold``.
+
+Usage:
+    uv run python -m benchmarks.suite [--sizes 10000 100000 1000000] [--concurrency 1 8 32]
+        [--requests 200] [--output results.json] [--compare baseline.json --threshold 0.15]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+
+import numpy as np
+
+OPERATIONS = ("count", "get", "peek", "query", "mcp_query", "add")
+WORDS = (
+    "vector search index embedding query collection document metadata cosine distance neighbor graph "
+    "batch thread token chunk cache latency throughput recall shard replica segment filter"
+).split()
+SEED_BATCH_SIZE = 5000
+
+
+def _configure_environment(with_cache: bool) -> None:
+    os.environ.update(
+        {
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": "8000",
+            "MCP_BASE_URL": "",
+            "MCP_DISPATCH": "in_process",
+            "CHROMA_CLIENT_TYPE": "ephemeral",
+            "CHROMA_DATA_DIR": "",
+            "EMBEDDING_PROVIDER": "hashing",
+            "QUERY_CACHE_ENABLED": "true" if with_cache else "false",
+            "ANONYMIZED_TELEMETRY": "False",
+        }
+    )
+    os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+
+def _text(rng: np.random.Generator, words: int) -> str:
+    return " ".join(WORDS[i] for i in rng.integers(0, len(WORDS), size=words))
+
+
+def _seed(collection_name: str, size: int) -> None:
+    from app.db.client import collection_registry, get_chroma_client
+    from app.db.embedding import PROVIDER_METADATA_KEY, get_embedding_function
+
+    embedding_function = get_embedding_function("hashing")
+    collection = get_chroma_client().create_collection(
+        collection_name, metadata={PROVIDER_METADATA_KEY: "hashing"}, embedding_function=embedding_function
+    )
+    collection_registry.register(collection, embedding_function)
+    rng = np.random.default_rng(size)
+    batch_size = min(SEED_BATCH_SIZE, get_chroma_client().get_max_batch_size())
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        documents = [f"{_text(rng, 12)} doc{start + i}" for i in range(count)]
+        collection.add(
+            ids=[f"doc-{start + i}" for i in range(count)],
+            documents=documents,
+            embeddings=embedding_function.embedding_function.embed(documents),
+            metadatas=[{"group": (start + i) % 10} for i in range(count)],
+        )
+
+
+def _summary(samples: list[float], errors: int, elapsed: float) -> dict:
+    latencies = np.asarray(samples) * 1000 if samples else np.zeros(1)
+    return {
+        "requests": len(samples) + errors,
+        "errors": errors,
+        "throughput_rps": len(samples) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+async def _drive(make_call, requests: int, concurrency: int) -> dict:
+    """Run ``requests`` calls with ``concurrency`` workers; ``make_call(i)`` returns an awaitable per call."""
+    samples: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await make_call(index)
+            except Exception:
+                errors += 1
+                continue
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(samples, errors, time.perf_counter() - started)
+
+
+def _checked(response) -> None:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.status_code}: {response.text[:200]}")
+
+
+async def _run_size(size: int, concurrency_levels: list[int], requests: int, add_batch: int) -> list[dict]:
+    import httpx
+
+    from app.main import app, mcp_server
+
+    # The in-process client logs every request at INFO, which would swamp the results.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    collection_name = f"bench-{size}"
+    started = time.perf_counter()
+    _seed(collection_name, size)
+    print(f"seeded {size} documents in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    mcp_tool = next(name for name in mcp_server._tool_manager._tools if name.startswith("query_documents"))
+    rng = np.random.default_rng(0)
+    results = []
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+    ) as client:
+
+        async def count(_: int) -> None:
+            _checked(await client.get(f"/api/collections/{collection_name}/count"))
+
+        async def get(_: int) -> None:
+            offset = int(rng.integers(0, max(1, size - 100)))
+            body = {"collection_name": collection_name, "limit": 100, "offset": offset}
+            _checked(await client.post("/api/documents/get", json=body))
+
+        async def peek(_: int) -> None:
+            _checked(await client.get(f"/api/collections/{collection_name}/peek", params={"limit": 10}))
+
+        async def query(_: int) -> None:
+            body = {"collection_name": collection_name, "query_texts": [_text(rng, 6)], "n_results": 10}
+            _checked(await client.post("/api/documents/query", json=body))
+
+        async def mcp_query(_: int) -> None:
+            arguments = {
+                "collection_name": collection_name,
+                "query_texts": [_text(rng, 6)],
+                "n_results": 10,
+                # fastapi_mcp marks optional fields as required, so send their empty forms.
+                "where": {},
+                "where_document": {},
+                "include": ["documents", "metadatas", "distances"],
+            }
+            await mcp_server.call_tool(mcp_tool, arguments)
+
+        async def add(index: int) -> None:
+            body = {
+                "collection_name": collection_name,
+                "documents": [_text(rng, 12) for _ in range(add_batch)],
+                "metadatas": [{"group": index % 10} for _ in range(add_batch)],
+            }
+            _checked(await client.post("/api/documents/add", json=body))
+
+        calls = {"count": count, "get": get, "peek": peek, "query": query, "mcp_query": mcp_query, "add": add}
+        for operation in OPERATIONS:
+            for concurrency in concurrency_levels:
+                await _drive(calls[operation], min(requests, 20), concurrency)
+                summary = await _drive(calls[operation], requests, concurrency)
+                row = {"operation": operation, "size": size, "concurrency": concurrency, **summary}
+                results.append(row)
+                print(
+                    f"{operation:<10}{size:>9}{concurrency:>6}{row['throughput_rps']:>10.1f}"
+                    f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['errors']:>7}",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def _metadata(args: argparse.Namespace) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "sizes": args.sizes,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "add_batch": args.add_batch,
+        "with_cache": args.with_cache,
+    }
+
+
+def compare(current: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Return a description of every operation whose p95 latency or throughput regressed beyond ``threshold``."""
+    previous = {(row["operation"], row["size"], row["concurrency"]): row for row in baseline}
+    regressions = []
+    for row in current:
+        before = previous.get((row["operation"], row["size"], row["concurrency"]))
+        if before is None:
+            continue
+        label = f"{row['operation']} size={row['size']} concurrency={row['concurrency']}"
+        if row["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{label}: p95 {before['p95_ms']:.2f}ms -> {row['p95_ms']:.2f}ms")
+        if row["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{label}: throughput {before['throughput_rps']:.1f} -> {row['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Collection sizes to seed")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per operation and level")
+    parser.add_argument("--add-batch", type=int, default=100, help="Documents per /add request")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the query result cache enabled")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression (default 0.15)")
+    args = parser.parse_args()
+
+    _configure_environment(args.with_cache)
+    print(f"{'operation':<10}{'size':>9}{'conc':>6}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>7}")
+
+    results = []
+    for size in args.sizes:
+        results.extend(asyncio.run(_run_size(size, args.concurrency, args.requests, args.add_batch)))
+
+    report = {"meta": _metadata(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
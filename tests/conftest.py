@@ -0,0 +1,37 @@
+import os
+import uuid
+from collections.abc import Iterator
+
+import pytest
+
+# Settings are read once on import, so the test environment must be in place before the app is imported.
+os.environ.update(CHROMA_CLIENT_TYPE="ephemeral", CHROMA_DATA_DIR="", EMBEDDING_PROVIDER="hashing")
+for name, value in {
+    "APP_HOST": "127.0.0.1",
+    "APP_PORT": "8000",
+    "MCP_BASE_URL": "",
+    "OPENAI_API_KEY": "unused",
+    "EMBEDDING_DIMENSIONS": "64",
+    "ANONYMIZED_TELEMETRY": "False",
+}.items():
+    os.environ.setdefault(name, value)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def collection_name(client: TestClient) -> Iterator[str]:
+    """Name of a fresh collection using the hashing provider, deleted after the test."""
+    name = f"test-{uuid.uuid4().hex[:12]}"
+    response = client.post("/api/collections/", json={"collection_name": name})
+    assert response.status_code == 200, response.text
+    yield name
+    client.delete(f"/api/collections/{name}")
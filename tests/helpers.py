@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+
+def add_documents(client: TestClient, collection_name: str, ids: list[str], documents: list[str] | None = None) -> None:
+    response = client.post(
+        "/api/documents/add",
+        json={
+            "collection_name": collection_name,
+            "ids": ids,
+            "documents": documents or [f"text of {id_}" for id_ in ids],
+        },
+    )
+    assert response.status_code == 200, response.text
+
+
+def delete_documents(client: TestClient, collection_name: str, ids: list[str]) -> None:
+    response = client.request("DELETE", "/api/documents/delete", json={"collection_name": collection_name, "ids": ids})
+    assert response.status_code == 200, response.text
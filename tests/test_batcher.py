@@ -0,0 +1,81 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from helpers import add_documents
+
+from app.db.batcher import QueryBatcher
+
+DOCUMENTS = ["alpha beta", "beta gamma", "gamma delta", "delta alpha", "epsilon", "zeta alpha"]
+
+
+def _seed(client: TestClient, collection_name: str) -> None:
+    add_documents(client, collection_name, [f"doc-{i}" for i in range(len(DOCUMENTS))], DOCUMENTS)
+
+
+def test_concurrent_queries_share_one_batch_and_get_their_own_rows(client: TestClient, collection_name: str) -> None:
+    _seed(client, collection_name)
+
+    async def run() -> tuple[list, dict, list]:
+        batcher = QueryBatcher(window_seconds=0.05, max_texts=256)
+        results = await asyncio.gather(
+            batcher.query(collection_name, ["alpha"], 3),
+            batcher.query(collection_name, ["beta", "alpha"], 3),
+            batcher.query(collection_name, ["alpha"], 3),
+        )
+        stats = batcher.stats()
+        # Queried alone, each text is the only row of its own batch.
+        alone = [await QueryBatcher(0.0, 256).query(collection_name, [text], 3) for text in ("alpha", "beta")]
+        return results, stats, alone
+
+    (a, b, c), stats, (alpha, beta) = asyncio.run(run())
+
+    assert stats["requests"] == 3
+    assert stats["deduplicated"] == 1
+    assert stats["batches"] == 1
+    assert stats["texts"] == 2
+    assert a == c
+    assert a["ids"] == alpha["ids"] and a["distances"] == alpha["distances"]
+    assert b["ids"] == [beta["ids"][0], alpha["ids"][0]]
+    assert b["documents"] == [beta["documents"][0], alpha["documents"][0]]
+    assert len(b["metadatas"]) == 2
+
+
+def test_queries_with_different_parameters_are_not_merged(client: TestClient, collection_name: str) -> None:
+    _seed(client, collection_name)
+
+    async def run() -> tuple[list, dict]:
+        batcher = QueryBatcher(window_seconds=0.05, max_texts=256)
+        results = await asyncio.gather(
+            batcher.query(collection_name, ["alpha"], 1),
+            batcher.query(collection_name, ["alpha"], 2),
+            batcher.query(collection_name, ["alpha"], 2, where={"missing": "value"}),
+        )
+        return results, batcher.stats()
+
+    (one, two, filtered), stats = asyncio.run(run())
+
+    assert stats["batches"] == 3 and stats["deduplicated"] == 0
+    assert len(one["ids"][0]) == 1 and len(two["ids"][0]) == 2 and filtered["ids"] == [[]]
+
+
+def test_batch_is_flushed_early_at_max_texts(client: TestClient, collection_name: str) -> None:
+    _seed(client, collection_name)
+
+    async def run() -> dict:
+        # The window alone would hold the batch far longer than the timeout.
+        batcher = QueryBatcher(window_seconds=60, max_texts=2)
+        return await asyncio.wait_for(batcher.query(collection_name, ["alpha", "beta"], 2), timeout=5)
+
+    assert len(asyncio.run(run())["ids"]) == 2
+
+
+def test_failure_reaches_every_caller_of_the_batch(client: TestClient) -> None:
+    async def run() -> list:
+        batcher = QueryBatcher(window_seconds=0.01, max_texts=256)
+        return await asyncio.gather(
+            batcher.query("does-not-exist", ["alpha"], 1),
+            batcher.query("does-not-exist", ["beta"], 1),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(result, Exception) for result in asyncio.run(run()))
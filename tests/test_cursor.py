@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+from helpers import add_documents, delete_documents
+
+IDS = [f"doc-{i:02d}" for i in range(30)]
+
+
+def _page(client: TestClient, collection_name: str, cursor: str | None = None) -> tuple[list[str], str | None]:
+    response = client.post(
+        "/api/documents/get",
+        json={"collection_name": collection_name, "limit": 10, "cursor": cursor},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return body["data"]["ids"], body["next_cursor"]
+
+
+def test_scan_neither_skips_nor_repeats_across_deletes(client: TestClient, collection_name: str) -> None:
+    add_documents(client, collection_name, IDS)
+
+    first, cursor = _page(client, collection_name)
+    assert first == IDS[:10]
+    # Deleting in front of the cursor shifts every later offset back.
+    delete_documents(client, collection_name, IDS[2:7])
+    second, cursor = _page(client, collection_name, cursor)
+    assert second == IDS[10:20]
+    delete_documents(client, collection_name, [IDS[0], IDS[15]])
+    third, cursor = _page(client, collection_name, cursor)
+    assert third == IDS[20:30]
+    last, cursor = _page(client, collection_name, cursor)
+    assert last == [] and cursor is None
+
+
+def test_cursor_after_deleted_document_is_rejected(client: TestClient, collection_name: str) -> None:
+    add_documents(client, collection_name, IDS)
+    _, cursor = _page(client, collection_name)
+    delete_documents(client, collection_name, [IDS[9]])
+
+    response = client.post(
+        "/api/documents/get", json={"collection_name": collection_name, "limit": 10, "cursor": cursor}
+    )
+    assert response.status_code == 400
+    assert "no longer exists" in response.json()["detail"]
+
+
+def test_cursor_is_bound_to_its_filters(client: TestClient, collection_name: str) -> None:
+    add_documents(client, collection_name, IDS)
+    _, cursor = _page(client, collection_name)
+
+    response = client.post(
+        "/api/documents/get",
+        json={"collection_name": collection_name, "limit": 10, "cursor": cursor, "where_document": {"$contains": "0"}},
+    )
+    assert response.status_code == 400
+    assert "different filters" in response.json()["detail"]
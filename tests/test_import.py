@@ -0,0 +1,37 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import documents
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_parquet_body_spooled_to_disk_is_imported(
+    client: TestClient, collection_name: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Small limits so the body rolls over to disk and is written in several batches.
+    monkeypatch.setattr(documents, "PARQUET_SPOOL_BYTES", 4096)
+    monkeypatch.setattr(documents, "PARQUET_SPOOL_WRITE_BYTES", 1024)
+    table = pa.table(
+        {
+            "id": [f"doc-{i}" for i in range(500)],
+            "document": [f"document {i} " + "padding " * 10 for i in range(500)],
+            "metadata": [f'{{"i": {i}}}' for i in range(500)],
+        }
+    )
+    body = io.BytesIO()
+    pq.write_table(table, body, compression="none")
+    assert len(body.getvalue()) > 4 * 4096
+
+    response = client.post(
+        "/api/documents/import",
+        params={"collection_name": collection_name, "format": "parquet"},
+        content=body.getvalue(),
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["added"] == 500
+    stored = client.post("/api/documents/get", json={"collection_name": collection_name, "ids": ["doc-499"]}).json()
+    assert stored["data"]["metadatas"] == [{"i": 499}]
@@ -0,0 +1,83 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.embedding import HashingEmbeddingFunction
+from app.db.jobs import JobManager
+
+# A pid that cannot belong to a live process, standing in for a worker that died.
+DEAD_PID = 2**22 + 1
+
+
+async def _run_until_idle(manager: JobManager) -> None:
+    manager.start()
+    while True:
+        rows = manager._execute("SELECT status FROM jobs").fetchall()
+        if rows and all(status not in ("queued", "running") for (status,) in rows):
+            break
+        await asyncio.sleep(0.02)
+    await manager.stop()
+
+
+def _job(manager: JobManager) -> dict:
+    (job_id,) = manager._execute("SELECT id FROM jobs").fetchone()
+    return manager.get(job_id)
+
+
+@pytest.fixture
+def flaky_embeddings(monkeypatch: pytest.MonkeyPatch) -> dict[str, bool]:
+    """Make embedding fail for any chunk containing 'boom' while ``failing['on']`` is set."""
+    failing = {"on": True}
+    embed = HashingEmbeddingFunction.__call__
+
+    def flaky(self, input):
+        if failing["on"] and any("boom" in text for text in input):
+            raise RuntimeError("provider timeout")
+        return embed(self, input)
+
+    monkeypatch.setattr(HashingEmbeddingFunction, "__call__", flaky)
+    monkeypatch.setattr(get_settings(), "INGEST_CHUNK_SIZE", 10)
+    return failing
+
+
+def test_job_resumes_after_restart_from_the_first_failed_chunk(
+    client: TestClient, collection_name: str, tmp_path: Path, flaky_embeddings: dict[str, bool]
+) -> None:
+    path = str(tmp_path / "jobs.sqlite3")
+    ids = [f"doc-{i:02d}" for i in range(50)]
+    documents = [f"document {i}" + (" boom" if i == 25 else "") for i in range(50)]
+    manager = JobManager(path, max_concurrent=1, max_queued=10, retention_seconds=3600)
+    job_id = manager._insert("add", collection_name, ids, documents, None, None, False)
+    (payload,) = manager._execute("SELECT payload FROM jobs").fetchone()
+
+    asyncio.run(_run_until_idle(manager))
+    job = _job(manager)
+    assert (job["status"], job["done"], job["failed"]) == ("completed", 40, 10)
+    (resume_from,) = manager._execute("SELECT resume_from FROM jobs").fetchone()
+    # Chunks after the failed one succeeded, but the resume offset stays at the failed chunk.
+    assert resume_from == 20
+
+    # Pretend the process died while the job was running, before the payload was released.
+    manager._execute(
+        "UPDATE jobs SET status = 'running', owner = ?, payload = ? WHERE id = ?", (DEAD_PID, payload, job_id)
+    )
+    flaky_embeddings["on"] = False
+    restarted = JobManager(path, max_concurrent=1, max_queued=10, retention_seconds=3600)
+    asyncio.run(_run_until_idle(restarted))
+
+    job = _job(restarted)
+    assert (job["status"], job["done"], job["failed"], job["errors"]) == ("completed", 50, 0, [])
+    count = client.get(f"/api/collections/{collection_name}/count")
+    assert count.json() == 50
+
+
+def test_jobs_of_live_processes_are_not_claimed(tmp_path: Path) -> None:
+    path = str(tmp_path / "jobs.sqlite3")
+    manager = JobManager(path, max_concurrent=1, max_queued=10, retention_seconds=3600)
+    manager._insert("add", "other", ["a"], ["text"], None, None, False)
+    manager._execute("UPDATE jobs SET status = 'running', owner = 1")
+
+    assert JobManager(path, max_concurrent=1, max_queued=10, retention_seconds=3600)._claim_orphans() == []
@@ -0,0 +1,129 @@
+import math
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from helpers import add_documents
+
+from app.db.client import collection_registry
+from app.db.lexical import BM25_B, BM25_K1, INDEX_SUFFIX, InvertedIndex, LexicalIndexes
+
+DOCUMENTS = {
+    "a": "the quick brown fox",
+    "b": "the lazy dog sleeps",
+    "c": "a quick dog and a quick fox",
+    "d": "brown bread",
+}
+QUERIES = ["quick fox", "dog", "brown", "the", "missing"]
+
+
+def _index(documents: dict[str, str]) -> InvertedIndex:
+    index = InvertedIndex()
+    index.add(list(documents), list(documents.values()))
+    return index
+
+
+def _assert_same_search(index: InvertedIndex, expected: InvertedIndex) -> None:
+    assert len(index) == len(expected)
+    for query in QUERIES:
+        found, wanted = index.search(query, 10), expected.search(query, 10)
+        assert [id_ for id_, _ in found] == [id_ for id_, _ in wanted], query
+        assert [score for _, score in found] == pytest.approx([score for _, score in wanted]), query
+
+
+def test_incremental_writes_match_a_rebuild() -> None:
+    index = _index(DOCUMENTS)
+    index.search("quick", 10)  # converts postings to arrays, which writes must refresh
+    index.remove(["b", "unknown"])
+    index.add(["c", "e"], ["slow brown turtle", "quick quick quick"])
+    index.add(["a", "f"], ["the dog", "ignored"], existing_only=True)
+
+    expected = {"a": "the dog", "c": "slow brown turtle", "d": "brown bread", "e": "quick quick quick"}
+    _assert_same_search(index, _index(expected))
+
+
+def test_rows_of_removed_documents_are_reused() -> None:
+    index = _index(DOCUMENTS)
+    index.remove(["a", "b"])
+    index.add(["x", "y"], ["fox", "dog"])
+    assert len(index._ids) == len(DOCUMENTS)
+    _assert_same_search(index, _index({"c": DOCUMENTS["c"], "d": DOCUMENTS["d"], "x": "fox", "y": "dog"}))
+
+
+def test_search_scores_are_bm25() -> None:
+    tokens = {id_: text.split() for id_, text in DOCUMENTS.items()}
+    average = sum(len(terms) for terms in tokens.values()) / len(tokens)
+
+    def bm25(id_: str, query: str) -> float:
+        score = 0.0
+        for term in set(query.split()):
+            containing = sum(term in terms for terms in tokens.values())
+            frequency = tokens[id_].count(term)
+            if frequency:
+                idf = math.log(1 + (len(tokens) - containing + 0.5) / (containing + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens[id_]) / average)
+                score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return score
+
+    index = _index(DOCUMENTS)
+    for query in QUERIES:
+        expected = sorted(((id_, bm25(id_, query)) for id_ in DOCUMENTS), key=lambda item: -item[1])
+        expected = [(id_, score) for id_, score in expected if score > 0][:2]
+        results = index.search(query, 2)
+        assert [id_ for id_, _ in results] == [id_ for id_, _ in expected], query
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], rel=1e-5), query
+
+
+def test_save_and_load_round_trip_after_removals(tmp_path: Path) -> None:
+    index = _index(DOCUMENTS)
+    index.remove(["b"])
+    path = tmp_path / f"collection{INDEX_SUFFIX}"
+    index.save(path)
+
+    loaded = InvertedIndex.load(path)
+    _assert_same_search(loaded, index)
+    # The loaded index keeps accepting writes.
+    loaded.add(["b"], [DOCUMENTS["b"]])
+    loaded.remove(["d"])
+    _assert_same_search(loaded, _index({id_: text for id_, text in DOCUMENTS.items() if id_ != "d"}))
+
+
+def test_collection_index_is_maintained_and_persisted(client: TestClient, collection_name: str, tmp_path: Path) -> None:
+    add_documents(client, collection_name, list(DOCUMENTS), list(DOCUMENTS.values()))
+    collection = collection_registry.load(collection_name)
+    indexes = LexicalIndexes(tmp_path, flush_seconds=3600)
+    indexes.get(collection)
+    path = tmp_path / f"{collection.id}{INDEX_SUFFIX}"
+    assert path.exists()
+
+    collection.add(ids=["e"], documents=["quick brown dog"])
+    indexes.apply(collection, "add", ["e"], ["quick brown dog"])
+    collection.delete(ids=["a"])
+    indexes.apply(collection, "delete", ["a"])
+    # A changed index removes its saved copy until the next flush.
+    assert not path.exists()
+    indexes.flush()
+
+    expected = {id_: text for id_, text in DOCUMENTS.items() if id_ != "a"} | {"e": "quick brown dog"}
+    _assert_same_search(LexicalIndexes(tmp_path, flush_seconds=3600).get(collection), _index(expected))
+
+
+def test_upsert_without_documents_keeps_lexical_matches(client: TestClient, collection_name: str) -> None:
+    add_documents(client, collection_name, ["a", "b"], ["zebra crossing", "pelican crossing"])
+    query = {
+        "collection_name": collection_name,
+        "query_texts": ["zebra"],
+        "n_results": 2,
+        "vector_weight": 0,
+        "lexical_weight": 1,
+    }
+    assert client.post("/api/documents/query/hybrid", json=query).json()["data"]["ids"] == [["a"]]
+
+    # Chroma keeps the stored text of documents upserted with embeddings only.
+    response = client.post(
+        "/api/documents/upsert",
+        json={"collection_name": collection_name, "ids": ["a", "c"], "embeddings": [[0.5] * 64, [0.25] * 64]},
+    )
+    assert response.status_code == 200, response.text
+    assert client.post("/api/documents/query/hybrid", json=query).json()["data"]["ids"] == [["a"]]
+    assert len(collection_registry.load(collection_name).get(include=[])["ids"]) == 3
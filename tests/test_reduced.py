@@ -0,0 +1,129 @@
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from helpers import add_documents
+
+from app.core.config import get_settings
+from app.db.client import collection_registry
+from app.db.reduced import VectorSidecar, rerank, vector_sidecars
+
+
+def _vectors(count: int, dimension: int = 8, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+
+def test_lookup_returns_stored_vectors_and_masks_missing_ids(tmp_path: Path) -> None:
+    sidecar = VectorSidecar(tmp_path / "collection")
+    vectors = _vectors(3)
+    sidecar.store(["a", "b", "c"], vectors)
+
+    found_vectors, found = sidecar.lookup(["c", "missing", "a"])
+    assert found.tolist() == [True, False, True]
+    np.testing.assert_array_equal(found_vectors[[0, 2]], vectors[[2, 0]])
+    np.testing.assert_array_equal(found_vectors[1], np.zeros(8, dtype=np.float32))
+
+
+def test_known_ids_are_overwritten_in_place(tmp_path: Path) -> None:
+    sidecar = VectorSidecar(tmp_path / "collection")
+    sidecar.store(["a", "b"], _vectors(2))
+    replacement = _vectors(3, seed=1)
+    # "b" appears twice in one write: the last vector wins.
+    sidecar.store(["b", "c", "b"], replacement)
+
+    assert sidecar.count == 3
+    assert sidecar.rows == {"a": 0, "b": 1, "c": 2}
+    vectors, _ = sidecar.lookup(["b", "c"])
+    np.testing.assert_array_equal(vectors, replacement[[2, 1]])
+
+
+def test_dimension_mismatch_is_rejected(tmp_path: Path) -> None:
+    sidecar = VectorSidecar(tmp_path / "collection")
+    sidecar.store(["a"], _vectors(1))
+    with pytest.raises(ValueError, match="dimension"):
+        sidecar.store(["b"], _vectors(1, dimension=4))
+
+
+def test_rows_are_read_back_by_other_instances(tmp_path: Path) -> None:
+    prefix = tmp_path / "collection"
+    writer, reader = VectorSidecar(prefix), VectorSidecar(prefix)
+    vectors = _vectors(4)
+    writer.store(["a", "b"], vectors[:2])
+    # The reader was opened before the write and picks the new rows up on lookup, like another worker.
+    np.testing.assert_array_equal(reader.lookup(["a", "b"])[0], vectors[:2])
+    writer.store(["c", "d"], vectors[2:])
+
+    ids, matrix = VectorSidecar(prefix).matrix()
+    assert ids == ["a", "b", "c", "d"]
+    np.testing.assert_array_equal(matrix, vectors)
+
+
+def test_rerank_orders_candidates_by_exact_distance(tmp_path: Path) -> None:
+    sidecar = VectorSidecar(tmp_path / "collection")
+    vectors = _vectors(5)
+    sidecar.store([f"doc-{i}" for i in range(5)], vectors)
+    query = vectors[3] + 0.01
+
+    order, distances, _ = rerank(sidecar, ["doc-0", "missing", "doc-3", "doc-1"], query, "l2", 3)
+    expected = np.sum((vectors[[0, 3, 1]] - query) ** 2, axis=1)
+    assert order[0] == 2
+    assert sorted(distances.tolist()) == pytest.approx(sorted(expected.tolist()))
+    assert np.isfinite(distances).all()
+
+
+def test_reduced_collection_returns_full_vectors(client: TestClient) -> None:
+    name = f"test-{uuid.uuid4().hex[:12]}"
+    response = client.post("/api/collections/", json={"collection_name": name, "reduced_dimensions": 16})
+    assert response.status_code == 200, response.text
+    try:
+        documents = ["red apples", "green pears", "yellow bananas", "red cherries"]
+        add_documents(client, name, [f"doc-{i}" for i in range(4)], documents)
+        assert client.get(f"/api/collections/{name}/info").json()["reduced_dimensions"] == 16
+
+        response = client.post(
+            "/api/documents/query",
+            json={
+                "collection_name": name,
+                "query_texts": ["green pears"],
+                "n_results": 2,
+                "include": ["embeddings", "distances"],
+            },
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()["data"]
+        assert data["ids"][0][0] == "doc-1"
+        assert data["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+        assert len(data["embeddings"][0][0]) == 64
+    finally:
+        client.delete(f"/api/collections/{name}")
+
+
+def test_reduced_collection_needs_a_persistent_sidecar_directory(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_settings(), "CHROMA_CLIENT_TYPE", "http")
+    monkeypatch.setattr(vector_sidecars, "persistent", False)
+    name = f"test-{uuid.uuid4().hex[:12]}"
+
+    response = client.post("/api/collections/", json={"collection_name": name, "reduced_dimensions": 16})
+    assert response.status_code == 400
+    assert "CHROMA_DATA_DIR" in response.json()["detail"]
+    assert name not in client.get("/api/collections/", params={"limit": 1000}).json()["collections"]
+
+
+def test_query_fails_when_the_sidecar_is_lost(client: TestClient) -> None:
+    name = f"test-{uuid.uuid4().hex[:12]}"
+    response = client.post("/api/collections/", json={"collection_name": name, "reduced_dimensions": 16})
+    assert response.status_code == 200, response.text
+    try:
+        add_documents(client, name, ["a", "b"], ["red apples", "green pears"])
+        # Lose the full vectors, as a restart would with a temporary sidecar directory.
+        vector_sidecars.drop(str(collection_registry.load(name).id))
+
+        response = client.post("/api/documents/query", json={"collection_name": name, "query_texts": ["pears"]})
+        assert response.status_code == 500
+        assert "full vectors" in response.json()["detail"]
+    finally:
+        client.delete(f"/api/collections/{name}")
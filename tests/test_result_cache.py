@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from helpers import add_documents
+
+from app.db.result_cache import ResultCache
+from app.models.document import GetDocumentsRequest
+
+DIGEST = ResultCache.digest("get", GetDocumentsRequest(collection_name="books"), "application/json")
+
+
+def test_entry_is_served_until_the_collection_is_written() -> None:
+    cache = ResultCache(max_bytes=1 << 20, ttl_seconds=60)
+    generation = cache.generation("books")
+    cache.put("books", generation, DIGEST, b"body", "application/json")
+    assert cache.get("books", generation, DIGEST) == (b"body", "application/json")
+
+    cache.invalidate("books")
+    assert cache.get("books", cache.generation("books"), DIGEST) is None
+    assert cache.get("books", generation, DIGEST) is None
+
+
+def test_result_of_a_read_racing_a_write_is_never_stored() -> None:
+    cache = ResultCache(max_bytes=1 << 20, ttl_seconds=60)
+    # The read observes the generation, then a write lands before its result is stored.
+    observed = cache.generation("books")
+    cache.invalidate("books")
+    cache.put("books", observed, DIGEST, b"stale", "application/json")
+
+    assert cache.stats()["entries"] == 0
+    assert cache.get("books", cache.generation("books"), DIGEST) is None
+
+
+def test_invalidation_is_per_collection() -> None:
+    cache = ResultCache(max_bytes=1 << 20, ttl_seconds=60)
+    for name in ("books", "films"):
+        cache.put(name, cache.generation(name), DIGEST, name.encode(), "application/json")
+
+    cache.invalidate("books")
+    assert cache.get("films", cache.generation("films"), DIGEST) == (b"films", "application/json")
+
+
+def test_empty_fields_share_an_entry_with_unset_ones() -> None:
+    unset = GetDocumentsRequest(collection_name="books")
+    empty = GetDocumentsRequest(collection_name="books", ids=[], where={}, where_document={}, cursor="")
+    assert ResultCache.digest("get", unset, "application/json") == ResultCache.digest("get", empty, "application/json")
+
+
+def test_writes_through_the_api_invalidate_cached_reads(client: TestClient, collection_name: str) -> None:
+    request = {"collection_name": collection_name, "limit": 100}
+    add_documents(client, collection_name, ["a", "b"])
+    first = client.post("/api/documents/get", json=request).json()
+    hits = client.get("/api/cache/stats").json()["query"]["hits"]
+    assert client.post("/api/documents/get", json=request).json() == first
+    assert client.get("/api/cache/stats").json()["query"]["hits"] == hits + 1
+
+    add_documents(client, collection_name, ["c"])
+    assert client.post("/api/documents/get", json=request).json()["data"]["ids"] == ["a", "b", "c"]